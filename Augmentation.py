@@ -0,0 +1,70 @@
+import time
+import tensorflow as tf
+from tensorflow.keras import layers
+
+'''
+Aumento de dados (data augmentation) executado no grafo do TensorFlow, por lote, dentro do pipeline tf.data.
+Ao contrário das transformações do ImageDataGenerator (uma imagem por vez, em Python), as camadas de
+pré-processamento do Keras operam sobre o lote inteiro e rodam em paralelo ao passo de treinamento
+(map com num_parallel_calls + prefetch), fora do caminho crítico.
+'''
+
+# Transformações disponíveis e a camada correspondente (imagens normalizadas entre 0 e 1)
+AUGMENTATIONS = {
+    'flip': lambda: layers.RandomFlip('horizontal'),  # espelhamento horizontal
+    'rotation': lambda: layers.RandomRotation(0.05, fill_mode='reflect'),  # rotação de até ±18°
+    'brightness': lambda: layers.RandomBrightness(0.1, value_range=(0.0, 1.0)),  # brilho ±10%
+    'contrast': lambda: layers.RandomContrast(0.1),  # contraste ±10%
+    'crop': lambda: layers.RandomZoom((-0.15, 0.0), fill_mode='reflect'),  # recorte aleatório de até 15%
+}
+
+
+class Augmentation:
+
+    def __init__(self, names):
+        """
+        parametro names: Transformações aplicadas, na ordem de AUGMENTATIONS (ex: ['flip', 'rotation'])
+        """
+        invalid = [name for name in names if name not in AUGMENTATIONS]
+        if invalid:
+            raise ValueError(f"Aumento de dados inválido: {', '.join(invalid)}")
+
+        self.names = [name for name in AUGMENTATIONS if name in names]
+        self.layers = tf.keras.Sequential([AUGMENTATIONS[name]() for name in self.names], name="augmentation")
+
+    def augment(self, images, labels):
+        # As transformações de brilho/contraste podem sair do intervalo [0, 1]
+        return tf.clip_by_value(self.layers(images, training=True), 0.0, 1.0), labels
+
+    def apply(self, dataset):
+        # Aplicado sobre lotes já normalizados (após o Model.rescale), apenas no conjunto de treinamento
+        return dataset.map(self.augment, num_parallel_calls=tf.data.AUTOTUNE)
+
+    def pipeline_time(self, img_size, batch_size, augment, steps=10):
+        # Tempo médio, em milissegundos, para obter um lote sintético de um pipeline tf.data com (ou sem) o
+        # aumento de dados, montado como nos pipelines de treinamento (map paralelo + prefetch)
+        batch = tf.random.uniform((batch_size, *img_size, 3))
+        labels = tf.zeros((batch_size,))
+        dataset = tf.data.Dataset.from_tensors((batch, labels)).repeat(steps + 1)
+        if augment:
+            dataset = self.apply(dataset)
+        iterator = iter(dataset.prefetch(tf.data.AUTOTUNE))
+        next(iterator)  # o primeiro lote inclui o tracing do grafo
+
+        start = time.perf_counter()
+        for images, _ in iterator:
+            images.numpy()
+        return 1000 * (time.perf_counter() - start) / steps
+
+    def measure(self, img_size, batch_size, steps=10):
+        """
+        Custo por lote do pipeline tf.data sobre lotes sintéticos (img_size, batch_size), sem e com o aumento
+        de dados. Retorna (ms por lote sem aumento, ms por lote com aumento).
+        """
+        return (self.pipeline_time(img_size, batch_size, False, steps),
+                self.pipeline_time(img_size, batch_size, True, steps))
+
+    def report(self, img_size, batch_size):
+        without, with_augmentation = self.measure(img_size, batch_size)
+        return (f"Aumento de dados: {', '.join(self.names)} - pipeline com {with_augmentation:.1f} ms por lote "
+                f"(sem aumento: {without:.1f} ms, +{with_augmentation - without:.1f} ms)")
@@ -0,0 +1,26 @@
+import importlib
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Módulos que dependem do TensorFlow, carregados em segundo plano após a janela ser exibida
+BACKEND_MODULES = ('tensorflow', 'CNNModel', 'FeatureExtractor', 'TrainerThread')
+
+
+class BackendLoader(QThread):
+
+    backend_loaded = pyqtSignal(float)  # tempo de carregamento, em segundos
+    backend_failed = pyqtSignal(str)
+
+    def run(self):
+        """
+        Importa o TensorFlow e os módulos que dependem dele. Caso o usuário utilize alguma função antes do fim
+        do carregamento, a importação feita pela própria função apenas aguarda a conclusão desta thread.
+        """
+        start = time.perf_counter()
+        try:
+            for module in BACKEND_MODULES:
+                importlib.import_module(module)
+            self.backend_loaded.emit(time.perf_counter() - start)
+
+        except Exception as e:
+            self.backend_failed.emit(str(e))
@@ -0,0 +1,286 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import tensorflow as tf
+from CNNModel import CNNModel
+from Model import Model
+from TrainingCallbacks import process_memory_mb
+
+'''
+Benchmarks reproduzíveis do carregamento de dados, do passo de treinamento e da inferência, executados sobre um
+dataset sintético (gerado uma única vez em benchmarks/dataset/), sem depender do dataset real.
+Os resultados são gravados em JSON, com o commit atual, para comparação entre versões.
+
+Exemplos:
+    python -m Benchmark
+    python -m Benchmark --input-sizes 128 224 --batch-sizes 16 32 --output antes.json
+    python -m Benchmark --output depois.json --compare antes.json
+'''
+
+BENCHMARK_DIR = "benchmarks/"
+
+# Pipelines de dados medidos: (pipeline, cache) de Model.load_data
+PIPELINES = (('generator', None), ('tfdata', None), ('tfdata', 'memory'), ('cached', None), ('streaming', None))
+
+
+class MemorySampler:
+
+    def __init__(self, interval=0.01):
+        """
+        Pico de memória residente (RSS) durante um trecho do benchmark, amostrado em uma thread a cada interval
+        segundos. O ru_maxrss do módulo resource é o pico de toda a vida do processo e nunca diminui entre as
+        configurações; aqui cada configuração informa o seu próprio pico e o acréscimo em relação à memória
+        de antes do seu início.
+            with MemorySampler() as memory:
+                ...
+            memory.peak_mb, memory.delta_mb
+        """
+        self.interval = interval
+        self.baseline_mb = None
+        self.peak_mb = None
+        self.stop = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        current = process_memory_mb()
+        if current is not None:
+            self.peak_mb = current if self.peak_mb is None else max(self.peak_mb, current)
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        gc.collect()
+        self.baseline_mb = process_memory_mb()
+        self.peak_mb = self.baseline_mb
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop.set()
+        self.thread.join()
+        self.sample()
+        return False
+
+    @property
+    def delta_mb(self):
+        if self.peak_mb is None or self.baseline_mb is None:
+            return None
+        return self.peak_mb - self.baseline_mb
+
+
+def git_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return output.stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Benchmark:
+
+    def __init__(self, num_classes=3, images_per_class=64, image_size=256, seed=0, log=print):
+        """
+        parametro num_classes / images_per_class: Tamanho do dataset sintético
+        parametro image_size: Resolução das imagens geradas (redimensionadas pelos pipelines para o input size)
+        parametro seed: Semente das imagens geradas, para que todas as execuções meçam os mesmos dados
+        """
+        self.num_classes = num_classes
+        self.images_per_class = images_per_class
+        self.image_size = image_size
+        self.seed = seed
+        self.log = log
+        self.dataset_path = os.path.join(BENCHMARK_DIR, "dataset",
+                                         f"{num_classes}x{images_per_class}_{image_size}px_seed{seed}")
+
+    def generate_dataset(self):
+        # Imagens PNG com ruído aleatório, uma subpasta por classe; reaproveitadas se já existirem
+        marker = os.path.join(self.dataset_path, ".complete")
+        if os.path.exists(marker):
+            return self.dataset_path
+
+        self.log(f"Gerando dataset sintético em {self.dataset_path}...")
+        rng = np.random.default_rng(self.seed)
+        for index in range(self.num_classes):
+            class_dir = os.path.join(self.dataset_path, f"classe_{index}")
+            os.makedirs(class_dir, exist_ok=True)
+            for position in range(self.images_per_class):
+                image = rng.integers(0, 256, (self.image_size, self.image_size, 3), dtype=np.uint8)
+                tf.io.write_file(os.path.join(class_dir, f"{position:05d}.png"), tf.io.encode_png(image))
+
+        open(marker, "w").close()
+        return self.dataset_path
+
+    def bench_pipeline(self, input_size, batch_size, epochs=2):
+        """
+        Imagens por segundo de cada pipeline de dados (leitura + decodificação + redimensionamento + lotes),
+        por época: a primeira época inclui o preenchimento dos caches, as seguintes medem o regime permanente.
+        """
+        results = []
+        for pipeline, cache in PIPELINES:
+            with MemorySampler() as memory:
+                train_data = Model.load_data(self.dataset_path, (input_size, input_size), batch_size, 0.3,
+                                             pipeline, cache)[0]
+                epoch_rates = []
+                for _ in range(epochs):
+                    images = 0
+                    start = time.perf_counter()
+                    # O ImageDataGenerator é infinito, por isso a época é limitada pelo seu comprimento
+                    for step, (batch, _) in enumerate(train_data):
+                        images += len(batch)
+                        if step + 1 >= len(train_data):
+                            break
+                    epoch_rates.append(images / (time.perf_counter() - start))
+
+            results.append({'pipeline': pipeline, 'cache': cache, 'input_size': input_size,
+                            'batch_size': batch_size, 'images_per_second': epoch_rates,
+                            'peak_rss_mb': memory.peak_mb, 'peak_delta_mb': memory.delta_mb})
+            self.log(f"Pipeline {pipeline} (cache {cache}): "
+                     + " / ".join(f"{rate:.1f}" for rate in epoch_rates) + " imagens/s por época"
+                     + Benchmark.format_memory(memory))
+            train_data = None
+        return results
+
+    @staticmethod
+    def format_memory(memory):
+        if memory.delta_mb is None:
+            return ""
+        return f" - pico de memória {memory.peak_mb:.0f} MB (+{memory.delta_mb:.0f} MB)"
+
+    def bench_train_step(self, input_size, batch_size, head='flatten', precision='float32', steps=5):
+        # Tempo do passo de treinamento (forward + backward + Adam) sobre um lote sintético fixo. A memória inclui
+        # a construção do modelo e é medida apenas durante esta configuração (ver MemorySampler)
+        with MemorySampler() as memory:
+            network = CNNModel((input_size, input_size, 3), self.num_classes, head, precision).build_model()
+            images = tf.random.uniform((batch_size, input_size, input_size, 3), seed=self.seed)
+            labels = tf.one_hot(tf.range(batch_size) % self.num_classes, self.num_classes)
+
+            network.train_on_batch(images, labels)  # a primeira chamada inclui a construção do grafo
+            step_times = []
+            for _ in range(steps):
+                start = time.perf_counter()
+                network.train_on_batch(images, labels)
+                step_times.append(1000 * (time.perf_counter() - start))
+
+        result = {'input_size': input_size, 'batch_size': batch_size, 'head': head, 'precision': precision,
+                  'step_ms': float(np.median(step_times)),
+                  'images_per_second': 1000 * batch_size / float(np.median(step_times)),
+                  'rss_mb': process_memory_mb(), 'peak_rss_mb': memory.peak_mb, 'peak_delta_mb': memory.delta_mb}
+        self.log(f"Passo de treinamento ({input_size}px, batch {batch_size}): {result['step_ms']:.1f} ms - "
+                 f"{result['images_per_second']:.1f} imagens/s" + Benchmark.format_memory(memory))
+        return network, result
+
+    def bench_inference(self, network, input_size, batch_size, repeat=20):
+        # Latência de uma única imagem (p50/p95) e vazão com lotes de batch_size imagens
+        single = tf.random.uniform((1, input_size, input_size, 3), seed=self.seed)
+        batch = tf.random.uniform((batch_size, input_size, input_size, 3), seed=self.seed)
+        network.predict_on_batch(single)
+        network.predict_on_batch(batch)
+
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            network.predict_on_batch(single)
+            latencies.append(1000 * (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for _ in range(max(repeat // 4, 1)):
+            network.predict_on_batch(batch)
+        elapsed = time.perf_counter() - start
+
+        result = {'input_size': input_size, 'batch_size': batch_size,
+                  'latency_p50_ms': float(np.percentile(latencies, 50)),
+                  'latency_p95_ms': float(np.percentile(latencies, 95)),
+                  'images_per_second': max(repeat // 4, 1) * batch_size / elapsed}
+        self.log(f"Inferência ({input_size}px): latência p50 {result['latency_p50_ms']:.1f} ms - "
+                 f"p95 {result['latency_p95_ms']:.1f} ms - {result['images_per_second']:.1f} imagens/s "
+                 f"(lotes de {batch_size})")
+        return result
+
+    def run(self, input_sizes=(128,), batch_sizes=(32,), head='flatten', precision='float32',
+            skip_pipeline=False):
+        self.generate_dataset()
+        results = {
+            'commit': git_commit(),
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'tensorflow': tf.__version__,
+            'cpu_count': os.cpu_count(),
+            'config': {'num_classes': self.num_classes, 'images_per_class': self.images_per_class,
+                       'image_size': self.image_size, 'seed': self.seed, 'head': head, 'precision': precision},
+            'pipeline': [], 'train_step': [], 'inference': [],
+        }
+
+        for input_size in input_sizes:
+            for batch_size in batch_sizes:
+                if not skip_pipeline:
+                    results['pipeline'] += self.bench_pipeline(input_size, batch_size)
+
+                network, result = self.bench_train_step(input_size, batch_size, head, precision)
+                results['train_step'].append(result)
+                results['inference'].append(self.bench_inference(network, input_size, batch_size))
+
+                # Cada combinação começa com a memória liberada
+                network = None
+                tf.keras.backend.clear_session()
+                gc.collect()
+
+        return results
+
+    @staticmethod
+    def compare(current, previous, log=print):
+        # Razão entre as vazões (imagens/s) de duas execuções, para as mesmas configurações
+        log(f"Comparação: {current.get('commit')} × {previous.get('commit')}")
+        for section, keys in (('pipeline', ('pipeline', 'cache', 'input_size', 'batch_size')),
+                              ('train_step', ('input_size', 'batch_size', 'head', 'precision')),
+                              ('inference', ('input_size', 'batch_size'))):
+            old = {tuple(entry.get(k) for k in keys): entry for entry in previous.get(section, [])}
+            for entry in current.get(section, []):
+                key = tuple(entry.get(k) for k in keys)
+                if key not in old:
+                    continue
+                new_rate, old_rate = entry['images_per_second'], old[key]['images_per_second']
+                if isinstance(new_rate, list):
+                    new_rate, old_rate = new_rate[-1], old_rate[-1]
+                log(f"{section} {key}: {old_rate:.1f} → {new_rate:.1f} imagens/s ({new_rate / old_rate:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de dados, do treinamento e da inferência")
+    parser.add_argument('--input-sizes', type=int, nargs='+', default=[128], help="Input sizes medidos")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32], help="Batch sizes medidos")
+    parser.add_argument('--head', default='flatten', help="Cabeça da rede (ver CNNModel)")
+    parser.add_argument('--precision', default='float32', help="Política de precisão (ver CNNModel)")
+    parser.add_argument('--images-per-class', type=int, default=64, help="Tamanho do dataset sintético")
+    parser.add_argument('--skip-pipeline', action='store_true', help="Não medir os pipelines de dados")
+    parser.add_argument('--output', help="Arquivo JSON de resultados (padrão: benchmarks/<commit>.json)")
+    parser.add_argument('--compare', help="Resultados anteriores (JSON) para comparação")
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(images_per_class=args.images_per_class)
+    results = benchmark.run(args.input_sizes, args.batch_sizes, args.head, args.precision, args.skip_pipeline)
+
+    output = args.output or os.path.join(BENCHMARK_DIR, f"{results['commit'] or 'resultados'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            Benchmark.compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
-from PyQt5.QtCore import pyqtSignal
-from tensorflow.keras import layers, models
+import math
+import os
+import tensorflow as tf
+from tensorflow.keras import layers, models, optimizers
 from tensorflow.keras.applications import ResNet50
 
 '''
@@ -10,32 +12,196 @@ Utilização da rede ResNet pré treinada em razão de:
 '''
 
 
+# Tipos de cabeça suportados: forma de transformar a saída 7x7x2048 da ResNet50 em um vetor
+HEAD_TYPES = ('flatten', 'gap', 'gmp', 'gem')
+
+# Políticas de precisão do Keras: float32 (padrão) ou precisão mista (cálculos em 16 bits, pesos em 32 bits)
+PRECISIONS = ('float32', 'mixed_float16', 'mixed_bfloat16')
+
+
+class GeMPooling2D(layers.Layer):
+
+    def __init__(self, p=3.0, eps=1e-6, **kwargs):
+        """
+        Generalized Mean Pooling: (média de x^p)^(1/p), com p aprendido durante o treinamento.
+        Com p = 1 equivale ao pooling médio e, conforme p cresce, se aproxima do pooling máximo.
+        """
+        super().__init__(**kwargs)
+        self.initial_p = p
+        self.eps = eps
+
+    def build(self, input_shape):
+        self.p = self.add_weight(name='p', shape=(), initializer=tf.keras.initializers.Constant(self.initial_p),
+                                 trainable=True)
+        super().build(input_shape)
+
+    def call(self, inputs):
+        inputs = tf.pow(tf.maximum(inputs, self.eps), self.p)
+        return tf.pow(tf.reduce_mean(inputs, axis=[1, 2]), 1.0 / self.p)
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({'p': self.initial_p, 'eps': self.eps})
+        return config
+
+
+class GradientAccumulationModel(tf.keras.Model):
+
+    def __init__(self, model, accumulation_steps, **kwargs):
+        """
+        Acumulação de gradientes: os gradientes de accumulation_steps lotes consecutivos (micro-lotes) são somados
+        e aplicados de uma só vez, equivalendo a um lote efetivo de batch_size * accumulation_steps imagens com a
+        memória de ativações de apenas um micro-lote.
+        O modelo original (inner_model) compartilha as camadas e é o que deve ser salvo (ver ModelExporter).
+        """
+        super().__init__(inputs=model.inputs, outputs=model.outputs, **kwargs)
+        self.inner_model = model
+        self.accumulation_steps = accumulation_steps
+        self.micro_step = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.accumulated = [tf.Variable(tf.zeros_like(variable), trainable=False)
+                            for variable in model.trainable_variables]
+
+    def build_optimizer_weights(self):
+        # Os momentos do Adam são criados aqui, fora do tf.cond de apply_accumulated (o TensorFlow não permite
+        # criar variáveis dentro de um ramo condicional)
+        optimizer = getattr(self.optimizer, 'inner_optimizer', self.optimizer)
+        if hasattr(optimizer, '_create_all_weights'):
+            optimizer._create_all_weights(self.inner_model.trainable_variables)
+        else:
+            optimizer.build(self.inner_model.trainable_variables)
+
+    def apply_accumulated(self):
+        self.optimizer.apply_gradients(zip([g for g in self.accumulated], self.inner_model.trainable_variables))
+        for gradient in self.accumulated:
+            gradient.assign(tf.zeros_like(gradient))
+        return tf.constant(True)
+
+    def train_step(self, data):
+        x, y = data
+        self.build_optimizer_weights()
+        mixed_float16 = isinstance(self.optimizer, tf.keras.mixed_precision.LossScaleOptimizer)
+
+        with tf.GradientTape() as tape:
+            y_pred = self(x, training=True)
+            loss = self.compiled_loss(y, y_pred, regularization_losses=self.losses)
+            scaled_loss = loss / self.accumulation_steps
+            if mixed_float16:
+                scaled_loss = self.optimizer.get_scaled_loss(scaled_loss)
+
+        gradients = tape.gradient(scaled_loss, self.inner_model.trainable_variables)
+        if mixed_float16:
+            gradients = self.optimizer.get_unscaled_gradients(gradients)
+
+        for accumulated, gradient in zip(self.accumulated, gradients):
+            if gradient is not None:
+                accumulated.assign_add(tf.cast(gradient, accumulated.dtype))
+
+        self.micro_step.assign_add(1)
+        tf.cond(tf.equal(self.micro_step % self.accumulation_steps, 0),
+                self.apply_accumulated, lambda: tf.constant(False))
+
+        self.compiled_metrics.update_state(y, y_pred)
+        return {metric.name: metric.result() for metric in self.metrics}
+
+
 class CNNModel:
 
-    log_signal = pyqtSignal(str)  # sinal para enviar mensagens de log ao PyQt
+    # Pesos da ResNet50 (ImageNet) mantidos em memória entre execuções no mesmo processo (ver ExperimentQueue).
+    # None desativa o cache; um dicionário vazio o ativa
+    cached_weights = None
 
-    def __init__(self, input_shape=(128, 128, 3), num_classes=3):
+    def __init__(self, input_shape=(128, 128, 3), num_classes=3, head_type='flatten', precision='float32',
+                 jit_compile=False, accumulation_steps=1):
         """
         Classe responsável por definir a arquitetura de rede neural
         parametro input_shape: Define as dimensões das entradas (imagens).
         parametro num_classes: Define a quantidade de classes na saída.
+        parametro head_type: Define a camada entre a ResNet50 e as camadas densas ('flatten', 'gap', 'gmp' ou 'gem').
+        parametro precision: Política de precisão ('float32', 'mixed_float16' ou 'mixed_bfloat16').
+        parametro jit_compile: Compila os passos de treinamento com o XLA.
+        parametro accumulation_steps: Micro-lotes acumulados por atualização dos pesos (1 = desativado), apenas
+                                      para o modelo completo (build_model).
         """
+        if head_type not in HEAD_TYPES:
+            raise ValueError(f"Tipo de cabeça inválido: {head_type}. Opções: {', '.join(HEAD_TYPES)}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Precisão inválida: {precision}. Opções: {', '.join(PRECISIONS)}")
+
         self.input_shape = input_shape
         self.num_classes = num_classes
+        self.head_type = head_type
+        self.precision = precision
+        self.jit_compile = jit_compile
+        self.accumulation_steps = max(1, accumulation_steps)
+
+    def apply_precision_policy(self):
+        """
+        A política de precisão do Keras é global e vale para as camadas criadas a partir deste ponto, por isso
+        é definida sempre antes da construção de cada modelo.
+            * 'mixed_float16' → cálculos em float16, indicado para GPUs
+            * 'mixed_bfloat16' → cálculos em bfloat16, indicado para CPUs com suporte a bf16 (ex: AVX512-BF16, AMX)
+        """
+        tf.keras.mixed_precision.set_global_policy(self.precision)
+
+    def load_resnet50(self, pooling=None):
+        """
+        Carrega a ResNet50 sem a camada de saída. Os pesos sem o topo não dependem do input size nem do pooling,
+        então, com o cache ativo, são lidos do disco apenas na primeira construção e copiados nas seguintes.
+        """
+        if CNNModel.cached_weights is None:
+            return ResNet50(weights='imagenet', include_top=False, input_shape=self.input_shape, pooling=pooling)
+
+        if 'resnet50' not in CNNModel.cached_weights:
+            backbone = ResNet50(weights='imagenet', include_top=False, input_shape=self.input_shape, pooling=pooling)
+            CNNModel.cached_weights['resnet50'] = backbone.get_weights()
+            return backbone
+
+        backbone = ResNet50(weights=None, include_top=False, input_shape=self.input_shape, pooling=pooling)
+        backbone.set_weights(CNNModel.cached_weights['resnet50'])
+        return backbone
 
     def build_model(self):
+        self.apply_precision_policy()
+
         # Carregando a ResNet50 sem a camada de saída original
-        base_model = ResNet50(weights='imagenet', include_top=False, input_shape=self.input_shape)
+        base_model = self.load_resnet50()
 
         # Definição do modelo como sequêncial, onde as camadas são adicionadas uma após a outra.
         model = models.Sequential([
 
             base_model,
 
-            # Transforma a saída das camadas convolucionais (um volume 3D) em um vetor 1D
-            # para que possa ser passado para a camada densa.
-            layers.Flatten(),
+            self.build_pooling_layer(),
+
+            *self.build_head_layers()
+        ])
+
+        if self.accumulation_steps > 1:
+            model = GradientAccumulationModel(model, self.accumulation_steps)
 
+        self.compile_model(model)
+
+        return model
+
+    def build_pooling_layer(self):
+        """
+        Transforma a saída das camadas convolucionais (um volume 3D) em um vetor 1D
+        para que possa ser passado para a camada densa.
+            * 'flatten' → mantém todas as posições (7x7x2048 = 100352 valores em 224x224), a primeira camada
+              densa cresce com o input size
+            * 'gap' / 'gmp' → média / máximo de cada canal, vetor de 2048 valores independente do input size
+            * 'gem' → pooling de média generalizada (GeMPooling2D), também com 2048 valores
+        """
+        if self.head_type == 'gap':
+            return layers.GlobalAveragePooling2D()
+        if self.head_type == 'gmp':
+            return layers.GlobalMaxPooling2D()
+        if self.head_type == 'gem':
+            return GeMPooling2D()
+        return layers.Flatten()
+
+    def build_head_layers(self):
+        return [
             # Definição da primeira camada Densa, totalmente conectada
             # layers.Dense(128, activation='relu'),
             #     * 128 → Quantidade de neurônios na camada
@@ -49,9 +215,12 @@ class CNNModel:
 
             # Camada de saída, com número de neurônios igual ao número de classes.
             # A função de ativação softmax transforma os valores de saída em probabilidades para cada classe.
-            layers.Dense(self.num_classes, activation='softmax')  # 3 classes (dor, não dor, dor moderada)
-        ])
+            # 3 classes (dor, não dor, dor moderada)
+            # obs: dtype='float32' mantém a softmax em 32 bits mesmo com precisão mista, evitando instabilidade numérica
+            layers.Dense(self.num_classes, activation='softmax', dtype='float32')
+        ]
 
+    def compile_model(self, model, learning_rate=None):
         """
             Função responsável por compilar o modelo e dar inicio ao treinamento
             O metodo .compile() define as configurações do modelo antes do treinamento
@@ -60,11 +229,183 @@ class CNNModel:
                 * loss='categorical_crossentropy' → Essa é a função de erro usada para
                   problemas de classificação multiclasse.
                 * metrics=['accuracy'] → Define que a acurácia será monitorada durante o treinamento.
+                * jit_compile → Compila o passo de treinamento com o XLA, fundindo operações
+            parametro learning_rate: Taxa de aprendizado do Adam (None mantém o padrão do Keras)
+
+            obs: Com 'mixed_float16' o otimizador é envolvido por um LossScaleOptimizer, que multiplica a loss
+            antes do cálculo dos gradientes para que valores pequenos não sejam zerados em float16
         """
+        optimizer = optimizers.Adam() if learning_rate is None else optimizers.Adam(learning_rate=learning_rate)
+        if self.precision == 'mixed_float16':
+            optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+
         model.compile(
-            optimizer='adam',
+            optimizer=optimizer,
             loss='categorical_crossentropy',
-            metrics=['accuracy']
+            metrics=['accuracy'],
+            jit_compile=self.jit_compile
         )
 
+    def build_feature_extractor(self):
+        """
+        ResNet50 congelada, com pooling médio global na saída. Cada imagem é transformada em um vetor
+        de características (embedding) de 2048 posições, calculado uma única vez no modo de extração de características.
+        """
+        self.apply_precision_policy()
+        backbone = self.load_resnet50(pooling='avg')
+        backbone.trainable = False
+        return backbone
+
+    def build_head(self, feature_dim):
+        # Apenas a cabeça da rede (camadas densas), treinada sobre os embeddings pré-calculados
+        self.apply_precision_policy()
+        head = models.Sequential([layers.InputLayer(input_shape=(feature_dim,)), *self.build_head_layers()])
+        self.compile_model(head)
+        return head
+
+    def attach_head(self, backbone, head, learning_rate=None):
+        # Une a ResNet50 à cabeça já treinada, formando o modelo completo (imagem → probabilidades das classes)
+        self.apply_precision_policy()
+        model = models.Sequential([backbone, head])
+        self.compile_model(model, learning_rate)
         return model
+
+    @staticmethod
+    def unfreeze_blocks(backbone, num_blocks):
+        """
+        Descongela os últimos num_blocks blocos residuais da ResNet50 (ex: conv5_block3, conv5_block2, ...)
+        para a etapa de fine-tuning. As camadas de BatchNormalization permanecem congeladas para que suas
+        estatísticas, calculadas na ImageNet, não sejam destruídas pelos lotes pequenos do dataset.
+        """
+        blocks = []
+        for layer in backbone.layers:
+            if '_block' in layer.name:
+                block = '_'.join(layer.name.split('_')[:2])
+                if block not in blocks:
+                    blocks.append(block)
+
+        selected = set(blocks[-num_blocks:]) if num_blocks > 0 else set()
+        backbone.trainable = True
+        for layer in backbone.layers:
+            block = '_'.join(layer.name.split('_')[:2])
+            layer.trainable = block in selected and not isinstance(layer, layers.BatchNormalization)
+
+        return sorted(selected)
+
+    @staticmethod
+    def count_activations(model):
+        # Soma a quantidade de valores de saída (por imagem) de todas as camadas, incluindo as da ResNet50
+        total = 0
+        for layer in model.layers:
+            if isinstance(layer, models.Model):
+                total += CNNModel.count_activations(layer)
+                continue
+
+            shapes = layer.output_shape if isinstance(layer.output_shape, list) else [layer.output_shape]
+            for shape in shapes:
+                size = 1
+                for dim in shape[1:]:
+                    size *= dim or 1
+                total += size
+        return total
+
+    @staticmethod
+    def estimate_memory(model, batch_size, bytes_per_value=4):
+        """
+        Estimativa do consumo de memória no treinamento (valores em bytes):
+            * weights → todos os parâmetros da rede
+            * optimizer → gradientes + os dois momentos do Adam, para cada parâmetro treinável
+            * activations → saídas de todas as camadas para um lote, mantidas para o backpropagation
+        """
+        trainable = int(sum(tf.keras.backend.count_params(w) for w in model.trainable_weights))
+        total = int(model.count_params())
+
+        return {
+            'total_params': total,
+            'trainable_params': trainable,
+            'weights': total * bytes_per_value,
+            'optimizer': 3 * trainable * bytes_per_value,
+            'activations': CNNModel.count_activations(model) * batch_size * bytes_per_value,
+        }
+
+    @staticmethod
+    def available_memory():
+        # Memória disponível no sistema em bytes (MemAvailable no Linux), ou None caso não seja possível medir
+        try:
+            import psutil
+            return psutil.virtual_memory().available
+        except ImportError:
+            pass
+
+        try:
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+
+        try:
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, AttributeError, OSError):
+            return None
+
+    @staticmethod
+    def probe_batch_size(model, batch_size, log=print, memory_fraction=0.8):
+        """
+        Encontra o maior batch size (batch_size, batch_size / 2, ...) que cabe na memória, antes do treinamento:
+            * a estimativa do estimate_memory precisa caber em memory_fraction da memória disponível
+              (no CPU, estourar a memória costuma encerrar o processo em vez de gerar um erro tratável)
+            * um passo de forward + backward é executado com um lote de zeros, sem atualizar os pesos nem as
+              estatísticas do BatchNormalization (training=False); um ResourceExhaustedError reduz o lote
+        Retorna o batch size encontrado. Gera um MemoryError caso nem um lote de 1 imagem caiba na memória.
+        """
+        model = getattr(model, 'inner_model', model)
+        available = CNNModel.available_memory()
+        loss = tf.keras.losses.CategoricalCrossentropy()
+
+        @tf.function
+        def trial(images, labels):
+            with tf.GradientTape() as tape:
+                step_loss = loss(labels, model(images, training=False))
+            return tape.gradient(step_loss, model.trainable_variables)
+
+        candidate = batch_size
+        while candidate >= 1:
+            estimate = CNNModel.estimate_memory(model, candidate)
+            total = estimate['weights'] + estimate['optimizer'] + estimate['activations']
+
+            if available is not None and total > memory_fraction * available:
+                log(f"Batch {candidate}: estimativa de {total / 2 ** 20:.0f} MB excede a memória disponível "
+                    f"({available / 2 ** 20:.0f} MB)")
+            else:
+                try:
+                    images = tf.zeros((candidate, *model.input_shape[1:]))
+                    labels = tf.zeros((candidate, model.output_shape[-1]))
+                    trial(images, labels)
+                    break
+                except (tf.errors.ResourceExhaustedError, MemoryError):
+                    log(f"Batch {candidate}: memória insuficiente no passo de teste")
+
+            candidate //= 2
+
+        if candidate < 1:
+            raise MemoryError("Nem um lote de 1 imagem cabe na memória disponível; reduza o input size ou utilize "
+                              "o modo de extração de características")
+        log(f"Batch size que cabe na memória: {candidate}")
+        return candidate
+
+    @staticmethod
+    def accumulation_for(batch_size, micro_batch_size):
+        # Passos de acumulação para atingir (ao menos) o lote efetivo batch_size com micro-lotes menores
+        return math.ceil(batch_size / micro_batch_size)
+
+    @staticmethod
+    def memory_report(model, batch_size):
+        estimate = CNNModel.estimate_memory(model, batch_size)
+        total = estimate['weights'] + estimate['optimizer'] + estimate['activations']
+        return (f"Parâmetros: {estimate['total_params']:,} ({estimate['trainable_params']:,} treináveis)\n"
+                f"Memória estimada (batch {batch_size}): pesos {estimate['weights'] / 2 ** 20:.1f} MB - "
+                f"otimizador {estimate['optimizer'] / 2 ** 20:.1f} MB - "
+                f"ativações {estimate['activations'] / 2 ** 20:.1f} MB - "
+                f"total {total / 2 ** 20:.1f} MB")
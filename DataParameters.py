@@ -1,4 +1,25 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QComboBox, QCheckBox
+)
+
+# Opções de carregamento de dados: texto exibido → (pipeline, cache) utilizados em Model.load_data
+PIPELINE_OPTIONS = {
+    "ImageDataGenerator": ('generator', None),
+    "tf.data (sem cache)": ('tfdata', None),
+    "tf.data (cache em memória)": ('tfdata', 'memory'),
+    "tf.data (cache em disco)": ('tfdata', 'disk'),
+    "Cache persistente (.npy)": ('cached', None),
+    "Shards TFRecord (streaming)": ('streaming', None),
+}
+
+# Transformações do aumento de dados: texto exibido → nome utilizado pelo Augmentation
+AUGMENTATION_OPTIONS = {
+    "Espelhamento horizontal": 'flip',
+    "Rotação (±18°)": 'rotation',
+    "Brilho (±10%)": 'brightness',
+    "Contraste (±10%)": 'contrast',
+    "Recorte aleatório (até 15%)": 'crop',
+}
 
 
 class DataParameters(QDialog):
@@ -12,6 +33,10 @@ class DataParameters(QDialog):
         self.input_size = None
         self.batch_size = None
         self.split = None
+        self.pipeline = None
+        self.cache = None
+        self.seed = None
+        self.augmentation = None
 
         # Layout principal, organizando verticalmente os widgets na janela
         layout = QVBoxLayout()
@@ -41,6 +66,28 @@ class DataParameters(QDialog):
         h_layout.addWidget(self.split_edit)
         layout.addLayout(h_layout)
 
+        # Semente da divisão treino/validação: a mesma semente reproduz a mesma divisão entre execuções
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Semente da divisão:"))
+        self.seed_edit = QLineEdit("42")
+        h_layout.addWidget(self.seed_edit)
+        layout.addLayout(h_layout)
+
+        # Pipeline de carregamento dos dados (ImageDataGenerator ou tf.data, com ou sem cache)
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Pipeline de dados:"))
+        self.pipeline_combo = QComboBox()
+        self.pipeline_combo.addItems(PIPELINE_OPTIONS.keys())
+        h_layout.addWidget(self.pipeline_combo)
+        layout.addLayout(h_layout)
+
+        # Aumento de dados, executado por lote no pipeline tf.data (indisponível para o ImageDataGenerator)
+        layout.addWidget(QLabel("Aumento de dados (pipelines tf.data, cache persistente e shards):"))
+        self.augmentation_checks = {}
+        for text, name in AUGMENTATION_OPTIONS.items():
+            self.augmentation_checks[name] = QCheckBox(text)
+            layout.addWidget(self.augmentation_checks[name])
+
         # Botões OK e Cancel (Análogo à organização do bloco de código referente ao Input_Size)
         button_layout = QHBoxLayout()
         ok_button = QPushButton("OK")
@@ -60,12 +107,20 @@ class DataParameters(QDialog):
             self.input_size = int(self.input_size_edit.text())
             self.batch_size = int(self.batch_size_edit.text())
             self.split = float(self.split_edit.text())
+            self.seed = int(self.seed_edit.text())
+            self.pipeline, self.cache = PIPELINE_OPTIONS[self.pipeline_combo.currentText()]
+            self.augmentation = [name for name, check in self.augmentation_checks.items() if check.isChecked()]
 
             # valida o intervalo do split
             if not (0 < self.split < 1):
                 QMessageBox.warning(self, "Erro de valor", "O split deve ser um número entre 0 e 1 (ex: 0.8).")
                 return
 
+            if self.augmentation and self.pipeline == 'generator':
+                QMessageBox.warning(self, "Erro de valor", "O aumento de dados requer o pipeline tf.data "
+                                                           "ou o cache persistente.")
+                return
+
             self.accept()  # fecha o dialog com resultado "aceito"
         except ValueError:
             QMessageBox.information(self, 'Erro', 'Erro ao definir parâmetros, possivelmente algum valor foi inserido '
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import numpy as np
+import tensorflow as tf
+from Model import Model, CACHE_DIR
+
+
+class DatasetCache:
+
+    # Quantidade de imagens armazenadas em cada arquivo .npy (shard)
+    SHARD_SIZE = 1024
+
+    # Fração mínima de posições ainda utilizadas nos shards antes de reescrevê-los (compactação)
+    MIN_LIVE_FRACTION = 0.5
+
+    def __init__(self, dataset_path, img_size=(128, 128)):
+        """
+        Cache persistente em disco das imagens já decodificadas e redimensionadas (uint8).
+        As imagens são armazenadas em shards .npy, lidos via memmap, e um manifest.json guarda para cada
+        arquivo do dataset seu mtime, tamanho e posição (shard, índice) dentro do cache.
+
+        parametro dataset_path: Caminho do dataset (uma subpasta por classe).
+        parametro img_size: Tamanho (altura, largura) das imagens armazenadas.
+
+        obs: A chave do cache é (dataset_path, img_size). A divisão treino/validação é recalculada a partir da
+        lista de arquivos a cada carregamento (operação barata), de modo que um mesmo cache atende qualquer split.
+        """
+        self.dataset_path = os.path.abspath(dataset_path)
+        self.img_size = tuple(img_size)
+
+        key = f"{self.dataset_path}|{self.img_size[0]}x{self.img_size[1]}"
+        self.cache_dir = os.path.join(CACHE_DIR, "datasets", hashlib.sha1(key.encode()).hexdigest()[:16])
+        self.manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.manifest = self.read_manifest()
+
+    def read_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("img_size") == list(self.img_size):
+                return manifest
+
+        return {"dataset_path": self.dataset_path, "img_size": list(self.img_size),
+                "next_shard": 0, "shards": {}, "files": {}}
+
+    def write_manifest(self):
+        # Escrita atômica, evitando um manifest corrompido caso o programa seja interrompido
+        Model.write_json(self.manifest_path, self.manifest)
+
+    def update(self, files):
+        """
+        Sincroniza o cache com a lista de arquivos informada. Arquivos cujo mtime e tamanho não mudaram são
+        reutilizados, apenas os novos ou modificados são decodificados novamente.
+        Retorna uma mensagem de log resumindo a operação.
+        """
+        entries = self.manifest["files"]
+        current = {}
+        to_encode = []
+        listed = set()
+        modified = 0
+
+        for path in files:
+            relative = os.path.relpath(path, self.dataset_path)
+            stat = os.stat(path)
+            entry = entries.get(relative)
+            listed.add(relative)
+            if entry is not None and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                current[relative] = entry
+            else:
+                modified += entry is not None
+                to_encode.append((path, relative, stat))
+
+        # Removidas: imagens do cache que não estão mais no dataset (as modificadas são decodificadas novamente)
+        removed = len(set(entries) - listed)
+        self.manifest["files"] = current
+
+        for start in range(0, len(to_encode), self.SHARD_SIZE):
+            self.encode_shard(to_encode[start:start + self.SHARD_SIZE])
+
+        self.compact()
+        self.write_manifest()
+
+        return (f"Cache de dados ({self.cache_dir}): {len(files) - len(to_encode)} imagens reutilizadas, "
+                f"{len(to_encode)} decodificadas ({len(to_encode) - modified} novas, {modified} modificadas), "
+                f"{removed} removidas")
+
+    def encode_shard(self, items):
+        # A decodificação é feita pelo pipeline tf.data, em paralelo, com a mesma função do Model.load_data
+        paths = [path for path, _, _ in items]
+        dataset = tf.data.Dataset.from_tensor_slices(paths)
+        dataset = dataset.map(lambda path: Model.decode_image(path, self.img_size),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        images = np.concatenate([batch.numpy() for batch in dataset.batch(256)])
+
+        shard_name = self.save_shard(images)
+        for index, (_, relative, stat) in enumerate(items):
+            self.manifest["files"][relative] = {"mtime": stat.st_mtime, "size": stat.st_size,
+                                                "shard": shard_name, "index": index}
+
+    def save_shard(self, images):
+        shard_name = f"shard_{self.manifest['next_shard']:05d}.npy"
+        self.manifest["next_shard"] += 1
+        np.save(os.path.join(self.cache_dir, shard_name), images)
+        self.manifest["shards"][shard_name] = len(images)
+        return shard_name
+
+    def compact(self):
+        """
+        Remove shards sem nenhuma imagem em uso e, caso a maior parte das posições armazenadas esteja obsoleta
+        (arquivos removidos ou modificados), reescreve os shards copiando apenas as imagens em uso.
+        """
+        entries = self.manifest["files"]
+        used = {}
+        for entry in entries.values():
+            used[entry["shard"]] = used.get(entry["shard"], 0) + 1
+
+        for shard_name in list(self.manifest["shards"]):
+            if shard_name not in used:
+                self.remove_shard(shard_name)
+
+        total = sum(self.manifest["shards"].values())
+        if total == 0 or len(entries) / total >= self.MIN_LIVE_FRACTION:
+            return
+
+        old_shards = {name: self.open_shard(name) for name in self.manifest["shards"]}
+        relatives = sorted(entries, key=lambda r: (entries[r]["shard"], entries[r]["index"]))
+        for start in range(0, len(relatives), self.SHARD_SIZE):
+            chunk = relatives[start:start + self.SHARD_SIZE]
+            images = np.stack([old_shards[entries[r]["shard"]][entries[r]["index"]] for r in chunk])
+            shard_name = self.save_shard(images)
+            for index, relative in enumerate(chunk):
+                entries[relative] = dict(entries[relative], shard=shard_name, index=index)
+
+        for shard_name in list(old_shards):
+            del old_shards[shard_name]  # libera o memmap antes de remover o arquivo
+            self.remove_shard(shard_name)
+
+    def remove_shard(self, shard_name):
+        del self.manifest["shards"][shard_name]
+        path = os.path.join(self.cache_dir, shard_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def open_shard(self, shard_name):
+        # mmap_mode='r' → o arquivo é mapeado em memória, apenas as páginas acessadas são lidas do disco
+        return np.load(os.path.join(self.cache_dir, shard_name), mmap_mode='r')
+
+    def build_dataset(self, files, labels, num_classes, batch_size, shuffle, augmentation=None):
+        """
+        Monta um pipeline tf.data sobre os shards mapeados em memória. Apenas os índices das imagens são
+        embaralhados; cada lote é montado com uma única leitura vetorizada por shard.
+        parametro augmentation: Aumento de dados opcional (Augmentation), aplicado por lote após a normalização
+        """
+        entries = self.manifest["files"]
+        shard_names = sorted({entries[os.path.relpath(p, self.dataset_path)]["shard"] for p in files})
+        shards = [self.open_shard(name) for name in shard_names]
+        shard_ids = np.array([shard_names.index(entries[os.path.relpath(p, self.dataset_path)]["shard"])
+                              for p in files], dtype=np.int64)
+        indices = np.array([entries[os.path.relpath(p, self.dataset_path)]["index"] for p in files],
+                           dtype=np.int64)
+        height, width = self.img_size
+
+        def gather(positions):
+            images = np.empty((len(positions), height, width, 3), dtype=np.uint8)
+            batch_shards = shard_ids[positions]
+            for shard_id in np.unique(batch_shards):
+                mask = batch_shards == shard_id
+                images[mask] = shards[shard_id][indices[positions[mask]]]
+            return images
+
+        def load_batch(positions, batch_labels):
+            images = tf.numpy_function(gather, [positions], tf.uint8)
+            images.set_shape((None, height, width, 3))
+            return images, tf.one_hot(batch_labels, num_classes)
+
+        dataset = tf.data.Dataset.from_tensor_slices((np.arange(len(files)), np.asarray(labels, dtype=np.int64)))
+        if shuffle:
+            dataset = dataset.shuffle(len(files), reshuffle_each_iteration=True)
+
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.map(Model.rescale, num_parallel_calls=tf.data.AUTOTUNE)
+        if augmentation is not None:
+            dataset = augmentation.apply(dataset)
+        return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from Model import Model
+from RunRegistry import RunRegistry
+
+'''
+Treinamento distribuído (paralelismo de dados) com a tf.distribute.MultiWorkerMirroredStrategy: cada worker é um
+processo HeadlessTrainer com uma cópia do modelo e uma parte do dataset, e os gradientes são somados entre os
+workers (all-reduce) a cada passo. Assim como o ParallelScheduler, este módulo não importa o TensorFlow: apenas
+inicia os workers locais, com o TF_CONFIG de cada um, e repassa as mensagens de log.
+
+O batch size da configuração é o lote de cada worker (lote global = batch size * workers). Apenas o worker 0
+(chief) grava os logs em logs/fit/ e salva o modelo. Requer o pipeline 'tfdata' ou 'streaming' (shards já
+convertidos com python -m ShardedDataset convert).
+
+Arquivo de cluster (JSON ou YAML), um endereço host:porta por worker (também aceita o formato do TF_CONFIG):
+    {"worker": ["10.0.0.1:12345", "10.0.0.2:12345"]}
+
+Exemplos:
+    python -m DistributedTrainer ears.yaml --workers 2                          # 2 workers nesta máquina
+    python -m DistributedTrainer ears.yaml --cluster cluster.json               # workers locais do cluster
+    python -m DistributedTrainer ears.yaml --cluster cluster.json --task-index 1  # na máquina do worker 1
+    python -m DistributedTrainer ears.yaml --scaling 1 2 4 --epochs 2           # eficiência de escalonamento
+
+obs: Em uma única máquina os workers dividem os mesmos núcleos, então o relatório de escalonamento mede o custo
+da comunicação entre os workers; o ganho de vazão real depende de workers em máquinas diferentes.
+'''
+
+# Endereços considerados locais ao iniciar os workers de um arquivo de cluster
+LOCAL_HOSTS = ('localhost', '127.0.0.1', socket.gethostname())
+
+
+class DistributedTrainer:
+
+    def __init__(self, config, cluster=None, workers=2, log=print):
+        """
+        parametro config: Dicionário de configuração do HeadlessTrainer (o mesmo para todos os workers)
+        parametro cluster: Lista de endereços host:porta dos workers (None = workers em localhost)
+        parametro workers: Quantidade de workers em localhost, quando cluster não é informado
+        parametro log: Função chamada com cada mensagem de log (dos workers e do próprio lançador)
+        """
+        self.config = dict(config)
+        for key in ('dataset', 'log_name'):
+            if not self.config.get(key):
+                raise ValueError(f"Parâmetro obrigatório não definido: {key}")
+
+        self.cluster = list(cluster) if cluster else [f"localhost:{port}"
+                                                      for port in DistributedTrainer.free_ports(workers)]
+        self.log = log
+        self.log_lock = threading.Lock()
+
+    @staticmethod
+    def free_ports(count):
+        # As portas são reservadas ao mesmo tempo para que não se repitam, e liberadas antes do início dos workers
+        sockets = []
+        try:
+            for _ in range(count):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.bind(("localhost", 0))
+                sockets.append(sock)
+            return [sock.getsockname()[1] for sock in sockets]
+        finally:
+            for sock in sockets:
+                sock.close()
+
+    @staticmethod
+    def load_cluster(path):
+        spec = Model.load_config(path)
+        spec = spec.get('cluster', spec)
+        if not spec.get('worker'):
+            raise ValueError(f"Nenhum worker definido no arquivo de cluster: {path}")
+        return list(spec['worker'])
+
+    def local_tasks(self):
+        return [index for index, address in enumerate(self.cluster) if address.rsplit(":", 1)[0] in LOCAL_HOSTS]
+
+    def launch(self, index, threads):
+        # Mesmo mecanismo do ParallelScheduler.launch: configuração em um arquivo temporário e saída repassada
+        config = dict(self.config, distributed=True, verbose=0, intra_op_threads=threads, inter_op_threads=2)
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+        json.dump(config, config_file)
+        config_file.close()
+
+        tf_config = {'cluster': {'worker': self.cluster}, 'task': {'type': 'worker', 'index': index}}
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        python_path = os.pathsep.join(filter(None, [module_dir, os.environ.get("PYTHONPATH")]))
+        env = dict(os.environ, PYTHONUNBUFFERED="1", OMP_NUM_THREADS=str(threads), PYTHONPATH=python_path,
+                   TF_CONFIG=json.dumps(tf_config))
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "HeadlessTrainer", "--config", config_file.name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=env
+        )
+
+        reader = threading.Thread(target=self.forward_output, args=(index, process), daemon=True)
+        reader.start()
+        self.emit(f"Worker {index} iniciado ({self.cluster[index]}, {threads} threads, PID {process.pid})")
+        return process, reader, config_file.name
+
+    def forward_output(self, index, process):
+        for line in process.stdout:
+            line = line.rstrip()
+            if line:
+                self.emit(f"[worker {index}] {line}")
+
+    def emit(self, message):
+        with self.log_lock:
+            self.log(message)
+
+    def run(self, task_indices=None):
+        """
+        Inicia os workers desta máquina (task_indices, ou todos os endereços locais do cluster) e aguarda o fim
+        do treinamento. Retorna True se todos terminaram com sucesso.
+        """
+        tasks = self.local_tasks() if task_indices is None else list(task_indices)
+        if not tasks:
+            raise ValueError("Nenhum worker do cluster pertence a esta máquina (use --task-index)")
+
+        # Os núcleos da máquina são divididos entre os workers locais
+        threads = max(1, (os.cpu_count() or 1) // len(tasks))
+        self.emit(f"Treinamento distribuído: {len(self.cluster)} workers no cluster, {len(tasks)} nesta máquina")
+
+        start = time.perf_counter()
+        workers = {index: self.launch(index, threads) for index in tasks}
+
+        success = True
+        while workers:
+            for index, (process, reader, config_path) in list(workers.items()):
+                if process.poll() is None:
+                    continue
+
+                reader.join()
+                os.remove(config_path)
+                del workers[index]
+                self.emit(f"Worker {index} finalizado ({'sucesso' if process.returncode == 0 else 'falhou'})")
+
+                if process.returncode != 0 and success:
+                    # Os demais workers ficariam bloqueados aguardando o worker que falhou nas operações coletivas
+                    success = False
+                    for other, _, _ in workers.values():
+                        other.terminate()
+
+            time.sleep(0.5)
+
+        self.emit(f"Tempo total: {(time.perf_counter() - start) / 60:.1f} min")
+        return success
+
+    def chief_run(self):
+        # Execução registrada pelo worker 0 no índice de execuções (a mais recente com o mesmo nome)
+        for run in RunRegistry().list_runs():
+            if run['log_name'] == self.config['log_name']:
+                return run
+        return None
+
+    @staticmethod
+    def scaling_report(config, worker_counts, log=print):
+        """
+        Treina a mesma configuração com cada quantidade de workers (em localhost) e compara a vazão medida pelo
+        chief (tempo mediano por passo, ver StepTimeCallback) com a de um único worker:
+            eficiência = vazão com N workers / (N * vazão com 1 worker)
+        O relatório é salvo em logs/{log_name}_scaling.json e retornado como lista de dicionários.
+        """
+        results = []
+        for count in worker_counts:
+            run_config = dict(config, log_name=f"{config['log_name']}_{count}w")
+            trainer = DistributedTrainer(run_config, workers=count, log=log)
+
+            start = time.perf_counter()
+            success = trainer.run()
+            elapsed = time.perf_counter() - start
+
+            run = trainer.chief_run() if success else None
+            step_time_ms = run['config'].get('step_time_ms') if run else None
+            images_per_second = None
+            if step_time_ms:
+                images_per_second = run['config']['batch_size'] * count * 1000 / step_time_ms
+            results.append({'workers': count, 'success': success, 'seconds': elapsed, 'step_time_ms': step_time_ms,
+                            'images_per_second': images_per_second})
+
+        baseline = next((row for row in results if row['images_per_second']), None)
+        for row in results:
+            row['efficiency'] = None
+            if baseline is not None and row['images_per_second']:
+                per_worker = baseline['images_per_second'] / baseline['workers']
+                row['efficiency'] = row['images_per_second'] / (per_worker * row['workers'])
+
+            if row['images_per_second']:
+                log(f"{row['workers']} workers: {row['images_per_second']:.1f} imagens/s - passo "
+                    f"{row['step_time_ms']:.0f} ms - eficiência {100 * row['efficiency']:.0f}%")
+            else:
+                log(f"{row['workers']} workers: {'sem medição' if row['success'] else 'falhou'}")
+
+        os.makedirs("logs", exist_ok=True)
+        path = os.path.join("logs", f"{config['log_name']}_scaling.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        log(f"Relatório de escalonamento salvo em {path}")
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treinamento distribuído entre processos "
+                                                 "(MultiWorkerMirroredStrategy)")
+    parser.add_argument('config', help="Arquivo YAML ou JSON com os parâmetros do HeadlessTrainer")
+    parser.add_argument('--workers', type=int, default=2, help="Quantidade de workers em localhost")
+    parser.add_argument('--cluster', help="Arquivo com os endereços dos workers ({\"worker\": [\"host:porta\", ...]})")
+    parser.add_argument('--task-index', type=int, nargs='+', help="Workers do cluster iniciados nesta máquina")
+    parser.add_argument('--scaling', type=int, nargs='+',
+                        help="Quantidades de workers comparadas no relatório de escalonamento (ex: 1 2 4)")
+    parser.add_argument('--epochs', type=int, help="Substitui a quantidade de épocas da configuração")
+    args = parser.parse_args(argv)
+
+    try:
+        config = Model.load_config(args.config)
+        if args.epochs:
+            config['epochs'] = args.epochs
+
+        if args.scaling:
+            DistributedTrainer.scaling_report(config, args.scaling)
+            return 0
+
+        cluster = DistributedTrainer.load_cluster(args.cluster) if args.cluster else None
+        trainer = DistributedTrainer(config, cluster, args.workers)
+    except Exception as e:
+        print(f"Erro ao iniciar o treinamento distribuído: {str(e)}", file=sys.stderr)
+        return 1
+
+    return 0 if trainer.run(args.task_index) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from Model import Model
+from ModelExporter import ModelExporter
+
+'''
+Avaliação de um modelo treinado sobre o conjunto de validação (ao final do Trainer.train) ou sobre qualquer pasta
+com uma subpasta por classe (linha de comando): matriz de confusão, precisão/recall/F1 por classe e calibração
+(ECE), calculados de forma vetorizada com o NumPy a partir das probabilidades de todas as imagens.
+
+Test-time augmentation (TTA) opcional: as variações de cada lote (espelhamento e/ou recorte central) são
+concatenadas e passam pela rede em uma única chamada, e as probabilidades das variações são promediadas.
+
+Exemplo:
+    python -m Evaluator ears_weights.h5 dados/ears_teste --tta flip crop --output-dir logs/fit/ears_run_3
+'''
+
+# Variações da test-time augmentation (além da imagem original)
+TTA_VIEWS = ('flip', 'crop')
+
+# Fração central da imagem mantida na variação 'crop', redimensionada de volta para o tamanho de entrada
+CROP_FRACTION = 0.875
+
+# Quantidade de faixas de confiança utilizadas na calibração
+CALIBRATION_BINS = 15
+
+
+class Evaluator:
+
+    def __init__(self, model, class_names=None, tta=(), batch_size=64, log=print):
+        """
+        parametro model: Modelo do Keras treinado (ou o caminho de um modelo exportado pelo ModelExporter)
+        parametro class_names: Nomes das classes na ordem dos índices de saída (None: classe_0, classe_1...)
+        parametro tta: Variações da test-time augmentation, ver TTA_VIEWS (vazio desativa)
+        parametro batch_size: Imagens por lote na avaliação de pastas (cada lote passa pela rede len(views) vezes
+                              maior com a TTA)
+        """
+        invalid = [view for view in tta if view not in TTA_VIEWS]
+        if invalid:
+            raise ValueError(f"Variação de TTA inválida: {', '.join(invalid)}. Opções: {', '.join(TTA_VIEWS)}")
+
+        if isinstance(model, str):
+            class_indices = Model.load_class_indices(model)
+            if class_names is None and class_indices is not None:
+                class_names = sorted(class_indices, key=class_indices.get)
+            model = ModelExporter.load(model)
+
+        self.model = getattr(model, 'inner_model', model)
+        self.img_size = tuple(self.model.input_shape[1:3])
+        num_classes = self.model.output_shape[-1]
+        self.class_names = list(class_names) if class_names else [f"classe_{index}" for index in range(num_classes)]
+        self.tta = [view for view in TTA_VIEWS if view in tta]
+        self.batch_size = batch_size
+        self.log = log
+
+    def views(self, images):
+        # Lote (V * N, altura, largura, 3): as V variações de cada uma das N imagens, agrupadas por variação
+        views = [images]
+        if 'crop' in self.tta:
+            crop = tf.image.resize(tf.image.central_crop(images, CROP_FRACTION), self.img_size)
+            views.append(crop)
+        if 'flip' in self.tta:
+            views += [tf.image.flip_left_right(view) for view in views]
+        return tf.concat(views, axis=0)
+
+    def predict_batch(self, images):
+        images = tf.convert_to_tensor(images, dtype=tf.float32)
+        count = images.shape[0]
+        probabilities = np.asarray(self.model.predict_on_batch(self.views(images)), dtype=np.float64)
+        return probabilities.reshape(-1, count, probabilities.shape[-1]).mean(axis=0)
+
+    def predict(self, dataset):
+        """
+        Percorre um conjunto no formato do Model.load_data (lotes de imagens normalizadas e rótulos one-hot ou
+        inteiros) uma única vez. Retorna (probabilidades, rótulos, tempo em segundos).
+        """
+        # Os iteradores do ImageDataGenerator não terminam sozinhos, a avaliação é limitada pelo seu comprimento
+        try:
+            steps = len(dataset)
+        except TypeError:
+            steps = None
+
+        probabilities, labels = [], []
+        start = time.perf_counter()
+        for step, (images, batch_labels) in enumerate(dataset):
+            probabilities.append(self.predict_batch(images))
+            batch_labels = np.asarray(batch_labels)
+            labels.append(np.argmax(batch_labels, axis=1) if batch_labels.ndim > 1 else batch_labels)
+            if steps is not None and step + 1 >= steps:
+                break
+        elapsed = time.perf_counter() - start
+
+        if not probabilities:
+            return np.empty((0, len(self.class_names))), np.empty(0, dtype=np.int64), elapsed
+        return np.concatenate(probabilities), np.concatenate(labels).astype(np.int64), elapsed
+
+    def directory_dataset(self, dataset_path):
+        # Pasta com uma subpasta por classe; as subpastas são associadas às classes do modelo pelo nome
+        _, files, _ = Model.scan_dataset(dataset_path)
+        unknown = [name for name in files if name not in self.class_names]
+        if unknown:
+            raise ValueError(f"Classes desconhecidas pelo modelo: {', '.join(unknown)}")
+
+        paths = [path for name in files for path in files[name]]
+        labels = [self.class_names.index(name) for name in files for _ in files[name]]
+
+        dataset = tf.data.Dataset.from_tensor_slices((paths, np.asarray(labels, dtype=np.int64)))
+        dataset = dataset.map(lambda path, label: (Model.decode_image(path, self.img_size), label),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.batch(self.batch_size)
+        dataset = dataset.map(Model.rescale, num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    @staticmethod
+    def confusion_matrix(labels, predictions, num_classes):
+        # Linhas: classe real, colunas: classe prevista
+        counts = np.bincount(labels * num_classes + predictions, minlength=num_classes * num_classes)
+        return counts.reshape(num_classes, num_classes)
+
+    @staticmethod
+    def class_metrics(confusion):
+        # Precisão, recall, F1 e suporte de cada classe (0 quando a classe não aparece / nunca é prevista)
+        true_positives = np.diag(confusion).astype(np.float64)
+        predicted = confusion.sum(axis=0)
+        support = confusion.sum(axis=1)
+
+        precision = np.divide(true_positives, predicted, out=np.zeros_like(true_positives), where=predicted > 0)
+        recall = np.divide(true_positives, support, out=np.zeros_like(true_positives), where=support > 0)
+        total = precision + recall
+        f1 = np.divide(2 * precision * recall, total, out=np.zeros_like(true_positives), where=total > 0)
+        return precision, recall, f1, support
+
+    @staticmethod
+    def calibration(probabilities, labels, bins=CALIBRATION_BINS):
+        """
+        Calibração por faixas de confiança (probabilidade da classe prevista): em um modelo calibrado, a acurácia
+        das imagens previstas com ~80% de confiança é ~80%. Retorna o ECE (diferença média entre confiança e
+        acurácia, ponderada pela quantidade de imagens em cada faixa), o MCE (maior diferença) e as faixas.
+        """
+        confidence = probabilities.max(axis=1)
+        correct = (probabilities.argmax(axis=1) == labels).astype(np.float64)
+        bin_index = np.minimum((confidence * bins).astype(np.int64), bins - 1)
+
+        counts = np.bincount(bin_index, minlength=bins)
+        confidence_sum = np.bincount(bin_index, weights=confidence, minlength=bins)
+        correct_sum = np.bincount(bin_index, weights=correct, minlength=bins)
+
+        used = counts > 0
+        mean_confidence = np.divide(confidence_sum, counts, out=np.zeros(bins), where=used)
+        accuracy = np.divide(correct_sum, counts, out=np.zeros(bins), where=used)
+        gaps = np.abs(accuracy - mean_confidence)
+
+        ece = float(np.sum(gaps * counts) / max(len(labels), 1))
+        mce = float(gaps[used].max()) if used.any() else 0.0
+        reliability = [{'range': [index / bins, (index + 1) / bins], 'count': int(counts[index]),
+                        'confidence': float(mean_confidence[index]), 'accuracy': float(accuracy[index])}
+                       for index in np.flatnonzero(used)]
+        return ece, mce, reliability
+
+    def report(self, probabilities, labels, elapsed=0.0):
+        num_classes = len(self.class_names)
+        predictions = probabilities.argmax(axis=1)
+        confusion = Evaluator.confusion_matrix(labels, predictions, num_classes)
+        precision, recall, f1, support = Evaluator.class_metrics(confusion)
+        ece, mce, reliability = Evaluator.calibration(probabilities, labels)
+
+        return {
+            'images': int(len(labels)),
+            'tta': self.tta,
+            'seconds': elapsed,
+            'images_per_second': len(labels) / elapsed if elapsed > 0 else 0.0,
+            'accuracy': float(np.mean(predictions == labels)) if len(labels) else 0.0,
+            'macro_f1': float(f1.mean()),
+            'weighted_f1': float(np.sum(f1 * support) / max(support.sum(), 1)),
+            'ece': ece,
+            'mce': mce,
+            'classes': self.class_names,
+            'confusion_matrix': confusion.tolist(),
+            'per_class': {name: {'precision': float(precision[index]), 'recall': float(recall[index]),
+                                 'f1': float(f1[index]), 'support': int(support[index])}
+                          for index, name in enumerate(self.class_names)},
+            'calibration': reliability,
+        }
+
+    def write_report(self, report, output_dir, name="evaluation"):
+        """
+        Grava {output_dir}/{name}.json (relatório completo) e {name}_confusion.csv (matriz de confusão com os
+        nomes das classes). Retorna o caminho do relatório.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        with open(os.path.join(output_dir, f"{name}_confusion.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(['real \\ previsto'] + self.class_names)
+            for class_name, row in zip(self.class_names, report['confusion_matrix']):
+                writer.writerow([class_name] + row)
+
+        return path
+
+    def log_report(self, report):
+        tta = f" (TTA: {', '.join(report['tta'])})" if report['tta'] else ""
+        self.log(f"Avaliação de {report['images']} imagens{tta} em {report['seconds']:.1f} s - "
+                 f"acurácia {100 * report['accuracy']:.2f}% - F1 macro {report['macro_f1']:.4f} - "
+                 f"ECE {report['ece']:.4f}")
+        for class_name, metrics in report['per_class'].items():
+            self.log(f"    {class_name}: precisão {metrics['precision']:.4f} - recall {metrics['recall']:.4f} - "
+                     f"F1 {metrics['f1']:.4f} ({metrics['support']} imagens)")
+
+    def evaluate(self, dataset, output_dir, name="evaluation"):
+        """
+        Avalia um conjunto no formato do Model.load_data (ex: val_data) ou uma pasta com subpastas por classe,
+        grava o relatório em output_dir e o retorna.
+        """
+        if isinstance(dataset, str):
+            dataset = self.directory_dataset(dataset)
+
+        probabilities, labels, elapsed = self.predict(dataset)
+        report = self.report(probabilities, labels, elapsed)
+        path = self.write_report(report, output_dir, name)
+
+        self.log_report(report)
+        self.log(f"Relatório de avaliação salvo em {path}")
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Avaliação de um modelo treinado sobre uma pasta de imagens")
+    parser.add_argument('weights', help="Modelo exportado (ex: {nome}_weights.h5)")
+    parser.add_argument('dataset', help="Pasta com uma subpasta por classe")
+    parser.add_argument('--tta', nargs='+', choices=TTA_VIEWS, default=(), help="Variações da test-time augmentation")
+    parser.add_argument('--batch-size', type=int, default=64, help="Quantidade de imagens por lote")
+    parser.add_argument('--output-dir', default=".", help="Pasta do relatório (ex: diretório de logs da execução)")
+    parser.add_argument('--name', default="evaluation", help="Prefixo dos arquivos do relatório")
+    args = parser.parse_args(argv)
+
+    evaluator = Evaluator(args.weights, tta=args.tta, batch_size=args.batch_size)
+    evaluator.evaluate(args.dataset, args.output_dir, args.name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import argparse
+import gc
+import sys
+import time
+import tensorflow as tf
+from CNNModel import CNNModel
+from HeadlessTrainer import HeadlessTrainer
+from Model import Model
+
+'''
+Fila de experimentos: várias execuções (dataset, input size, split, épocas, nome) treinadas em sequência
+no mesmo processo, sem recarregar o TensorFlow, os pesos da ResNet50 ou os datasets já carregados.
+
+Arquivo de jobs (YAML ou JSON), com os mesmos parâmetros do HeadlessTrainer:
+    defaults:
+      input_size: 224
+      batch_size: 32
+      split: 0.3
+      pipeline: cached
+    jobs:
+      - {dataset: dados/ears, epochs: 100, log_name: ears_100ep}
+      - {dataset: dados/eyes, epochs: 100, log_name: eyes_100ep}
+      - {dataset: dados/mouth, epochs: 100, log_name: mouth_100ep}
+
+Exemplo:
+    python -m ExperimentQueue jobs.yaml
+'''
+
+# Parâmetros que definem um conjunto de dados carregado; jobs com os mesmos valores compartilham os datasets
+DATA_KEYS = ('dataset', 'input_size', 'batch_size', 'split', 'seed', 'pipeline', 'cache', 'augmentation')
+
+
+class ExperimentQueue:
+
+    def __init__(self, jobs, defaults=None, log=print):
+        """
+        parametro jobs: Lista de dicionários de configuração (mesmas chaves do HeadlessTrainer)
+        parametro defaults: Valores aplicados a todos os jobs (cada job pode sobrescrevê-los)
+        parametro log: Função chamada com cada mensagem de log
+        """
+        self.log = log
+        # Todos os jobs são validados antes do início, evitando que um erro de configuração apareça horas depois
+        self.jobs = [HeadlessTrainer(dict(defaults or {}, **job), log) for job in jobs]
+        self.datasets = {}
+        self.results = []  # (log_name, sucesso, duração em segundos)
+
+    @staticmethod
+    def from_file(path, log=print):
+        # Aceita tanto {defaults: {...}, jobs: [...]} quanto apenas a lista de jobs
+        config = Model.load_config(path)
+        if isinstance(config, list):
+            return ExperimentQueue(config, log=log)
+        return ExperimentQueue(config.get('jobs', []), config.get('defaults'), log)
+
+    @staticmethod
+    def data_key(job):
+        return tuple(job.config[k] for k in DATA_KEYS)
+
+    def load_data(self, job):
+        key = ExperimentQueue.data_key(job)
+        if key not in self.datasets:
+            self.datasets[key] = job.load_data()
+        else:
+            self.log("Reutilizando o dataset já carregado")
+        return self.datasets[key]
+
+    def release_datasets(self, remaining):
+        # Descarta os datasets que nenhum dos jobs restantes utiliza, para que a memória não cresça ao longo da fila
+        needed = {ExperimentQueue.data_key(job) for job in remaining}
+        for key in [key for key in self.datasets if key not in needed]:
+            del self.datasets[key]
+
+    def run(self):
+        # Os pesos da ResNet50 são lidos do disco uma única vez e reutilizados por todos os jobs
+        CNNModel.cached_weights = {}
+
+        try:
+            for position, job in enumerate(self.jobs, start=1):
+                name = job.config['log_name']
+                self.log('--------------------------------------------------------')
+                self.log(f"Experimento {position}/{len(self.jobs)}: {name}")
+
+                start = time.perf_counter()
+                try:
+                    if job.config['auto_batch_size']:
+                        job.probe_batch_size()
+                    trainer = job.build_trainer(*self.load_data(job))
+                    trainer.train()
+                    job.save(trainer)
+                    self.results.append((name, True, time.perf_counter() - start))
+
+                except Exception as e:
+                    # Uma falha não interrompe a fila, os próximos experimentos continuam
+                    self.log(f"Erro no experimento {name}: {str(e)}")
+                    self.results.append((name, False, time.perf_counter() - start))
+
+                finally:
+                    # Libera o grafo, os modelos do Keras e os datasets que não serão reutilizados, para que a
+                    # memória não cresça a cada experimento
+                    trainer = None
+                    self.release_datasets(self.jobs[position:])
+                    tf.keras.backend.clear_session()
+                    gc.collect()
+        finally:
+            CNNModel.cached_weights = None
+            self.datasets = {}
+
+        self.log('--------------------------------------------------------')
+        for name, success, duration in self.results:
+            self.log(f"{name}: {'concluído' if success else 'falhou'} em {duration / 60:.1f} min")
+
+        return all(success for _, success, _ in self.results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa uma fila de experimentos em sequência")
+    parser.add_argument('jobs', help="Arquivo YAML ou JSON com os experimentos")
+    args = parser.parse_args(argv)
+
+    try:
+        queue = ExperimentQueue.from_file(args.jobs)
+    except Exception as e:
+        print(f"Erro ao ler a fila de experimentos: {str(e)}", file=sys.stderr)
+        return 1
+
+    return 0 if queue.run() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class ExperimentQueueThread(QThread):
+
+    log_signal = pyqtSignal(str)  # sinal para enviar mensagens de log ao PyQt
+    queue_finished = pyqtSignal(bool)
+
+    def __init__(self, jobs_path, parallel_workers=0):
+        """
+        parametro jobs_path: Arquivo YAML ou JSON com os experimentos
+        parametro parallel_workers: 0 executa os jobs em sequência nesta thread (ExperimentQueue); um valor maior
+                                    executa os jobs em processos separados (ParallelScheduler)
+        """
+        super().__init__()
+        self.jobs_path = jobs_path
+        self.parallel_workers = parallel_workers
+
+    def run(self):
+
+        try:
+            if self.parallel_workers:
+                # O escalonador paralelo não utiliza o TensorFlow neste processo, apenas nos workers
+                from ParallelScheduler import ParallelScheduler
+                runner = ParallelScheduler.from_file(self.jobs_path, self.parallel_workers, log=self.log_signal.emit)
+            else:
+                from ExperimentQueue import ExperimentQueue
+                runner = ExperimentQueue.from_file(self.jobs_path, log=self.log_signal.emit)
+
+            self.queue_finished.emit(runner.run())
+
+        except Exception as e:
+            self.log_signal.emit(f"Erro na fila de experimentos: {str(e)}")
+            self.queue_finished.emit(False)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import tensorflow as tf
+from CNNModel import CNNModel
+from Model import Model, CACHE_DIR, SPLIT_SEED
+
+
+class FeatureExtractor:
+
+    def __init__(self, dataset_path, val_split, input_shape=(128, 128, 3), batch_size=32, num_classes=3,
+                 precision='float32', jit_compile=False, seed=SPLIT_SEED):
+        """
+        Modo de treinamento por extração de características: a ResNet50 congelada é executada uma única vez
+        sobre o dataset e os embeddings resultantes são armazenados em disco. O treinamento passa então a
+        ajustar apenas a cabeça da rede (Dense(128) → Dropout → Dense(num_classes)) sobre esses vetores.
+
+        parametro dataset_path: Caminho do dataset (uma subpasta por classe).
+        parametro val_split: Fração das imagens destinada à validação.
+        parametro input_shape: Dimensões das imagens na entrada da ResNet50.
+        parametro batch_size: Tamanho dos lotes na extração e no treinamento da cabeça.
+        parametro num_classes: Quantidade de classes na saída.
+        parametro precision / jit_compile: Repassados ao CNNModel (precisão mista e XLA).
+        parametro seed: Semente da divisão treino/validação (a mesma utilizada no carregamento dos dados).
+        """
+        self.dataset_path = dataset_path
+        self.val_split = val_split
+        self.seed = seed
+        self.input_shape = input_shape
+        self.batch_size = batch_size
+        self.cnn_model = CNNModel(input_shape, num_classes, precision=precision, jit_compile=jit_compile)
+        self.backbone = None
+
+        # Os embeddings são indexados pelo hash do conteúdo de cada imagem, em um diretório por tamanho de entrada
+        # e precisão (a ResNet50 em mixed_float16 não produz os mesmos embeddings que em float32). O diretório é
+        # compartilhado entre datasets e entre processos (ver extract)
+        self.cache_dir = os.path.join(CACHE_DIR, "features", f"{input_shape[0]}x{input_shape[1]}_{precision}")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_backbone(self):
+        if self.backbone is None:
+            self.backbone = self.cnn_model.build_feature_extractor()
+        return self.backbone
+
+    def build_head(self):
+        return self.cnn_model.build_head(self.get_backbone().output_shape[-1])
+
+    def build_full_model(self, head, learning_rate=None):
+        return self.cnn_model.attach_head(self.get_backbone(), head, learning_rate)
+
+    def unfreeze(self, model, num_blocks, learning_rate=1e-5):
+        """
+        Prepara o modelo completo para o fine-tuning: descongela os últimos num_blocks blocos da ResNet50 e
+        recompila com uma taxa de aprendizado baixa, para não destruir os pesos já treinados.
+        """
+        blocks = CNNModel.unfreeze_blocks(self.get_backbone(), num_blocks)
+        self.cnn_model.compile_model(model, learning_rate)
+        return blocks
+
+    @staticmethod
+    def file_hash(path):
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def read_index(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"features": {}}
+
+    def save_shard(self, features):
+        # Nome exclusivo por shard: processos extraindo ao mesmo tempo nunca gravam no mesmo arquivo
+        fd, path = tempfile.mkstemp(dir=self.cache_dir, prefix="features_", suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, features.astype(np.float32))
+        return os.path.basename(path)
+
+    def merge_index(self, entries):
+        """
+        Acrescenta entries (hash → [shard, posição]) ao índice em disco e retorna o índice mesclado. A leitura,
+        a mescla e a gravação acontecem sob uma trava, para que as entradas gravadas por outros processos
+        desde a leitura anterior não sejam perdidas.
+        """
+        with Model.file_lock(self.index_path + ".lock"):
+            index = self.read_index()
+            for h, entry in entries.items():
+                index["features"].setdefault(h, entry)
+            Model.write_json(self.index_path, index)
+        return index
+
+    def extract(self, files, log=print):
+        """
+        Retorna uma matriz (len(files), 2048) com os embeddings das imagens. Apenas as imagens cujo hash
+        ainda não está no cache passam pela ResNet50; as demais são lidas dos shards .npy em disco.
+        """
+        index = self.read_index()
+        hashes = [self.file_hash(path) for path in files]
+        missing = sorted({h: path for h, path in zip(hashes, files) if h not in index["features"]}.items())
+
+        if missing:
+            log(f"Extraindo características de {len(missing)} imagens com a ResNet50 congelada...")
+            img_size = self.input_shape[:2]
+            dataset = tf.data.Dataset.from_tensor_slices([path for _, path in missing])
+            dataset = dataset.map(lambda path: Model.decode_image(path, img_size), num_parallel_calls=tf.data.AUTOTUNE)
+            dataset = dataset.batch(self.batch_size)
+            dataset = dataset.map(lambda images: tf.cast(images, tf.float32) / 255.0,
+                                  num_parallel_calls=tf.data.AUTOTUNE)
+            features = self.get_backbone().predict(dataset.prefetch(tf.data.AUTOTUNE), verbose=0)
+
+            shard_name = self.save_shard(features)
+            index = self.merge_index({h: [shard_name, position] for position, (h, _) in enumerate(missing)})
+
+        log(f"Características reutilizadas do cache: {len(files) - len(missing)} de {len(files)} imagens")
+
+        shards = {}
+        features = np.empty((len(files), self.get_backbone().output_shape[-1]), dtype=np.float32)
+        for row, h in enumerate(hashes):
+            shard_name, position = index["features"][h]
+            if shard_name not in shards:
+                shards[shard_name] = np.load(os.path.join(self.cache_dir, shard_name), mmap_mode='r')
+            features[row] = shards[shard_name][position]
+
+        return features
+
+    def build_datasets(self, log=print):
+        """
+        Extrai (ou lê do cache) as características dos conjuntos de treino e validação e monta os pipelines
+        tf.data de (embedding, rótulo one-hot) utilizados no treinamento da cabeça.
+        """
+        (train_files, train_labels), (val_files, val_labels), class_indices = (
+            Model.list_dataset(self.dataset_path, self.val_split, self.seed))
+        num_classes = len(class_indices)
+
+        train_features = self.extract(train_files, log)
+        val_features = self.extract(val_files, log)
+
+        train_dataset = tf.data.Dataset.from_tensor_slices(
+            (train_features, tf.one_hot(np.asarray(train_labels, dtype=np.int64), num_classes)))
+        train_dataset = train_dataset.shuffle(max(len(train_files), 1), reshuffle_each_iteration=True)
+        val_dataset = tf.data.Dataset.from_tensor_slices(
+            (val_features, tf.one_hot(np.asarray(val_labels, dtype=np.int64), num_classes)))
+
+        return (train_dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE),
+                val_dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE))
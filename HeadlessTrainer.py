@@ -0,0 +1,358 @@
+import argparse
+import contextlib
+import math
+import os
+import shutil
+import sys
+import tempfile
+import tensorflow as tf
+from Augmentation import AUGMENTATIONS
+from CNNModel import CNNModel, HEAD_TYPES, PRECISIONS
+from Evaluator import TTA_VIEWS
+from FeatureExtractor import FeatureExtractor
+from Model import Model, SPLIT_SEED
+from ModelExporter import ModelExporter, EXPORT_FORMATS
+from Trainer import Trainer, DEFAULT_TENSORBOARD_OPTIONS, MEMORY_ERRORS, MEMORY_ERROR_MESSAGE
+
+'''
+Treinamento sem interface gráfica (sem PyQt5 e sem tkinter), para servidores sem display.
+
+Exemplos:
+    python -m HeadlessTrainer --dataset dados/ears --input-size 224 --batch-size 32 --split 0.3 \
+                              --epochs 100 --log-name ears_100ep
+    python -m HeadlessTrainer --config ears.yaml --epochs 250
+'''
+
+# Valores padrão de cada parâmetro (os mesmos nomes são aceitos no arquivo de configuração)
+DEFAULTS = {
+    'dataset': None,
+    'input_size': 128,
+    'batch_size': 32,
+    'split': 0.3,
+    'seed': SPLIT_SEED,
+    'epochs': 50,
+    'log_name': None,
+    'pipeline': 'generator',
+    'cache': None,
+    'augmentation': (),
+    'head': 'flatten',
+    'mode': 'full',
+    'fine_tune_blocks': 0,
+    'fine_tune_epochs': 0,
+    'precision': 'float32',
+    'jit_compile': False,
+    'accumulation_steps': 1,
+    'auto_batch_size': False,
+    'histogram_freq': 1,
+    'update_freq': 'epoch',
+    'profile_batch': 0,
+    'write_graph': True,
+    'write_images': False,
+    'intra_op_threads': 0,
+    'inter_op_threads': 0,
+    'verbose': 1,
+    'checkpoint_freq': 1,
+    'early_stopping_patience': 0,
+    'restore_best': True,
+    'resume': None,
+    'evaluate': True,
+    'tta': (),
+    'save': True,
+    'save_format': 'h5',
+    'tflite': None,
+    'prune': 0.0,
+    'distributed': False,
+}
+
+
+class HeadlessTrainer:
+
+    def __init__(self, config, log=print):
+        """
+        Executa as mesmas etapas da interface (Selecionar Dataset → Construir ResNet50 → Iniciar Treinamento)
+        a partir de um dicionário de configuração.
+        parametro config: Dicionário com as chaves de DEFAULTS
+        parametro log: Função chamada com cada mensagem de log
+        """
+        self.config = dict(DEFAULTS, **config)
+        self.config['augmentation'] = tuple(self.config['augmentation'] or ())  # utilizado como chave (ExperimentQueue)
+        self.log = log
+
+        for key in ('dataset', 'log_name'):
+            if not self.config[key]:
+                raise ValueError(f"Parâmetro obrigatório não definido: {key}")
+
+        if self.config['mode'] == 'features' and (self.config['accumulation_steps'] > 1
+                                                  or self.config['auto_batch_size']):
+            raise ValueError("A acumulação de gradientes não é suportada no modo de extração de características")
+
+        # Verificado antes do treinamento, para que a exportação não falhe apenas ao final
+        if self.config['save'] and self.config['save_format'] == 'keras' and not ModelExporter.keras_v3_supported():
+            raise ValueError(f"O formato .keras requer TensorFlow 2.12 ou superior (versão instalada: "
+                             f"{tf.__version__})")
+
+        if self.config['distributed']:
+            # Combinações não suportadas pela MultiWorkerMirroredStrategy neste projeto (ver DistributedTrainer)
+            unsupported = {
+                'mode': self.config['mode'] != 'full',
+                'accumulation_steps': self.config['accumulation_steps'] > 1,
+                'auto_batch_size': self.config['auto_batch_size'],
+                'resume': self.config['resume'] is not None,
+                'tflite': self.config['tflite'] is not None,
+                'pipeline': self.config['pipeline'] not in ('tfdata', 'streaming'),
+            }
+            invalid = [key for key, value in unsupported.items() if value]
+            if invalid:
+                raise ValueError(f"Parâmetros não suportados no treinamento distribuído: {', '.join(invalid)} "
+                                 f"(modo 'full', pipeline 'tfdata' ou 'streaming', sem acumulação, retomada "
+                                 f"ou TFLite)")
+
+        # MultiWorkerMirroredStrategy do treinamento distribuído (ver configure_strategy)
+        self.strategy = None
+
+    def configure_threads(self):
+        """
+        Limita a quantidade de threads do TensorFlow (0 mantém o padrão, todos os núcleos). Precisa ser chamado
+        antes de qualquer operação do TensorFlow no processo, por isso é utilizado apenas pela linha de comando
+        (cada worker do ParallelScheduler recebe uma fatia dos núcleos).
+        """
+        if self.config['intra_op_threads']:
+            tf.config.threading.set_intra_op_parallelism_threads(self.config['intra_op_threads'])
+        if self.config['inter_op_threads']:
+            tf.config.threading.set_inter_op_parallelism_threads(self.config['inter_op_threads'])
+
+    def configure_strategy(self):
+        """
+        Cria a MultiWorkerMirroredStrategy a partir da variável de ambiente TF_CONFIG (definida pelo
+        DistributedTrainer). Assim como o configure_threads, precisa ser chamado antes de qualquer operação do
+        TensorFlow no processo.
+        """
+        if not self.config['distributed']:
+            return
+
+        self.strategy = tf.distribute.MultiWorkerMirroredStrategy()
+        resolver = self.strategy.cluster_resolver
+        self.log(f"Worker {resolver.task_id} de {self.strategy.num_replicas_in_sync} "
+                 f"({'chief' if self.is_chief() else 'secundário'})")
+
+    def is_chief(self):
+        # Sem um worker 'chief' explícito no cluster, o worker 0 é o principal
+        if self.strategy is None:
+            return True
+        resolver = self.strategy.cluster_resolver
+        return resolver.task_type == 'chief' or (resolver.task_type == 'worker' and resolver.task_id == 0)
+
+    def probe_batch_size(self):
+        """
+        Reduz o batch size até caber na memória (CNNModel.probe_batch_size) e compensa com a acumulação de
+        gradientes, mantendo o lote efetivo (batch_size * accumulation_steps) configurado. Utiliza um modelo
+        temporário, descartado antes do carregamento dos dados.
+        """
+        config = self.config
+        effective_batch = config['batch_size'] * config['accumulation_steps']
+        input_shape = (config['input_size'], config['input_size'], 3)
+        num_classes = len(Model.class_indices(config['dataset']))
+
+        network = CNNModel(input_shape, num_classes, config['head'], config['precision']).build_model()
+        batch_size = CNNModel.probe_batch_size(network, config['batch_size'], self.log)
+        network = None
+        tf.keras.backend.clear_session()
+
+        if batch_size < config['batch_size']:
+            config['batch_size'] = batch_size
+            config['accumulation_steps'] = CNNModel.accumulation_for(effective_batch, batch_size)
+            self.log(f"Batch size ajustado para {batch_size} com {config['accumulation_steps']} passos de "
+                     f"acumulação (lote efetivo de {batch_size * config['accumulation_steps']} imagens)")
+
+    def load_data(self):
+        config = self.config
+        img_size = (config['input_size'], config['input_size'])
+
+        train_data, val_data, log_training_samples, log_validation_samples, log_indexes, num_classes = (
+            Model.load_data(config['dataset'], img_size, config['batch_size'], config['split'],
+                            config['pipeline'], config['cache'], config['seed'], config['augmentation']))
+
+        self.log(log_training_samples)
+        self.log(log_validation_samples)
+        self.log(log_indexes)
+        return train_data, val_data, num_classes
+
+    def load_distributed_data(self):
+        """
+        Dados do treinamento distribuído: cada worker monta, com o Model.load_data, apenas a sua parte do dataset
+        (arquivos divididos antes da decodificação), com batch_size imagens por worker (lote global de
+        batch_size * workers). Os conjuntos são repetidos indefinidamente e as épocas são definidas pela
+        quantidade de passos, de modo que todos os workers executam o mesmo número de passos.
+        Retorna (train_data, val_data, num_classes, passos por época, passos de validação).
+        """
+        config = self.config
+        img_size = (config['input_size'], config['input_size'])
+        workers = self.strategy.num_replicas_in_sync
+        global_batch = config['batch_size'] * workers
+        train_size, val_size, num_classes = Model.dataset_sizes(config['dataset'], config['split'], config['seed'])
+
+        def creator(subset):
+            def dataset_fn(input_context):
+                batch_size = input_context.get_per_replica_batch_size(global_batch)
+                shard = (input_context.num_input_pipelines, input_context.input_pipeline_id)
+                augmentation = config['augmentation'] if subset == 0 else None
+                datasets = Model.load_data(config['dataset'], img_size, batch_size, config['split'],
+                                           config['pipeline'], config['cache'], config['seed'], augmentation, shard)
+                return datasets[subset].repeat()
+            return tf.keras.utils.experimental.DatasetCreator(dataset_fn)
+
+        steps_per_epoch = max(1, math.ceil(train_size / global_batch))
+        validation_steps = max(1, math.ceil(val_size / global_batch))
+        self.log(f"Treinamento distribuído: {workers} workers, lote global de {global_batch} imagens "
+                 f"({config['batch_size']} por worker) - {train_size} imagens de treinamento e {val_size} de "
+                 f"validação, {steps_per_epoch} passos por época")
+        return creator(0), creator(1), num_classes, steps_per_epoch, validation_steps
+
+    def build_trainer(self, train_data, val_data, num_classes, steps_per_epoch=None, validation_steps=None):
+        config = self.config
+        input_shape = (config['input_size'], config['input_size'], 3)
+
+        if config['mode'] == 'features':
+            feature_extractor = FeatureExtractor(config['dataset'], config['split'], input_shape,
+                                                 config['batch_size'], num_classes,
+                                                 config['precision'], config['jit_compile'], config['seed'])
+            network = feature_extractor.build_head()
+        else:
+            feature_extractor = None
+            # No treinamento distribuído o modelo (e o otimizador) é criado no escopo da estratégia, com as
+            # variáveis espelhadas em todos os workers
+            scope = self.strategy.scope() if self.strategy is not None else contextlib.nullcontext()
+            with scope:
+                network = CNNModel(input_shape, num_classes, config['head'], config['precision'],
+                                   config['jit_compile'], config['accumulation_steps']).build_model()
+
+        self.log(CNNModel.memory_report(network, config['batch_size']))
+
+        # O profile_batch pode vir como texto da linha de comando (ex: "0" ou "10,20")
+        tensorboard_options = {key: config[key] for key in DEFAULT_TENSORBOARD_OPTIONS}
+        if str(tensorboard_options['profile_batch']).isdigit():
+            tensorboard_options['profile_batch'] = int(tensorboard_options['profile_batch'])
+
+        return Trainer(network, train_data, val_data, config['epochs'], config['log_name'],
+                       feature_extractor, config['fine_tune_blocks'], config['fine_tune_epochs'], log=self.log,
+                       run_config=config, tensorboard_options=tensorboard_options, verbose=config['verbose'],
+                       checkpoint_freq=config['checkpoint_freq'],
+                       early_stopping_patience=config['early_stopping_patience'],
+                       restore_best=config['restore_best'], resume_from=config['resume'],
+                       # A predição distribuída exige a participação de todos os workers: no treinamento
+                       # distribuído o modelo salvo é avaliado depois, com python -m Evaluator
+                       evaluate=config['evaluate'] and self.strategy is None, tta=config['tta'],
+                       steps_per_epoch=steps_per_epoch, validation_steps=validation_steps, chief=self.is_chief())
+
+    def save(self, trainer):
+        if not self.config['save']:
+            return
+
+        if not self.is_chief():
+            # Todos os workers participam do salvamento (operações coletivas), apenas o chief mantém os arquivos
+            temp_dir = tempfile.mkdtemp()
+            ModelExporter.export(trainer.neural_network, os.path.join(temp_dir, self.config['log_name']),
+                                 self.config['save_format'])
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+
+        path = ModelExporter.export(trainer.neural_network, self.config['log_name'], self.config['save_format'],
+                                    lambda percent, message: self.log(message) if percent == 100 else None)
+        Model.save_class_indices(path, Model.class_indices(self.config['dataset']))
+
+        if self.config['tflite']:
+            from QuantizedExporter import QuantizedExporter
+
+            exporter = QuantizedExporter(trainer.neural_network, self.config['dataset'], self.config['split'],
+                                         self.config['seed'], log=self.log)
+            exporter.export(self.config['log_name'], self.config['tflite'], self.config['prune'])
+
+    def run(self):
+        if self.config['auto_batch_size']:
+            self.probe_batch_size()
+
+        if self.strategy is not None:
+            train_data, val_data, num_classes, steps, validation_steps = self.load_distributed_data()
+            trainer = self.build_trainer(train_data, val_data, num_classes, steps, validation_steps)
+        else:
+            train_data, val_data, num_classes = self.load_data()
+            trainer = self.build_trainer(train_data, val_data, num_classes)
+        trainer.train()
+        self.save(trainer)
+
+        return trainer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Treinamento da ResNet50 sem interface gráfica")
+    parser.add_argument('--config', help="Arquivo YAML ou JSON com os parâmetros (os argumentos têm prioridade)")
+    parser.add_argument('--dataset', help="Pasta do dataset, com uma subpasta por classe")
+    parser.add_argument('--input-size', type=int, help="Tamanho das imagens na entrada da rede (ex: 224)")
+    parser.add_argument('--batch-size', type=int, help="Quantidade de imagens por lote (ex: 32)")
+    parser.add_argument('--split', type=float, help="Fração das imagens destinada à validação (ex: 0.3)")
+    parser.add_argument('--seed', type=int, help="Semente da divisão treino/validação")
+    parser.add_argument('--epochs', type=int, help="Quantidade de épocas de treinamento")
+    parser.add_argument('--log-name', help="Nome da execução (logs em logs/fit/ e arquivo de pesos)")
+    parser.add_argument('--pipeline', choices=['generator', 'tfdata', 'cached', 'streaming'],
+                        help="Pipeline de dados ('streaming': shards TFRecord, ver ShardedDataset)")
+    parser.add_argument('--cache', choices=['memory', 'disk'], help="Cache do pipeline tf.data")
+    parser.add_argument('--augment', dest='augmentation', nargs='+', choices=list(AUGMENTATIONS),
+                        help="Aumento de dados por lote (pipelines tfdata, cached e streaming)")
+    parser.add_argument('--head', choices=HEAD_TYPES, help="Camada entre a ResNet50 e as camadas densas")
+    parser.add_argument('--mode', choices=['full', 'features'], help="Rede completa ou extração de características")
+    parser.add_argument('--fine-tune-blocks', type=int, help="Blocos descongelados no fine-tuning (modo features)")
+    parser.add_argument('--fine-tune-epochs', type=int, help="Épocas de fine-tuning (modo features)")
+    parser.add_argument('--precision', choices=PRECISIONS, help="Política de precisão (ex: mixed_bfloat16)")
+    parser.add_argument('--jit-compile', action='store_const', const=True, help="Compila os passos com o XLA")
+    parser.add_argument('--accumulation-steps', type=int,
+                        help="Micro-lotes acumulados por atualização dos pesos (lote efetivo = batch size * passos)")
+    parser.add_argument('--auto-batch-size', action='store_const', const=True,
+                        help="Reduz o batch size até caber na memória, compensando com a acumulação de gradientes")
+    parser.add_argument('--histogram-freq', type=int, help="Frequência dos histogramas em épocas (0 desativa)")
+    parser.add_argument('--update-freq', choices=['epoch', 'batch'], help="Frequência de registro das métricas")
+    parser.add_argument('--profile-batch', help="Lotes analisados pelo profiler (ex: 10,20 - 0 desativa)")
+    parser.add_argument('--no-write-graph', dest='write_graph', action='store_const', const=False,
+                        help="Não registrar o grafo da rede")
+    parser.add_argument('--write-images', action='store_const', const=True, help="Registrar os pesos como imagens")
+    parser.add_argument('--intra-op-threads', type=int, help="Threads por operação do TensorFlow (0 = padrão)")
+    parser.add_argument('--inter-op-threads', type=int, help="Operações executadas em paralelo (0 = padrão)")
+    parser.add_argument('--verbose', type=int, choices=[0, 1, 2], help="Saída do Keras (0 = apenas o log)")
+    parser.add_argument('--checkpoint-freq', type=int, help="Intervalo entre checkpoints em épocas (0 desativa)")
+    parser.add_argument('--patience', dest='early_stopping_patience', type=int,
+                        help="Épocas sem melhora de val_accuracy antes de interromper (0 desativa)")
+    parser.add_argument('--no-restore-best', dest='restore_best', action='store_const', const=False,
+                        help="Manter os pesos da última época em vez dos da melhor")
+    parser.add_argument('--resume', help="Diretório de logs de uma execução a ser retomada do último checkpoint")
+    parser.add_argument('--no-evaluate', dest='evaluate', action='store_const', const=False,
+                        help="Não avaliar o modelo final sobre a validação (ver Evaluator)")
+    parser.add_argument('--tta', nargs='+', choices=TTA_VIEWS,
+                        help="Test-time augmentation na avaliação final (ex: flip crop)")
+    parser.add_argument('--save-format', choices=EXPORT_FORMATS, help="Formato de exportação do modelo")
+    parser.add_argument('--tflite', choices=['dynamic', 'int8', 'float16'],
+                        help="Exporta também um modelo TFLite quantizado (ver QuantizedExporter)")
+    parser.add_argument('--prune', type=float, help="Fração dos pesos da cabeça zerados na exportação TFLite")
+    parser.add_argument('--no-save', dest='save', action='store_const', const=False, help="Não salvar os pesos")
+    args = parser.parse_args(argv)
+
+    config = Model.load_config(args.config) if args.config else {}
+    config.update({key: value for key, value in vars(args).items() if key != 'config' and value is not None})
+    return config
+
+
+def main(argv=None):
+    try:
+        headless = HeadlessTrainer(parse_args(argv))
+        headless.configure_threads()
+        headless.configure_strategy()
+        headless.run()
+    except MEMORY_ERRORS as e:
+        print(f"{MEMORY_ERROR_MESSAGE} ({type(e).__name__})", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Erro durante o treinamento: {str(e)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
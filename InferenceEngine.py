@@ -0,0 +1,124 @@
+import argparse
+import csv
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from Model import Model
+from ModelExporter import ModelExporter
+
+'''
+Classificação em lote de imagens com um modelo treinado ({nome}_weights.h5 ou outro formato do ModelExporter).
+
+Exemplo:
+    python -m InferenceEngine ears_weights.h5 pasta_de_imagens/ --output predicoes.csv
+'''
+
+
+class InferenceEngine:
+
+    def __init__(self, weights_path, batch_size=64):
+        """
+        Carrega o modelo uma única vez e classifica listas de imagens em lotes, com a mesma decodificação,
+        redimensionamento e normalização (1/255) do Model.load_data.
+        parametro weights_path: Modelo salvo pela interface ou pelo HeadlessTrainer (ver ModelExporter.export_path)
+        parametro batch_size: Quantidade de imagens por lote na inferência
+        """
+        self.model = ModelExporter.load(weights_path)
+        self.batch_size = batch_size
+        self.img_size = tuple(self.model.input_shape[1:3])
+
+        # Nomes das classes na ordem dos índices de saída (ex: dor, dor moderada, não dor)
+        num_classes = self.model.output_shape[-1]
+        class_indices = Model.load_class_indices(weights_path)
+        if class_indices is None:
+            self.class_names = [f"classe_{index}" for index in range(num_classes)]
+        else:
+            self.class_names = sorted(class_indices, key=class_indices.get)
+
+    def build_dataset(self, paths):
+        # Imagens que não puderem ser decodificadas são descartadas (ignore_errors); o caminho acompanha cada
+        # imagem para que as predições continuem associadas ao arquivo correto
+        dataset = tf.data.Dataset.from_tensor_slices(paths)
+        dataset = dataset.map(lambda path: (Model.decode_image(path, self.img_size), path),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.apply(tf.data.experimental.ignore_errors())
+        dataset = dataset.batch(self.batch_size)
+        dataset = dataset.map(Model.rescale, num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def predict(self, paths):
+        """
+        Retorna (caminhos, probabilidades, tempo em segundos). A lista de caminhos retornada pode ser menor que a
+        de entrada caso alguma imagem não possa ser lida.
+        """
+        predicted_paths, probabilities = [], []
+
+        start = time.perf_counter()
+        for images, batch_paths in self.build_dataset(paths):
+            probabilities.append(self.model.predict_on_batch(images))
+            predicted_paths += [path.decode() for path in batch_paths.numpy()]
+        elapsed = time.perf_counter() - start
+
+        if probabilities:
+            probabilities = np.concatenate(probabilities)
+        else:
+            probabilities = np.empty((0, len(self.class_names)), dtype=np.float32)
+
+        return predicted_paths, probabilities, elapsed
+
+    def write_results(self, paths, probabilities, output_path):
+        """
+        Escreve uma linha por imagem: caminho, classe prevista e a probabilidade de cada classe.
+        Arquivos .parquet exigem o pandas (e o pyarrow); os demais são escritos em CSV.
+        """
+        predicted = [self.class_names[index] for index in np.argmax(probabilities, axis=1)]
+        header = ['path', 'predicted_class'] + [f"prob_{name}" for name in self.class_names]
+
+        if output_path.endswith('.parquet'):
+            import pandas as pd
+            frame = pd.DataFrame(probabilities, columns=header[2:])
+            frame.insert(0, 'predicted_class', predicted)
+            frame.insert(0, 'path', paths)
+            frame.to_parquet(output_path, index=False)
+            return
+
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for path, label, row in zip(paths, predicted, probabilities):
+                writer.writerow([path, label] + [f"{value:.6f}" for value in row])
+
+    def run(self, inputs, output_path, log=print):
+        # inputs: lista de arquivos e/ou pastas; as pastas são percorridas recursivamente
+        paths = Model.list_images(inputs)
+        log(f"Classificando {len(paths)} imagens (lotes de {self.batch_size}, entrada {self.img_size})...")
+
+        predicted_paths, probabilities, elapsed = self.predict(paths)
+        self.write_results(predicted_paths, probabilities, output_path)
+
+        skipped = len(paths) - len(predicted_paths)
+        images_per_second = len(predicted_paths) / elapsed if elapsed > 0 else 0.0
+        log(f"{len(predicted_paths)} imagens classificadas em {elapsed:.2f} s ({images_per_second:.1f} imagens/s)")
+        if skipped:
+            log(f"{skipped} imagens não puderam ser lidas e foram ignoradas")
+        log(f"Predições salvas em {output_path}")
+
+        return images_per_second
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classificação em lote com um modelo treinado")
+    parser.add_argument('weights', help="Modelo exportado (ex: {nome}_weights.h5)")
+    parser.add_argument('inputs', nargs='+', help="Imagens e/ou pastas de imagens")
+    parser.add_argument('--output', default="predicoes.csv", help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument('--batch-size', type=int, default=64, help="Quantidade de imagens por lote")
+    args = parser.parse_args(argv)
+
+    engine = InferenceEngine(args.weights, args.batch_size)
+    engine.run(args.inputs, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,25 @@
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt, QTimer
 from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QVBoxLayout,
-    QPushButton, QTextEdit, QDialog, QMessageBox, QLabel
+    QPushButton, QTextEdit, QDialog, QMessageBox, QLabel, QInputDialog, QProgressBar
 )
 
-from CNNModel import CNNModel
+from BackendLoader import BackendLoader
 from DataParameters import DataParameters
 from Model import Model
+from NetworkParameters import NetworkParameters
 from NetworkLogName import NetworkLogName
-from TrainerThread import TrainerThread
+from RunComparison import RunComparison
+import os
+import socket
 import subprocess
 import webbrowser
 import time
 
+# Porta do servidor do TensorBoard iniciado pela interface
+TENSORBOARD_PORT = 6006
+
 
 class Interface(QWidget):
 
@@ -46,6 +52,10 @@ class Interface(QWidget):
         self.btn_select_folder = QPushButton("Selecionar Dataset")
         self.btn_network_build = QPushButton("Construir ResNet50")
         self.btn_train = QPushButton("Iniciar Treinamento")
+        self.btn_resume = QPushButton("Retomar Treinamento")
+        self.btn_queue = QPushButton("Fila de Experimentos")
+        self.btn_parallel = QPushButton("Treinamento Paralelo")
+        self.btn_compare = QPushButton("Comparar Execuções")
         self.btn_tensorboard = QPushButton("Abrir Tensorboard")
         self.btn_exit = QPushButton("Sair")
 
@@ -53,6 +63,10 @@ class Interface(QWidget):
         button_layout.addWidget(self.btn_select_folder)
         button_layout.addWidget(self.btn_network_build)
         button_layout.addWidget(self.btn_train)
+        button_layout.addWidget(self.btn_resume)
+        button_layout.addWidget(self.btn_queue)
+        button_layout.addWidget(self.btn_parallel)
+        button_layout.addWidget(self.btn_compare)
         button_layout.addWidget(self.btn_tensorboard)
         button_layout.addWidget(self.btn_exit)
         button_layout.addStretch()  # empurra os botões para cima
@@ -64,15 +78,24 @@ class Interface(QWidget):
         self.btn_select_folder.clicked.connect(self.select_data)
         self.btn_network_build.clicked.connect(self.build_network)
         self.btn_train.clicked.connect(self.train_network)
+        self.btn_resume.clicked.connect(self.resume_training)
+        self.btn_queue.clicked.connect(self.run_queue)
+        self.btn_parallel.clicked.connect(self.run_parallel)
+        self.btn_compare.clicked.connect(self.compare_runs)
         self.btn_tensorboard.clicked.connect(self.open_logs)
         self.btn_exit.clicked.connect(self.exit_program)
 
         # ----------------------------------------------
 
         # Atributos referentes ao carregamento dos dados
+        self.dataset_path = None
         self.image_generator_input_size = None
         self.image_generator_batch_size = None
         self.image_generator_split = None
+        self.data_pipeline = None
+        self.data_cache = None
+        self.data_seed = None
+        self.data_augmentation = []
         self.train_data = None
         self.val_data = None
 
@@ -82,12 +105,42 @@ class Interface(QWidget):
         self.network_input_size = None
         self.resnet = None
         self.dataset_classes = None
+        self.feature_extractor = None
+        self.fine_tune_blocks = 0
+        self.fine_tune_epochs = 0
+        self.network_parameters = {}
 
         # ----------------------------------------------
 
         # Atributos referentes ao treinamento da rede
         self.trainer_thread = None
+        self.queue_thread = None
         self.fileName_weights = None
+        self.save_format = 'h5'
+        self.tflite_options = None
+        self.save_thread = None
+
+        # ----------------------------------------------
+
+        # TensorBoard: iniciado apenas quando solicitado e reaproveitado enquanto o diretório for o mesmo
+        self.tensorboard_process = None
+        self.tensorboard_logdir = None
+        self.tensorboard_timer = QTimer(self)
+        self.tensorboard_timer.timeout.connect(self.poll_tensorboard)
+        self.tensorboard_deadline = None
+
+        # ----------------------------------------------
+
+        # Carregamento do TensorFlow em segundo plano (ver load_backend)
+        self.backend_loader = None
+        self.status_label = QLabel("Carregando backend (TensorFlow)...")
+        self.status_label.setAlignment(Qt.AlignCenter)
+        button_layout.addWidget(self.status_label)
+
+        # Andamento da exportação do modelo, exibido apenas durante o salvamento (ver save_weights)
+        self.save_progress = QProgressBar()
+        self.save_progress.setVisible(False)
+        button_layout.addWidget(self.save_progress)
 
         # ----------------------------------------------
 
@@ -113,6 +166,27 @@ class Interface(QWidget):
 
         self.log_area.append(msg)
 
+    def load_backend(self):
+        """
+        O TensorFlow (e os módulos CNNModel, FeatureExtractor e TrainerThread) leva vários segundos para ser
+        importado. Para que a janela seja exibida imediatamente, a importação é feita em segundo plano, logo
+        após a janela ser mostrada.
+        """
+        self.backend_loader = BackendLoader()
+        self.backend_loader.backend_loaded.connect(self.backend_ready)
+        self.backend_loader.backend_failed.connect(self.backend_error)
+        self.backend_loader.start()
+
+    def backend_ready(self, elapsed: float):
+
+        self.status_label.setText("Backend carregado")
+        self.add_log_message(f'TensorFlow carregado em {elapsed:.2f} s')
+
+    def backend_error(self, error: str):
+
+        self.status_label.setText("Erro ao carregar o backend")
+        self.add_log_message(f'Erro ao carregar o TensorFlow: {error}')
+
     def select_data(self):
 
         path = self.model.open_directory()
@@ -125,22 +199,33 @@ class Interface(QWidget):
             self.image_generator_input_size = dialog.input_size
             self.image_generator_batch_size = dialog.batch_size
             self.image_generator_split = dialog.split
+            self.data_pipeline = dialog.pipeline
+            self.data_cache = dialog.cache
+            self.data_seed = dialog.seed
+            self.data_augmentation = dialog.augmentation
         else:
             QMessageBox.warning(self, "Erro de valor","Seleção de dados cancelada pelo usuário.")
             return  # encerra a função sem travar
 
         self.add_log_message(f'Input Size escolhido: {self.image_generator_input_size}')
         self.add_log_message(f'Batch Size escolhido: {self.image_generator_batch_size}')
-        self.add_log_message(f'Taxa de divisão escolhida: {self.image_generator_split}')
+        self.add_log_message(f'Taxa de divisão escolhida: {self.image_generator_split} (semente {self.data_seed})')
+        self.add_log_message(f'Pipeline de dados escolhido: {self.data_pipeline} (cache: {self.data_cache})')
+        self.add_log_message(f'Aumento de dados: {", ".join(self.data_augmentation) or "desativado"}')
         self.add_log_message('--------------------------------------------------------')
 
+        self.dataset_path = path
         model = Model()
 
         self.train_data, self.val_data, log_training_samples, log_validation_samples, log_indexes, self.dataset_classes\
             =  (model.load_data(path,
                                 (self.image_generator_input_size, self.image_generator_input_size),
                                 self.image_generator_batch_size,
-                                self.image_generator_split))
+                                self.image_generator_split,
+                                self.data_pipeline,
+                                self.data_cache,
+                                self.data_seed,
+                                self.data_augmentation))
 
         self.add_log_message(log_training_samples)
         self.add_log_message(log_validation_samples)
@@ -153,15 +238,56 @@ class Interface(QWidget):
             QMessageBox.warning(self, "Erro", "Input Size ou quantidade de classes não foram definidas, recarregue o dataset")
             return
 
+        # Importação tardia: o TensorFlow é carregado em segundo plano (ver load_backend)
+        from CNNModel import CNNModel
+        from FeatureExtractor import FeatureExtractor
+
+        dialog = NetworkParameters()
+        if dialog.exec_() != QDialog.Accepted:
+            QMessageBox.warning(self, "Erro de valor", "Configuração da rede cancelada pelo usuário.")
+            return  # encerra a função sem travar
+
         # O input size da rede tem o mesmo formato dos dados gerados, com 3 camadas (normal de imagens sem tratamento)
         cnn_input_size = (self.image_generator_input_size, self.image_generator_input_size, 3)
-        cnn_model = CNNModel(cnn_input_size, self.dataset_classes)
-        self.resnet = cnn_model.build_model()
+
+        # Parâmetros registrados junto aos logs de cada execução (run_config.json)
+        self.network_parameters = {'head': dialog.head_type, 'mode': dialog.training_mode,
+                                   'precision': dialog.precision, 'jit_compile': dialog.jit_compile,
+                                   'accumulation_steps': dialog.accumulation_steps}
+
+        if dialog.training_mode == 'features':
+            # Apenas a cabeça da rede é construída aqui, a ResNet50 congelada é utilizada pelo FeatureExtractor
+            self.feature_extractor = FeatureExtractor(self.dataset_path, self.image_generator_split, cnn_input_size,
+                                                      self.image_generator_batch_size, self.dataset_classes,
+                                                      dialog.precision, dialog.jit_compile, self.data_seed)
+            self.fine_tune_blocks = dialog.fine_tune_blocks
+            self.fine_tune_epochs = dialog.fine_tune_epochs
+            self.resnet = self.feature_extractor.build_head()
+            self.add_log_message('Modo de extração de características: apenas a cabeça da rede será treinada '
+                                 '(embeddings com Global Average Pooling)')
+        else:
+            self.feature_extractor = None
+            cnn_model = CNNModel(cnn_input_size, self.dataset_classes, dialog.head_type,
+                                 dialog.precision, dialog.jit_compile, dialog.accumulation_steps)
+            self.resnet = cnn_model.build_model()
+
+            if dialog.probe_batch_size:
+                # Os dados já foram carregados com o batch size escolhido, portanto apenas a recomendação é exibida
+                batch_size = CNNModel.probe_batch_size(self.resnet, self.image_generator_batch_size,
+                                                       self.add_log_message)
+                if batch_size < self.image_generator_batch_size:
+                    effective_batch = self.image_generator_batch_size * dialog.accumulation_steps
+                    QMessageBox.warning(self, "Memória insuficiente",
+                                        f"O batch size {self.image_generator_batch_size} não cabe na memória. "
+                                        f"Recarregue o dataset com batch size {batch_size} e utilize "
+                                        f"{CNNModel.accumulation_for(effective_batch, batch_size)} passos de "
+                                        f"acumulação para manter o lote efetivo de {effective_batch} imagens.")
 
         if self.resnet:
             self.add_log_message(f'Rede construída: {self.resnet}')
             self.add_log_message(f'Rede compilada com sucesso!')
             self.add_log_message(f'Quantidade de classes encontradas: {self.dataset_classes}')
+            self.add_log_message(CNNModel.memory_report(self.resnet, self.image_generator_batch_size))
         self.add_log_message('--------------------------------------------------------')
 
     def train_network(self):
@@ -173,27 +299,152 @@ class Interface(QWidget):
         dialog = NetworkLogName()
         if dialog.exec_() == QDialog.Accepted:
             fileName = dialog.log_name
-            self.fileName_weights = fileName
             epochs = dialog.epochs
+            self.save_format = dialog.save_format
+            self.tflite_options = None
+            if dialog.tflite_quantization:
+                self.tflite_options = {'quantization': dialog.tflite_quantization, 'prune': dialog.prune,
+                                       'dataset_path': self.dataset_path, 'val_split': self.image_generator_split,
+                                       'seed': self.data_seed}
         else:
             QMessageBox.warning(self, "Erro de valor", "Seleção de nome dos logs cancelada pelo usuário.")
             return  # encerra a função sem travar
 
+        self.start_training(epochs, fileName, tensorboard_options=dialog.tensorboard_options,
+                            **dialog.training_options)
+
+    def resume_training(self):
+
+        if self.resnet is None or self.train_data is None or self.val_data is None:
+            QMessageBox.warning(self, "Erro", "Carregue o dataset e construa a rede com os mesmos parâmetros "
+                                              "da execução que será retomada")
+            return
+
+        log_path = self.model.open_directory()
+        if log_path is None:
+            QMessageBox.warning(self, "Erro de valor", "Seleção da execução cancelada pelo usuário.")
+            return  # encerra a função sem travar
+
+        try:
+            # A quantidade de épocas e as opções de logging/checkpoint são as da execução original
+            run_config = self.model.load_config(os.path.join(log_path, "run_config.json"))
+        except (OSError, ValueError):
+            QMessageBox.warning(self, "Erro", "O diretório selecionado não contém o run_config.json de uma execução")
+            return
+
+        if run_config.get('input_size') != self.image_generator_input_size:
+            self.add_log_message(f"Atenção: a execução original utilizou input size {run_config.get('input_size')}")
+
+        self.start_training(run_config['epochs'], run_config['log_name'], resume_from=log_path,
+                            tensorboard_options=run_config.get('tensorboard'),
+                            checkpoint_freq=run_config.get('checkpoint_freq', 1),
+                            early_stopping_patience=run_config.get('early_stopping_patience', 0),
+                            restore_best=run_config.get('restore_best', True),
+                            evaluate=run_config.get('evaluate', True),
+                            tta=run_config.get('tta', ()))
+
+    def start_training(self, epochs, fileName, **trainer_options):
+
+        # Importação tardia: o TensorFlow é carregado em segundo plano (ver load_backend)
+        from TrainerThread import TrainerThread
+
+        self.fileName_weights = fileName
+
         # cria a thread de treinamento
-        self.trainer_thread = TrainerThread(self.resnet, self.train_data, self.val_data, epochs, fileName)
+        run_config = dict(self.network_parameters,
+                          dataset=self.dataset_path,
+                          input_size=self.image_generator_input_size,
+                          batch_size=self.image_generator_batch_size,
+                          split=self.image_generator_split,
+                          seed=self.data_seed,
+                          augmentation=self.data_augmentation,
+                          pipeline=self.data_pipeline,
+                          cache=self.data_cache)
+        self.trainer_thread = TrainerThread(self.resnet, self.train_data, self.val_data, epochs, fileName,
+                                            feature_extractor=self.feature_extractor,
+                                            fine_tune_blocks=self.fine_tune_blocks,
+                                            fine_tune_epochs=self.fine_tune_epochs,
+                                            run_config=run_config,
+                                            **trainer_options)
         self.trainer_thread.log_signal.connect(self.add_log_message)  # conecta o log ao QTextEdit
         self.trainer_thread.training_finished.connect(self.save_weights)  # conecta flag
         self.trainer_thread.start()
 
     def save_weights(self, success: bool):
         if success:
+            # No modo de extração de características a thread substitui a cabeça pelo modelo completo
+            self.resnet = self.trainer_thread.neural_network
             self.add_log_message("Treinamento concluído. Salvando pesos:")
-            self.resnet.save(f"{self.fileName_weights}_weights.h5")
-            self.add_log_message(f"Pesos de treinamento salvos como {self.fileName_weights}_weights.h5")
+
+            from SaveThread import SaveThread
+
+            # O salvamento é feito em segundo plano, a interface continua respondendo durante a exportação
+            self.save_thread = SaveThread(self.resnet, self.fileName_weights, self.save_format,
+                                          self.model.class_indices(self.dataset_path), self.tflite_options)
+            self.save_thread.log_signal.connect(self.add_log_message)
+            self.save_thread.progress_signal.connect(self.save_progress.setValue)
+            self.save_thread.save_finished.connect(self.save_finished)
+            self.save_progress.setValue(0)
+            self.save_progress.setVisible(True)
+            self.btn_train.setEnabled(False)
+            self.btn_resume.setEnabled(False)
+            self.save_thread.start()
         else:
             QMessageBox.warning(self, "Erro de valor", "Treinamento não foi iniciado ou concluído")
             return  # encerra a função sem travar
 
+    def save_finished(self, success: bool):
+        self.save_progress.setVisible(False)
+        self.btn_train.setEnabled(True)
+        self.btn_resume.setEnabled(True)
+        if not success:
+            QMessageBox.warning(self, "Erro", "Não foi possível salvar o modelo, verifique o log")
+
+    def run_parallel(self):
+
+        # Cada job é treinado em um processo próprio, com uma fatia dos núcleos da CPU
+        workers, accepted = QInputDialog.getInt(self, "Treinamento Paralelo", "Quantidade de processos simultâneos:",
+                                                3, 1, 64)
+        if not accepted:
+            return
+
+        self.run_queue(workers)
+
+    def run_queue(self, parallel_workers=0):
+
+        if self.queue_thread is not None and self.queue_thread.isRunning():
+            QMessageBox.warning(self, "Erro", "Uma fila de experimentos já está em execução")
+            return
+
+        jobs_path = self.model.open_file("Selecione o arquivo de experimentos",
+                                         (("YAML / JSON", "*.yaml *.yml *.json"), ("Todos os arquivos", "*.*")))
+        if jobs_path is None:
+            QMessageBox.warning(self, "Erro de valor", "Seleção da fila de experimentos cancelada pelo usuário.")
+            return  # encerra a função sem travar
+
+        from ExperimentQueueThread import ExperimentQueueThread
+
+        # Os experimentos são executados em sequência, em uma única thread, ou em processos paralelos,
+        # salvando os pesos de cada um
+        self.queue_thread = ExperimentQueueThread(jobs_path, parallel_workers)
+        self.queue_thread.log_signal.connect(self.add_log_message)
+        self.queue_thread.queue_finished.connect(self.queue_finished)
+        self.queue_thread.start()
+        self.add_log_message(f'Fila de experimentos iniciada: {jobs_path}')
+
+    def queue_finished(self, success: bool):
+
+        if success:
+            self.add_log_message('Fila de experimentos concluída com sucesso!')
+        else:
+            QMessageBox.warning(self, "Erro", "Um ou mais experimentos da fila falharam, verifique o log")
+        self.add_log_message('--------------------------------------------------------')
+
+    def compare_runs(self):
+        # Comparação lida do índice de execuções (logs/runs.sqlite), sem iniciar o TensorBoard
+        dialog = RunComparison(self.open_tensorboard, self)
+        dialog.exec_()
+
     def open_logs(self):
 
         log_path = self.model.open_directory()
@@ -201,22 +452,64 @@ class Interface(QWidget):
             QMessageBox.warning(self, "Erro", "Caminho para o diretório não foi definido")
             return
 
+        self.open_tensorboard([log_path])
+
+    def open_tensorboard(self, log_dirs):
+        """
+        Inicia o TensorBoard para os diretórios escolhidos (ou reaproveita o servidor já aberto para os mesmos
+        diretórios) e abre o navegador assim que a porta começar a responder, sem bloquear a interface.
+        """
+        if len(log_dirs) == 1:
+            logdir_args = ["--logdir", log_dirs[0]]
+        else:
+            logdir_args = ["--logdir_spec", ",".join(f"{os.path.basename(d)}:{d}" for d in log_dirs)]
+
+        if self.tensorboard_process is not None and self.tensorboard_process.poll() is None:
+            if self.tensorboard_logdir == logdir_args:
+                webbrowser.open(f"http://localhost:{TENSORBOARD_PORT}")
+                return
+            self.tensorboard_process.terminate()
+            self.tensorboard_process.wait()
+
         try:
-            process = subprocess.Popen(
-                ["tensorboard", f"--logdir=\"{log_path}\"", "--port=6006"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+            # A saída é descartada: um PIPE não lido bloquearia o TensorBoard quando o buffer enchesse
+            self.tensorboard_process = subprocess.Popen(
+                ["tensorboard", *logdir_args, f"--port={TENSORBOARD_PORT}"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
             )
+        except OSError:
+            QMessageBox.information(self, 'Erro', 'Erro ao inicializar o tensorboard. Verifique a instalação')
+            return
+
+        self.tensorboard_logdir = logdir_args
+        self.tensorboard_deadline = time.perf_counter() + 60
+        self.tensorboard_timer.start(250)
+        self.add_log_message(f'Iniciando o Tensorboard para: {", ".join(log_dirs)}')
+
+    def poll_tensorboard(self):
+        if self.tensorboard_process.poll() is not None:
+            self.tensorboard_timer.stop()
+            self.add_log_message('O Tensorboard foi encerrado antes de iniciar o servidor')
+            return
 
-            time.sleep(3)  # dá tempo do servidor iniciar
-            webbrowser.open("http://localhost:6006")
-            self.add_log_message(f'Tensorboard inicializado no caminho: {self.log_path}')
-            self.add_log_message('--------------------------------------------------------')
+        try:
+            with socket.create_connection(("localhost", TENSORBOARD_PORT), timeout=0.1):
+                pass
+        except OSError:
+            if time.perf_counter() > self.tensorboard_deadline:
+                self.tensorboard_timer.stop()
+                self.add_log_message('Tempo limite excedido ao aguardar o Tensorboard')
+            return
 
-        except ValueError:
-            QMessageBox.information(self, 'Erro', 'Erro ao inicializar o tensorboard. Tente novamente')
+        self.tensorboard_timer.stop()
+        webbrowser.open(f"http://localhost:{TENSORBOARD_PORT}")
+        self.add_log_message(f'Tensorboard disponível em http://localhost:{TENSORBOARD_PORT}')
+        self.add_log_message('--------------------------------------------------------')
 
     def exit_program(self):
 
+        if self.tensorboard_process is not None and self.tensorboard_process.poll() is None:
+            self.tensorboard_process.terminate()
         self.close()  # Fecha a janela principal
         QApplication.quit()  # Finaliza o loop da aplicação corretamente
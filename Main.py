@@ -1,3 +1,6 @@
+import time
+START_TIME = time.perf_counter()  # referência para a medição do tempo de abertura da janela
+
 import sys
 from PyQt5.QtWidgets import QApplication
 from Interface import Interface
@@ -18,6 +21,10 @@ class Main:
     def run(self):
         self.interface.show()
         self.interface.resize(800, 600)
+        self.interface.add_log_message(f'Janela aberta em {time.perf_counter() - START_TIME:.2f} s')
+
+        # O TensorFlow é carregado em segundo plano, apenas depois que a janela já está visível
+        self.interface.load_backend()
         sys.exit(self.app.exec())
 
 if __name__ == "__main__":
@@ -1,8 +1,30 @@
+import hashlib
+import json
 import os
+import random
 import sys
-import tkinter as tk
-from tkinter import filedialog
-from tensorflow.keras.preprocessing.image import  ImageDataGenerator
+import tempfile
+import time
+from contextlib import contextmanager
+
+# obs: O TensorFlow é importado apenas dentro das funções que o utilizam, para que a interface possa
+# importar este módulo (resource_path, open_directory) sem esperar o carregamento do TensorFlow
+
+# Extensões de imagem que o tf.io.decode_image consegue decodificar
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Diretório onde os caches em disco do pipeline tf.data são armazenados
+CACHE_DIR = "cache/"
+
+# Manifest das pastas de datasets convertidos em shards TFRecord (ver ShardedDataset)
+SHARD_MANIFEST = "shards.json"
+
+# Tamanho máximo do buffer de embaralhamento do pipeline tf.data
+SHUFFLE_BUFFER = 2048
+
+# Semente padrão da divisão treino/validação (ver Model.list_dataset)
+SPLIT_SEED = 42
+
 
 class Model:
 
@@ -19,7 +41,12 @@ class Model:
                 * root = tk.Tk() - instância do tkinter
                 * root.withdraw() -  Oculta a janela principal (para exibir apenas o pop-up)
                 * filedialog.askdirectory(title="") - Abre a janela de seleção de pastas e retorna o caminho escolhido
+
+            obs: O tkinter é importado apenas aqui, para que o carregamento dos dados funcione sem interface gráfica
         """
+        import tkinter as tk
+        from tkinter import filedialog
+
         root = tk.Tk()
         root.withdraw()
 
@@ -31,7 +58,34 @@ class Model:
         return path
 
     @staticmethod
-    def load_data(dataset_path, img_size=(128, 128), batch_size=32, val_split=0.3):
+    def load_config(path):
+        # Arquivos de configuração (HeadlessTrainer, filas de experimentos): .yaml/.yml exigem o PyYAML,
+        # os demais são lidos como JSON
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(('.yaml', '.yml')):
+                import yaml
+                return yaml.safe_load(f) or {}
+            return json.load(f)
+
+    @staticmethod
+    def open_file(title="Selecione o arquivo desejado", filetypes=(("Todos os arquivos", "*.*"),)):
+        # Análogo ao open_directory, para a seleção de um arquivo
+        import tkinter as tk
+        from tkinter import filedialog
+
+        root = tk.Tk()
+        root.withdraw()
+
+        path = filedialog.askopenfilename(title=title, filetypes=filetypes)
+        # Se o usuário cancelar ou fechar a janela, path será ""
+        if not path:
+            return None
+
+        return path
+
+    @staticmethod
+    def load_data(dataset_path, img_size=(128, 128), batch_size=32, val_split=0.3, pipeline='generator', cache=None,
+                  seed=SPLIT_SEED, augmentation=None, shard=None):
         """
         O ImageDataGenerator é uma classe do Keras (tensorflow.keras.preprocessing.image) que facilita o
         pré-processamento de imagens para redes neurais. Ele permite carregar imagens de um diretório e aplicar
@@ -39,9 +93,45 @@ class Model:
 
         obs: A divisão entre treino e validação não é aleatória por padrão no ImageDataGenerator quando
         usamos o parâmetro validation_split. A separação é feita de forma ordenada, baseada na ordem
-        dos arquivos dentro das pastas.
+        dos arquivos dentro das pastas. Por isso, quando o pandas está disponível, as imagens são carregadas
+        pelo flow_from_dataframe a partir da divisão estratificada e aleatória do Model.list_dataset, a mesma
+        utilizada pelos demais pipelines. Sem o pandas, a divisão ordenada do flow_from_directory é mantida.
+
+        parametro pipeline: 'generator' utiliza o ImageDataGenerator, 'tfdata' utiliza o pipeline tf.data,
+                            'cached' utiliza o cache persistente em disco (DatasetCache) e 'streaming' lê os
+                            shards TFRecord (ShardedDataset)
+        parametro cache: apenas para o pipeline tf.data. None, 'memory' ou 'disk'
+        parametro seed: Semente da divisão treino/validação
+        parametro augmentation: Lista de transformações do aumento de dados (ver Augmentation), apenas para os
+                                pipelines 'tfdata', 'cached' e 'streaming'
+        parametro shard: (quantidade de partes, índice) - carrega apenas uma parte das imagens, antes da
+                         decodificação (treinamento distribuído, ver DistributedTrainer). Pipelines 'tfdata' e
+                         'streaming'
         """
 
+        if shard is not None and pipeline not in ('tfdata', 'streaming'):
+            raise ValueError("A divisão do dataset entre workers requer o pipeline 'tfdata' ou 'streaming'")
+
+        if pipeline == 'tfdata':
+            return Model.load_data_tfdata(dataset_path, img_size, batch_size, val_split, cache, seed, augmentation,
+                                          shard)
+        if pipeline == 'cached':
+            return Model.load_data_cached(dataset_path, img_size, batch_size, val_split, seed, augmentation)
+        if pipeline == 'streaming':
+            return Model.load_data_streaming(dataset_path, img_size, batch_size, val_split, seed, augmentation,
+                                             shard)
+        if augmentation:
+            raise ValueError("O aumento de dados requer o pipeline tf.data ou o cache persistente")
+
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            pandas = None
+        if pandas is not None:
+            return Model.load_data_dataframe(dataset_path, img_size, batch_size, val_split, seed)
+
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
         # Instância de uma objeto do ImageDataGenerator, definindo como parâmetros operações para o pré processamento
         datagen = ImageDataGenerator(
             rescale=1.0 / 255,  # Normalização do valor dos pixels das imagens (Faixa de 0 à 1)
@@ -79,7 +169,8 @@ class Model:
                                 f"pertencentes a {train_generator.num_classes} classes distintas para o treinamento")
         log_validation_samples = (f"Foram encontradas {val_generator.samples} imagens "
                                   f"pertencentes a {val_generator.num_classes} classes distintas para a validação")
-        log_indexes = f"Classes identificadas: {train_generator.class_indices}"
+        log_indexes = (f"Classes identificadas: {train_generator.class_indices}\n"
+                       f"pandas não encontrado: divisão treino/validação pela ordem dos arquivos")
 
         return  (train_generator,
                  val_generator,
@@ -88,6 +179,510 @@ class Model:
                  log_indexes,
                  train_generator.num_classes)
 
+    @staticmethod
+    def load_data_dataframe(dataset_path, img_size=(128, 128), batch_size=32, val_split=0.3, seed=SPLIT_SEED):
+        """
+        ImageDataGenerator alimentado pelo flow_from_dataframe, com a divisão do Model.list_dataset (ver load_data).
+        Retorna a mesma tupla que load_data.
+        """
+        import pandas as pd
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+        (train_files, train_labels), (val_files, val_labels), class_indices = (
+            Model.list_dataset(dataset_path, val_split, seed))
+        classes = sorted(class_indices, key=class_indices.get)
+
+        # Apenas a normalização, a divisão já foi feita pelo list_dataset
+        datagen = ImageDataGenerator(rescale=1.0 / 255)
+
+        generators = []
+        for files, labels, shuffle in ((train_files, train_labels, True), (val_files, val_labels, False)):
+            frame = pd.DataFrame({'filename': files, 'class': [classes[label] for label in labels]})
+            generators.append(datagen.flow_from_dataframe(
+                frame,
+                x_col='filename',
+                y_col='class',
+                classes=classes,  # Mantém os mesmos índices do flow_from_directory (ordem alfabética)
+                target_size=img_size,
+                batch_size=batch_size,
+                class_mode='categorical',
+                shuffle=shuffle,
+                seed=seed,
+                validate_filenames=False  # Os arquivos já foram listados (e filtrados) pelo list_dataset
+            ))
+        train_generator, val_generator = generators
+
+        log_training_samples = (f"Foram encontradas {train_generator.samples} imagens "
+                                f"pertencentes a {len(classes)} classes distintas para o treinamento")
+        log_validation_samples = (f"Foram encontradas {val_generator.samples} imagens "
+                                  f"pertencentes a {len(classes)} classes distintas para a validação")
+        log_indexes = f"Classes identificadas: {class_indices}"
+
+        return (train_generator,
+                val_generator,
+                log_training_samples,
+                log_validation_samples,
+                log_indexes,
+                len(classes))
+
+    @staticmethod
+    def class_indices(dataset_path):
+        # Mesmo mapeamento do flow_from_directory: subpastas em ordem alfabética → índice da classe
+        # (datasets convertidos em shards guardam o mapeamento no manifest)
+        manifest_path = os.path.join(dataset_path, SHARD_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)['class_indices']
+
+        classes = sorted(d for d in os.listdir(dataset_path) if os.path.isdir(os.path.join(dataset_path, d)))
+        return {name: index for index, name in enumerate(classes)}
+
+    @staticmethod
+    def class_indices_path(weights_path):
+        # O mapeamento das classes é salvo ao lado do arquivo de pesos (ex: ears_weights.h5 → ears_weights_classes.json)
+        return os.path.splitext(weights_path)[0] + "_classes.json"
+
+    @staticmethod
+    def save_class_indices(weights_path, class_indices):
+        with open(Model.class_indices_path(weights_path), "w", encoding="utf-8") as f:
+            json.dump(class_indices, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def load_class_indices(weights_path):
+        # Retorna None caso o modelo tenha sido salvo sem o arquivo de classes
+        path = Model.class_indices_path(weights_path)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def list_images(paths):
+        # Expande uma lista de arquivos e/ou pastas (percorridas recursivamente) em uma lista de imagens
+        images = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, file_names in sorted(os.walk(path), key=lambda entry: entry[0]):
+                    images += [os.path.join(root, f) for f in sorted(file_names)
+                               if f.lower().endswith(IMAGE_EXTENSIONS)]
+            else:
+                images.append(path)
+        return images
+
+    @staticmethod
+    def list_dataset(dataset_path, val_split=0.3, seed=SPLIT_SEED):
+        """
+        Divisão treino/validação estratificada e reproduzível, compartilhada por todos os pipelines e pelo
+        FeatureExtractor: em cada classe, os arquivos são embaralhados com a semente (seed) e a fração val_split
+        vai para a validação. A divisão é salva em cache/splits/ e reutilizada enquanto nenhuma pasta do dataset
+        for modificada, sem percorrer novamente a árvore de diretórios.
+
+        Retorna (train_files, train_labels), (val_files, val_labels), class_indices
+        """
+        if os.path.exists(os.path.join(dataset_path, SHARD_MANIFEST)):
+            raise ValueError("Datasets convertidos em shards TFRecord são lidos apenas pelo pipeline 'streaming'")
+
+        index_path = Model.split_index_path(dataset_path, val_split, seed)
+        index = Model.read_split_index(index_path)
+
+        if index is None:
+            class_indices, files, directories = Model.scan_dataset(dataset_path)
+
+            index = {'class_indices': class_indices, 'directories': directories,
+                     'train_files': [], 'train_labels': [], 'val_files': [], 'val_labels': []}
+            for name, class_files in files.items():
+                # Uma semente por classe: adicionar imagens a uma classe não altera a divisão das demais
+                random.Random(f"{seed}:{name}").shuffle(class_files)
+                split = int(round(val_split * len(class_files)))
+                index['val_files'] += sorted(class_files[:split])
+                index['val_labels'] += [class_indices[name]] * split
+                index['train_files'] += sorted(class_files[split:])
+                index['train_labels'] += [class_indices[name]] * (len(class_files) - split)
+
+            # Outros processos (ParallelScheduler, DistributedTrainer) podem gravar a mesma divisão ao mesmo
+            # tempo: o conteúdo é idêntico, e a última gravação completa prevalece
+            Model.write_json(index_path, index)
+
+        return ((index['train_files'], index['train_labels']),
+                (index['val_files'], index['val_labels']),
+                index['class_indices'])
+
+    @staticmethod
+    def dataset_sizes(dataset_path, val_split=0.3, seed=SPLIT_SEED):
+        # (imagens de treinamento, imagens de validação, classes), sem montar os pipelines
+        manifest_path = os.path.join(dataset_path, SHARD_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            train, val = (sum(shard['records'] for shard in manifest['shards'][subset])
+                          for subset in ('training', 'validation'))
+            return train, val, len(manifest['class_indices'])
+
+        (train_files, _), (val_files, _), class_indices = Model.list_dataset(dataset_path, val_split, seed)
+        return len(train_files), len(val_files), len(class_indices)
+
+    @staticmethod
+    def shard_files(files, labels, shard):
+        # Parte (count, index) de uma lista de arquivos: um a cada count, a partir de index
+        if shard is None:
+            return files, labels
+        count, index = shard
+        return files[index::count], labels[index::count]
+
+    @staticmethod
+    def scan_dataset(dataset_path):
+        """
+        Percorre a árvore do dataset uma única vez.
+        Retorna class_indices, {classe: [arquivos]} e {diretório: mtime} (utilizado para invalidar a divisão salva)
+        """
+        class_indices = Model.class_indices(dataset_path)
+        files = {}
+        directories = {dataset_path: os.stat(dataset_path).st_mtime_ns}
+
+        for name in sorted(class_indices, key=class_indices.get):
+            files[name] = []
+            for root, _, file_names in sorted(os.walk(os.path.join(dataset_path, name)), key=lambda entry: entry[0]):
+                directories[root] = os.stat(root).st_mtime_ns
+                files[name] += [os.path.join(root, f) for f in sorted(file_names)
+                                if f.lower().endswith(IMAGE_EXTENSIONS)]
+
+        return class_indices, files, directories
+
+    @staticmethod
+    def split_index_path(dataset_path, val_split, seed):
+        # Um arquivo por combinação de dataset, divisão e semente
+        key = f"{os.path.abspath(dataset_path)}|{val_split}|{seed}"
+        split_dir = os.path.join(CACHE_DIR, "splits")
+        os.makedirs(split_dir, exist_ok=True)
+        return os.path.join(split_dir, hashlib.sha1(key.encode()).hexdigest()[:16] + ".json")
+
+    @staticmethod
+    def write_json(path, data, indent=None):
+        """
+        Escrita atômica de um arquivo JSON: o conteúdo é gravado em um arquivo temporário exclusivo, na mesma
+        pasta, e renomeado sobre o destino. Um programa interrompido não deixa um arquivo corrompido, e processos
+        gravando o mesmo arquivo simultaneamente não compartilham o arquivo temporário.
+        """
+        directory = os.path.dirname(path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    @contextmanager
+    def file_lock(path, timeout=600.0, stale=120.0):
+        """
+        Trava entre processos baseada na criação exclusiva de path (funciona em qualquer sistema operacional).
+        Deve proteger apenas operações curtas (ex: ler, mesclar e gravar um índice): uma trava mais antiga que
+        stale segundos é considerada abandonada por um processo interrompido e removida.
+        """
+        start = time.monotonic()
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > stale:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() - start > timeout:
+                    raise TimeoutError(f"Tempo esgotado aguardando a trava {path}")
+                time.sleep(0.05)
+
+        try:
+            os.close(fd)
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def read_split_index(index_path):
+        # Retorna None caso a divisão ainda não exista ou alguma pasta tenha sido modificada (arquivos
+        # adicionados, removidos ou renomeados alteram o mtime da pasta que os contém)
+        if not os.path.exists(index_path):
+            return None
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+        for directory, mtime in index['directories'].items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return None
+            except OSError:
+                return None
+
+        return index
+
+    @staticmethod
+    def decode_image(path, img_size):
+        """
+        Lê e decodifica uma imagem, redimensionando-a para img_size.
+        A interpolação 'nearest' é a mesma utilizada por padrão no flow_from_directory.
+        O resultado é mantido em uint8 para ocupar 4x menos memória no cache.
+        """
+        import tensorflow as tf
+
+        return Model.decode_image_bytes(tf.io.read_file(path), img_size)
+
+    @staticmethod
+    def decode_image_bytes(contents, img_size):
+        # Análogo ao decode_image, a partir do conteúdo do arquivo (ex: imagens recebidas pelo PredictionServer)
+        import tensorflow as tf
+
+        image = tf.io.decode_image(contents, channels=3, expand_animations=False)
+        image = tf.image.resize(image, img_size, method='nearest')
+        return tf.cast(image, tf.uint8)
+
+    @staticmethod
+    def rescale(images, labels):
+        import tensorflow as tf
+
+        # Normalização do valor dos pixels das imagens (Faixa de 0 à 1), aplicada por lote
+        return tf.cast(images, tf.float32) / 255.0, labels
+
+    @staticmethod
+    def build_dataset(files, labels, num_classes, img_size, batch_size, shuffle, cache_file=None, augmentation=None):
+        """
+        Monta o pipeline tf.data para uma lista de arquivos:
+            * map(num_parallel_calls=AUTOTUNE) → leitura, decodificação e redimensionamento em paralelo
+            * cache() → as imagens decodificadas são guardadas (memória se cache_file == '', arquivo caso contrário)
+              de modo que a decodificação acontece apenas na primeira época
+            * shuffle() → embaralha as imagens a cada época (como o flow_from_directory faz no treinamento)
+            * batch() + rescale → a normalização é feita de forma vetorizada, por lote
+            * augmentation → aumento de dados opcional (Augmentation), também por lote e após o cache
+            * prefetch(AUTOTUNE) → prepara os próximos lotes enquanto a rede treina o lote atual
+        """
+        import tensorflow as tf
+
+        dataset = tf.data.Dataset.from_tensor_slices((files, labels))
+        dataset = dataset.map(
+            lambda path, label: (Model.decode_image(path, img_size), tf.one_hot(label, num_classes)),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+
+        if cache_file is not None:
+            dataset = dataset.cache(cache_file)
+
+        if shuffle:
+            dataset = dataset.shuffle(min(len(files), SHUFFLE_BUFFER), reshuffle_each_iteration=True)
+
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.map(Model.rescale, num_parallel_calls=tf.data.AUTOTUNE)
+        if augmentation is not None:
+            dataset = augmentation.apply(dataset)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    @staticmethod
+    def build_augmentation(augmentation, img_size, batch_size):
+        # Retorna (Augmentation ou None, mensagem de log com o custo medido por lote)
+        if not augmentation:
+            return None, ""
+
+        from Augmentation import Augmentation
+
+        augmentation = Augmentation(augmentation)
+        return augmentation, "\n" + augmentation.report(img_size, batch_size)
+
+    @staticmethod
+    def tfdata_cache_file(dataset_path, img_size, val_split, subset, seed=SPLIT_SEED, files=()):
+        """
+        Arquivo de cache do tf.data de cada combinação de dataset, tamanho de entrada, divisão e subconjunto.
+        O nome inclui uma impressão digital dos arquivos do subconjunto (caminhos e mtimes): imagens
+        adicionadas, removidas ou modificadas geram um novo cache, e os caches anteriores da mesma combinação
+        são removidos. Um cache incompleto (primeira época interrompida, com o .lockfile do tf.data) é
+        descartado para ser gravado novamente.
+        """
+        key = f"{os.path.abspath(dataset_path)}|{img_size[0]}x{img_size[1]}|{val_split}|{seed}|{subset}"
+        prefix = hashlib.sha1(key.encode()).hexdigest()
+
+        fingerprint = hashlib.sha1()
+        for path in files:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = 0
+            fingerprint.update(f"{path}|{mtime}\n".encode())
+        name = f"{prefix}_{fingerprint.hexdigest()[:16]}"
+
+        cache_dir = os.path.join(CACHE_DIR, "tfdata")
+        os.makedirs(cache_dir, exist_ok=True)
+        complete = os.path.exists(os.path.join(cache_dir, name + ".index"))
+
+        for entry in os.listdir(cache_dir):
+            if not entry.startswith(prefix):
+                continue
+            current = entry.startswith(name + ".") or entry.startswith(name + "_")
+            # Caches de versões anteriores do dataset, ou restos (lockfile e shards parciais) de um cache incompleto
+            if not current or not complete:
+                try:
+                    os.remove(os.path.join(cache_dir, entry))
+                except OSError:
+                    pass
+
+        return os.path.join(cache_dir, name)
+
+    @staticmethod
+    def load_data_tfdata(dataset_path, img_size=(128, 128), batch_size=32, val_split=0.3, cache=None,
+                         seed=SPLIT_SEED, augmentation=None, shard=None):
+        """
+        Alternativa ao ImageDataGenerator utilizando tf.data. As imagens são decodificadas em paralelo e,
+        caso cache seja 'memory' ou 'disk', decodificadas apenas uma vez ao longo de todo o treinamento.
+        Retorna a mesma tupla que load_data, de modo que a interface e o TrainerThread não precisam ser alterados.
+        """
+        (train_files, train_labels), (val_files, val_labels), class_indices = (
+            Model.list_dataset(dataset_path, val_split, seed))
+        num_classes = len(class_indices)
+
+        train_files, train_labels = Model.shard_files(train_files, train_labels, shard)
+        val_files, val_labels = Model.shard_files(val_files, val_labels, shard)
+
+        train_cache, val_cache = None, None
+        if cache == 'memory':
+            train_cache, val_cache = '', ''
+        elif cache == 'disk':
+            # Cada parte do dataset (treinamento distribuído) possui seu próprio arquivo de cache
+            suffix = f"_{shard[1]}of{shard[0]}" if shard is not None else ""
+            train_cache = Model.tfdata_cache_file(dataset_path, img_size, val_split, 'training' + suffix, seed,
+                                                  train_files)
+            val_cache = Model.tfdata_cache_file(dataset_path, img_size, val_split, 'validation' + suffix, seed,
+                                                val_files)
+
+        augmentation, log_augmentation = Model.build_augmentation(augmentation, img_size, batch_size)
+
+        train_dataset = Model.build_dataset(train_files, train_labels, num_classes, img_size, batch_size,
+                                            shuffle=True, cache_file=train_cache, augmentation=augmentation)
+        val_dataset = Model.build_dataset(val_files, val_labels, num_classes, img_size, batch_size,
+                                          shuffle=False, cache_file=val_cache)
+
+        log_training_samples = (f"Foram encontradas {len(train_files)} imagens "
+                                f"pertencentes a {num_classes} classes distintas para o treinamento")
+        log_validation_samples = (f"Foram encontradas {len(val_files)} imagens "
+                                  f"pertencentes a {num_classes} classes distintas para a validação")
+        log_indexes = f"Classes identificadas: {class_indices}{log_augmentation}"
+
+        return (train_dataset,
+                val_dataset,
+                log_training_samples,
+                log_validation_samples,
+                log_indexes,
+                num_classes)
+
+    @staticmethod
+    def load_data_cached(dataset_path, img_size=(128, 128), batch_size=32, val_split=0.3, seed=SPLIT_SEED,
+                         augmentation=None):
+        """
+        Carregamento a partir do cache persistente (DatasetCache). Na primeira execução as imagens são
+        decodificadas e gravadas em disco, nas seguintes apenas os arquivos novos ou modificados são
+        decodificados e o restante é lido diretamente dos arquivos .npy mapeados em memória.
+        Retorna a mesma tupla que load_data.
+        """
+        from DatasetCache import DatasetCache
+
+        (train_files, train_labels), (val_files, val_labels), class_indices = (
+            Model.list_dataset(dataset_path, val_split, seed))
+        num_classes = len(class_indices)
+
+        cache = DatasetCache(dataset_path, img_size)
+        log_cache = cache.update(train_files + val_files)
+
+        augmentation, log_augmentation = Model.build_augmentation(augmentation, img_size, batch_size)
+
+        train_dataset = cache.build_dataset(train_files, train_labels, num_classes, batch_size, shuffle=True,
+                                            augmentation=augmentation)
+        val_dataset = cache.build_dataset(val_files, val_labels, num_classes, batch_size, shuffle=False)
+
+        log_training_samples = (f"Foram encontradas {len(train_files)} imagens "
+                                f"pertencentes a {num_classes} classes distintas para o treinamento")
+        log_validation_samples = (f"Foram encontradas {len(val_files)} imagens "
+                                  f"pertencentes a {num_classes} classes distintas para a validação")
+        log_indexes = f"Classes identificadas: {class_indices}\n{log_cache}{log_augmentation}"
+
+        return (train_dataset,
+                val_dataset,
+                log_training_samples,
+                log_validation_samples,
+                log_indexes,
+                num_classes)
+
+    @staticmethod
+    def load_data_streaming(dataset_path, img_size=(128, 128), batch_size=32, val_split=0.3, seed=SPLIT_SEED,
+                            augmentation=None, shard=None):
+        """
+        Leitura em streaming de shards TFRecord (ShardedDataset), com memória limitada independentemente do
+        tamanho do dataset. dataset_path pode ser uma pasta convertida pelo ShardedDataset (a divisão da conversão
+        é mantida) ou a pasta original com subpastas por classe, convertida automaticamente em cache/shards/
+        na primeira execução e novamente sempre que o dataset for modificado.
+        Retorna a mesma tupla que load_data.
+        """
+        from ShardedDataset import ShardedDataset
+
+        log_shards = ""
+        if os.path.exists(os.path.join(dataset_path, SHARD_MANIFEST)):
+            shards = ShardedDataset(dataset_path)
+            if (shards.manifest['val_split'], shards.manifest['seed']) != (val_split, seed):
+                log_shards = (f"\nDivisão definida na conversão dos shards: split {shards.manifest['val_split']}, "
+                              f"semente {shards.manifest['seed']}")
+        elif shard is not None:
+            # Os workers não podem converter o dataset ao mesmo tempo no mesmo diretório de cache
+            raise ValueError("No treinamento distribuído o dataset deve ser convertido antes em shards TFRecord "
+                             "(python -m ShardedDataset convert)")
+        else:
+            shard_dir = ShardedDataset.cache_dir(dataset_path, val_split, seed)
+            try:
+                shards = ShardedDataset(shard_dir)
+            except ValueError:
+                shards = None
+            if shards is None or not shards.is_current():
+                shards = ShardedDataset.convert(dataset_path, shard_dir, val_split, seed, log=lambda message: None)
+                log_shards = f"\nDataset convertido em shards TFRecord ({shard_dir})"
+
+        num_classes = len(shards.class_indices)
+        augmentation, log_augmentation = Model.build_augmentation(augmentation, img_size, batch_size)
+
+        train_dataset = shards.build_dataset('training', img_size, batch_size, shuffle=True,
+                                             augmentation=augmentation, shard=shard)
+        val_dataset = shards.build_dataset('validation', img_size, batch_size, shuffle=False, shard=shard)
+
+        log_training_samples = (f"Foram encontradas {shards.records('training')} imagens em "
+                                f"{len(shards.manifest['shards']['training'])} shards "
+                                f"pertencentes a {num_classes} classes distintas para o treinamento")
+        log_validation_samples = (f"Foram encontradas {shards.records('validation')} imagens em "
+                                  f"{len(shards.manifest['shards']['validation'])} shards "
+                                  f"pertencentes a {num_classes} classes distintas para a validação")
+        log_indexes = f"Classes identificadas: {shards.class_indices}{log_shards}{log_augmentation}"
+
+        return (train_dataset,
+                val_dataset,
+                log_training_samples,
+                log_validation_samples,
+                log_indexes,
+                num_classes)
+
+    @staticmethod
+    def last_run_number(log_dir):
+        # Maior número de execução já utilizado ({nome}_run_{n} ou, nos logs antigos, run_{n}_{nome}). Contar os
+        # diretórios repetiria números após a remoção de alguma execução
+        last = 0
+        for name in os.listdir(log_dir):
+            parts = name.split('_')
+            for position, part in enumerate(parts[:-1]):
+                if part == 'run' and parts[position + 1].isdigit():
+                    last = max(last, int(parts[position + 1]))
+        return last
+
     @staticmethod
     def log_directory_manager(logName):
         # Criar o diretório "logs/fit/" caso não exista
@@ -95,7 +690,14 @@ class Model:
         os.makedirs(log_dir, exist_ok=True)  # Garante que o diretório existe
 
         # Criar um subdiretório único para cada execução
-        run_id = logName + '_run_' + str(len(os.listdir(log_dir)) + 1)
-        full_log_path = os.path.join(log_dir, run_id)
-
-        return full_log_path
\ No newline at end of file
+        # obs: O diretório é criado aqui (sem exist_ok), de modo que execuções simultâneas em processos
+        # diferentes (ver ParallelScheduler) nunca recebam o mesmo caminho
+        run_number = Model.last_run_number(log_dir) + 1
+        while True:
+            run_id = logName + '_run_' + str(run_number)
+            full_log_path = os.path.join(log_dir, run_id)
+            try:
+                os.makedirs(full_log_path)
+                return full_log_path
+            except FileExistsError:
+                run_number += 1
\ No newline at end of file
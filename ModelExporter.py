@@ -0,0 +1,134 @@
+import json
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from CNNModel import GeMPooling2D
+
+'''
+Exportação do modelo treinado em diferentes formatos, a partir do nome da execução (ex: ears → ears_weights.h5):
+    * h5         - Modelo completo no formato HDF5 (padrão, compatível com as versões anteriores)
+    * weights    - Apenas os pesos (HDF5) + arquitetura em JSON, sem o estado do otimizador
+    * float16    - Pesos convertidos para float16 (.npz, metade do tamanho) + arquitetura em JSON
+    * savedmodel - SavedModel do TensorFlow (diretório), utilizado pelo TF Serving / TFLite
+    * keras      - Formato .keras (arquivo zip do Keras v3), requer TensorFlow 2.12 ou superior
+'''
+
+# Formatos de exportação suportados (ver ModelExporter.export)
+EXPORT_FORMATS = ('h5', 'weights', 'float16', 'savedmodel', 'keras')
+
+# Primeira versão do TensorFlow que grava o formato .keras (save_format='keras_v3'). Nas anteriores, model.save
+# de um arquivo .keras grava silenciosamente um HDF5
+KERAS_V3_MIN_VERSION = (2, 12)
+
+# Camadas customizadas que podem estar presentes nos modelos salvos
+CUSTOM_OBJECTS = {'GeMPooling2D': GeMPooling2D}
+
+
+class ModelExporter:
+
+    @staticmethod
+    def export_path(name, save_format='h5'):
+        # Caminho do artefato principal de cada formato; o mapeamento das classes é salvo ao lado dele
+        return {
+            'h5': f"{name}_weights.h5",
+            'weights': f"{name}_weights_only.h5",
+            'float16': f"{name}_weights_fp16.npz",
+            'savedmodel': f"{name}_savedmodel",
+            'keras': f"{name}.keras",
+        }[save_format]
+
+    @staticmethod
+    def keras_v3_supported():
+        version = tuple(int(part) for part in tf.__version__.split(".")[:2] if part.isdigit())
+        return version >= KERAS_V3_MIN_VERSION
+
+    @staticmethod
+    def architecture_path(path):
+        return os.path.splitext(path)[0] + "_architecture.json"
+
+    @staticmethod
+    def export(model, name, save_format='h5', progress=None):
+        """
+        Salva o modelo no formato escolhido e retorna o caminho do artefato principal.
+        parametro model: Modelo do Keras treinado
+        parametro name: Nome da execução, utilizado como prefixo dos arquivos
+        parametro save_format: Um dos EXPORT_FORMATS
+        parametro progress: Função chamada com (porcentagem, mensagem) a cada etapa da exportação
+        """
+        if save_format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {save_format}")
+        if save_format == 'keras' and not ModelExporter.keras_v3_supported():
+            raise ValueError(f"O formato .keras requer TensorFlow "
+                             f"{'.'.join(map(str, KERAS_V3_MIN_VERSION))} ou superior (versão instalada: "
+                             f"{tf.__version__}). Utilize 'h5' ou 'savedmodel'")
+
+        # Modelos com acumulação de gradientes são salvos sem o envoltório (GradientAccumulationModel)
+        model = getattr(model, 'inner_model', model)
+        progress = progress or (lambda percent, message: None)
+        path = ModelExporter.export_path(name, save_format)
+        start = time.perf_counter()
+
+        if save_format in ('weights', 'float16'):
+            # A arquitetura é salva separadamente, para que o modelo possa ser reconstruído sem o código de treino
+            progress(5, "Salvando a arquitetura da rede...")
+            with open(ModelExporter.architecture_path(path), "w", encoding="utf-8") as f:
+                f.write(model.to_json())
+
+        if save_format == 'h5':
+            progress(10, "Salvando o modelo completo (HDF5)...")
+            model.save(path)
+        elif save_format == 'weights':
+            progress(10, "Salvando os pesos (HDF5)...")
+            model.save_weights(path)
+        elif save_format == 'float16':
+            ModelExporter.save_float16(model, path, progress)
+        elif save_format == 'savedmodel':
+            progress(10, "Salvando o SavedModel...")
+            model.save(path, save_format='tf')
+        else:
+            progress(10, "Salvando o modelo no formato .keras...")
+            model.save(path, save_format='keras_v3')
+
+        progress(100, f"Modelo exportado em {time.perf_counter() - start:.1f} s "
+                      f"({ModelExporter.size_mb(path):.1f} MB): {path}")
+        return path
+
+    @staticmethod
+    def save_float16(model, path, progress):
+        # Os pesos são gravados na ordem de model.get_weights(), convertidos camada a camada
+        weights = model.get_weights()
+        arrays = {}
+        for position, array in enumerate(weights):
+            arrays[f"w{position:04d}"] = array.astype(np.float16)
+            if position % 20 == 0:
+                progress(10 + int(80 * position / max(len(weights), 1)), "Convertendo os pesos para float16...")
+
+        progress(90, "Gravando os pesos float16...")
+        np.savez(path, **arrays)
+
+    @staticmethod
+    def load(path, compile=False):
+        """
+        Carrega um modelo salvo em qualquer um dos EXPORT_FORMATS. Os pesos float16 são convertidos de volta
+        para float32 ao serem atribuídos ao modelo.
+        """
+        if path.endswith('.npz') or path.endswith('_weights_only.h5'):
+            with open(ModelExporter.architecture_path(path), "r", encoding="utf-8") as f:
+                model = tf.keras.models.model_from_json(f.read(), custom_objects=CUSTOM_OBJECTS)
+
+            if path.endswith('.npz'):
+                with np.load(path) as arrays:
+                    model.set_weights([arrays[key].astype(np.float32) for key in sorted(arrays.files)])
+            else:
+                model.load_weights(path)
+            return model
+
+        return tf.keras.models.load_model(path, custom_objects=CUSTOM_OBJECTS, compile=compile)
+
+    @staticmethod
+    def size_mb(path):
+        if os.path.isdir(path):
+            return sum(os.path.getsize(os.path.join(root, file))
+                       for root, _, files in os.walk(path) for file in files) / 2 ** 20
+        return os.path.getsize(path) / 2 ** 20
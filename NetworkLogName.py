@@ -1,4 +1,31 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QComboBox, QCheckBox
+)
+
+# Formatos de exportação do modelo ao final do treinamento (ver ModelExporter)
+SAVE_FORMAT_OPTIONS = {
+    "Modelo completo (.h5)": 'h5',
+    "Apenas os pesos (.h5 + arquitetura)": 'weights',
+    "Pesos float16 (.npz + arquitetura)": 'float16',
+    "SavedModel (TensorFlow)": 'savedmodel',
+    "Keras v3 (.keras)": 'keras',
+}
+
+# Exportação TFLite quantizada após o salvamento (ver QuantizedExporter)
+TFLITE_OPTIONS = {
+    "Não exportar": None,
+    "Quantização dinâmica (pesos int8)": 'dynamic',
+    "Quantização inteira (int8, calibrada)": 'int8',
+    "Pesos float16": 'float16',
+}
+
+# Avaliação do modelo final sobre a validação (ver Evaluator): texto exibido → (evaluate, tta)
+EVALUATION_OPTIONS = {
+    "Avaliar sem TTA": (True, ()),
+    "Avaliar com TTA (espelhamento)": (True, ('flip',)),
+    "Avaliar com TTA (espelhamento + recorte)": (True, ('flip', 'crop')),
+    "Não avaliar": (False, ()),
+}
 
 
 class NetworkLogName(QDialog):
@@ -11,6 +38,11 @@ class NetworkLogName(QDialog):
 
         self.log_name = None
         self.epochs = None
+        self.tensorboard_options = None
+        self.training_options = None
+        self.save_format = None
+        self.tflite_quantization = None
+        self.prune = None
 
         # Layout principal, organizando verticalmente os widgets na janela
         layout = QVBoxLayout()
@@ -32,6 +64,88 @@ class NetworkLogName(QDialog):
         h_layout.addWidget(self.epochs_edit)  # Adição do widget QLineEdit ao layout horizontal
         layout.addLayout(h_layout)  # Adição do layout horizonatal deste bloco ao layout vertical principal
 
+        # Frequência (em épocas) do registro de histogramas dos pesos, 0 desativa (parte mais cara do logging)
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Frequência dos histogramas (épocas, 0 = desativado):"))
+        self.histogram_freq_edit = QLineEdit("1")
+        h_layout.addWidget(self.histogram_freq_edit)
+        layout.addLayout(h_layout)
+
+        # Frequência de registro das métricas: ao final de cada época ou a cada lote
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Registro das métricas:"))
+        self.update_freq_combo = QComboBox()
+        self.update_freq_combo.addItems(['epoch', 'batch'])
+        h_layout.addWidget(self.update_freq_combo)
+        layout.addLayout(h_layout)
+
+        # Lotes analisados pelo profiler do TensorBoard (ex: 10,20), 0 desativa
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Profiler (lotes, ex: 10,20 - 0 = desativado):"))
+        self.profile_batch_edit = QLineEdit("0")
+        h_layout.addWidget(self.profile_batch_edit)
+        layout.addLayout(h_layout)
+
+        # Registro do grafo da rede e das imagens dos pesos
+        self.write_graph_check = QCheckBox("Registrar o grafo da rede")
+        self.write_graph_check.setChecked(True)
+        layout.addWidget(self.write_graph_check)
+        self.write_images_check = QCheckBox("Registrar os pesos como imagens")
+        layout.addWidget(self.write_images_check)
+
+        # Intervalo (em épocas) entre os checkpoints, utilizados para retomar uma execução interrompida
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Checkpoint a cada (épocas, 0 = desativado):"))
+        self.checkpoint_freq_edit = QLineEdit("1")
+        h_layout.addWidget(self.checkpoint_freq_edit)
+        layout.addLayout(h_layout)
+
+        # Early stopping: épocas sem melhora da val_accuracy antes de interromper o treinamento
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Paciência do early stopping (épocas, 0 = desativado):"))
+        self.patience_edit = QLineEdit("0")
+        h_layout.addWidget(self.patience_edit)
+        layout.addLayout(h_layout)
+
+        # Restaurar, ao final, os pesos da época com a melhor val_accuracy
+        self.restore_best_check = QCheckBox("Manter os pesos da melhor época (val_accuracy)")
+        self.restore_best_check.setChecked(True)
+        layout.addWidget(self.restore_best_check)
+
+        # Matriz de confusão, métricas por classe e calibração ao final do treinamento
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Avaliação final (validação):"))
+        self.evaluation_combo = QComboBox()
+        self.evaluation_combo.addItems(EVALUATION_OPTIONS.keys())
+        h_layout.addWidget(self.evaluation_combo)
+        layout.addLayout(h_layout)
+
+        # Formato em que o modelo é salvo ao final do treinamento
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Formato de exportação do modelo:"))
+        # O formato .keras só é oferecido quando a versão do TensorFlow consegue gravá-lo (ver ModelExporter);
+        # caso contrário a exportação falharia apenas ao final do treinamento
+        from ModelExporter import ModelExporter
+        self.save_format_combo = QComboBox()
+        self.save_format_combo.addItems([text for text, save_format in SAVE_FORMAT_OPTIONS.items()
+                                         if save_format != 'keras' or ModelExporter.keras_v3_supported()])
+        h_layout.addWidget(self.save_format_combo)
+        layout.addLayout(h_layout)
+
+        # Exportação TFLite para inferência em CPU, com poda opcional da cabeça
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Exportação TFLite:"))
+        self.tflite_combo = QComboBox()
+        self.tflite_combo.addItems(TFLITE_OPTIONS.keys())
+        h_layout.addWidget(self.tflite_combo)
+        layout.addLayout(h_layout)
+
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Poda da cabeça no TFLite (fração, 0 = desativada):"))
+        self.prune_edit = QLineEdit("0")
+        h_layout.addWidget(self.prune_edit)
+        layout.addLayout(h_layout)
+
         # Botões OK e Cancel (Análogo à organização do bloco de código anterior)
         button_layout = QHBoxLayout()
         ok_button = QPushButton("OK")
@@ -51,6 +165,30 @@ class NetworkLogName(QDialog):
             self.log_name = str(self.name_edit.text())
             self.epochs = int(self.epochs_edit.text())
 
+            profile_batch = self.profile_batch_edit.text().strip()
+            self.tensorboard_options = {
+                'histogram_freq': int(self.histogram_freq_edit.text()),
+                'update_freq': self.update_freq_combo.currentText(),
+                'profile_batch': int(profile_batch) if profile_batch.isdigit() else profile_batch,
+                'write_graph': self.write_graph_check.isChecked(),
+                'write_images': self.write_images_check.isChecked(),
+            }
+            evaluate, tta = EVALUATION_OPTIONS[self.evaluation_combo.currentText()]
+            self.training_options = {
+                'checkpoint_freq': int(self.checkpoint_freq_edit.text()),
+                'early_stopping_patience': int(self.patience_edit.text()),
+                'restore_best': self.restore_best_check.isChecked(),
+                'evaluate': evaluate,
+                'tta': tta,
+            }
+            self.save_format = SAVE_FORMAT_OPTIONS[self.save_format_combo.currentText()]
+            self.tflite_quantization = TFLITE_OPTIONS[self.tflite_combo.currentText()]
+            self.prune = float(self.prune_edit.text())
+
+            if not (0 <= self.prune < 1):
+                QMessageBox.warning(self, "Erro", "A fração de poda deve estar entre 0 e 1")
+                return
+
             # valida se o valor das épocas é inteiro positivo
             if not self.epochs > 0:
                 QMessageBox.warning(self, "Erro", "O valor da quantidade de épocas deve ser positivo e inteiro")
@@ -0,0 +1,136 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QComboBox, QCheckBox
+)
+
+# Tipos de cabeça: texto exibido → head_type utilizado pelo CNNModel
+HEAD_OPTIONS = {
+    "Flatten": 'flatten',
+    "Global Average Pooling": 'gap',
+    "Global Max Pooling": 'gmp',
+    "GeM (Generalized Mean Pooling)": 'gem',
+}
+
+# Precisão dos cálculos: texto exibido → política do Keras utilizada pelo CNNModel
+PRECISION_OPTIONS = {
+    "float32 (padrão)": 'float32',
+    "Precisão mista bfloat16 (CPUs com suporte a bf16)": 'mixed_bfloat16',
+    "Precisão mista float16 (GPU)": 'mixed_float16',
+}
+
+# Modos de treinamento: texto exibido → valor utilizado pela interface
+TRAINING_MODES = {
+    "Rede completa (ResNet50 + cabeça)": 'full',
+    "Extração de características (ResNet50 congelada)": 'features',
+}
+
+
+class NetworkParameters(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Cria uma nova janela para definição dos parâmetros de construção e treinamento da rede
+        self.setWindowTitle("Configurar Parâmetros da Rede")
+
+        self.head_type = None
+        self.training_mode = None
+        self.precision = None
+        self.jit_compile = None
+        self.fine_tune_blocks = None
+        self.fine_tune_epochs = None
+        self.accumulation_steps = None
+        self.probe_batch_size = None
+
+        # Layout principal, organizando verticalmente os widgets na janela
+        layout = QVBoxLayout()
+
+        # Camada entre a ResNet50 e as camadas densas (define a quantidade de parâmetros da cabeça)
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Cabeça da rede:"))
+        self.head_combo = QComboBox()
+        self.head_combo.addItems(HEAD_OPTIONS.keys())
+        h_layout.addWidget(self.head_combo)
+        layout.addLayout(h_layout)
+
+        # Modo de treinamento: rede completa ou apenas a cabeça sobre características pré-calculadas
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Modo de treinamento:"))
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(TRAINING_MODES.keys())
+        h_layout.addWidget(self.mode_combo)
+        layout.addLayout(h_layout)
+
+        # Quantidade de blocos residuais descongelados no fine-tuning (apenas no modo de extração)
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Blocos para fine-tuning (0 = desativado):"))
+        self.fine_tune_blocks_edit = QLineEdit("0")
+        h_layout.addWidget(self.fine_tune_blocks_edit)
+        layout.addLayout(h_layout)
+
+        # Quantidade de épocas da etapa de fine-tuning
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Épocas de fine-tuning:"))
+        self.fine_tune_epochs_edit = QLineEdit("0")
+        h_layout.addWidget(self.fine_tune_epochs_edit)
+        layout.addLayout(h_layout)
+
+        # Precisão dos cálculos (float32 ou precisão mista)
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Precisão:"))
+        self.precision_combo = QComboBox()
+        self.precision_combo.addItems(PRECISION_OPTIONS.keys())
+        h_layout.addWidget(self.precision_combo)
+        layout.addLayout(h_layout)
+
+        # Compilação XLA dos passos de treinamento
+        self.jit_compile_check = QCheckBox("Compilar com XLA (jit_compile)")
+        layout.addWidget(self.jit_compile_check)
+
+        # Acumulação de gradientes: lote efetivo = batch size * passos, com a memória de apenas um lote (rede completa)
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Passos de acumulação de gradientes (1 = desativado):"))
+        self.accumulation_steps_edit = QLineEdit("1")
+        h_layout.addWidget(self.accumulation_steps_edit)
+        layout.addLayout(h_layout)
+
+        # Verifica, antes do treinamento, se o batch size escolhido cabe na memória
+        self.probe_batch_check = QCheckBox("Verificar se o batch size cabe na memória")
+        layout.addWidget(self.probe_batch_check)
+
+        # Botões OK e Cancel
+        button_layout = QHBoxLayout()
+        ok_button = QPushButton("OK")
+        cancel_button = QPushButton("Cancelar")
+        button_layout.addWidget(ok_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+        # Conectar os botões à funcionalidades do sistema
+        ok_button.clicked.connect(self.accept_data)
+        cancel_button.clicked.connect(self.reject)
+
+    def accept_data(self):
+        try:
+            self.head_type = HEAD_OPTIONS[self.head_combo.currentText()]
+            self.training_mode = TRAINING_MODES[self.mode_combo.currentText()]
+            self.precision = PRECISION_OPTIONS[self.precision_combo.currentText()]
+            self.jit_compile = self.jit_compile_check.isChecked()
+            self.fine_tune_blocks = int(self.fine_tune_blocks_edit.text())
+            self.fine_tune_epochs = int(self.fine_tune_epochs_edit.text())
+            self.accumulation_steps = int(self.accumulation_steps_edit.text())
+            self.probe_batch_size = self.probe_batch_check.isChecked()
+
+            # valida se os valores de fine-tuning não são negativos
+            if self.fine_tune_blocks < 0 or self.fine_tune_epochs < 0:
+                QMessageBox.warning(self, "Erro de valor", "Os valores de fine-tuning não podem ser negativos")
+                return
+
+            if self.accumulation_steps < 1:
+                QMessageBox.warning(self, "Erro de valor", "A quantidade de passos de acumulação deve ser positiva")
+                return
+
+            self.accept()  # fecha o dialog com resultado "aceito"
+        except ValueError:
+            QMessageBox.information(self, 'Erro', 'Erro ao definir parâmetros, possivelmente algum valor foi inserido '
+                                                  'incorretamente. Tente novamente')
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from Model import Model, SHARD_MANIFEST, SPLIT_SEED
+
+'''
+Treinamento paralelo de execuções independentes (ex: ears, eyes e mouth), cada uma em um processo
+HeadlessTrainer próprio, com uma fatia dos núcleos da CPU. Este módulo não importa o TensorFlow: o processo
+principal apenas inicia os workers e repassa as mensagens de log de cada um.
+
+O arquivo de jobs tem o mesmo formato da fila de experimentos (ver ExperimentQueue). Jobs que gravam o mesmo
+cache em disco (pipeline 'tfdata' com cache 'disk', pipeline 'cached', conversão automática em shards do pipeline
+'streaming' ou embeddings do modo 'features') não são executados ao mesmo tempo: o segundo aguarda o primeiro terminar e reutiliza o cache já gravado.
+
+Exemplo:
+    python -m ParallelScheduler jobs.yaml --workers 3
+'''
+
+
+class ParallelScheduler:
+
+    def __init__(self, jobs, defaults=None, workers=None, log=print):
+        """
+        parametro jobs: Lista de dicionários de configuração (mesmas chaves do HeadlessTrainer)
+        parametro defaults: Valores aplicados a todos os jobs (cada job pode sobrescrevê-los)
+        parametro workers: Quantidade de processos simultâneos (None = um por job, limitado aos núcleos)
+        parametro log: Função chamada com cada mensagem de log (dos workers e do próprio escalonador)
+        """
+        self.jobs = [dict(defaults or {}, **job) for job in jobs]
+        for job in self.jobs:
+            for key in ('dataset', 'log_name'):
+                if not job.get(key):
+                    raise ValueError(f"Parâmetro obrigatório não definido: {key}")
+
+        cpu_count = os.cpu_count() or 1
+        self.workers = max(1, min(workers or len(self.jobs), len(self.jobs), cpu_count))
+        self.threads = max(1, cpu_count // self.workers)
+        self.log = log
+        self.log_lock = threading.Lock()
+        self.results = []  # (log_name, código de saída, duração em segundos)
+
+    @staticmethod
+    def from_file(path, workers=None, log=print):
+        config = Model.load_config(path)
+        if isinstance(config, list):
+            return ParallelScheduler(config, workers=workers, log=log)
+        return ParallelScheduler(config.get('jobs', []), config.get('defaults'), workers, log)
+
+    @staticmethod
+    def disk_cache_keys(job):
+        """
+        Identifica os caches em disco gravados pelo job (conjunto vazio quando não há): o cache do tf.data não
+        pode ser gravado por dois processos ao mesmo tempo (o segundo falha com o .lockfile do primeiro), os
+        shards do DatasetCache e da conversão automática em TFRecord seriam sobrescritos, e os embeddings do modo 'features' seriam extraídos duas
+        vezes para o mesmo diretório (compartilhado entre datasets). Os valores padrão são os do HeadlessTrainer.
+        """
+        dataset = os.path.abspath(job['dataset'])
+        input_size = job.get('input_size', 128)
+        keys = set()
+        if job.get('pipeline') == 'tfdata' and job.get('cache') == 'disk':
+            keys.add(('tfdata', dataset, input_size, job.get('split', 0.3), job.get('seed', SPLIT_SEED)))
+        if job.get('pipeline') == 'cached':
+            keys.add(('cached', dataset, input_size))
+        if job.get('pipeline') == 'streaming' and not os.path.exists(os.path.join(dataset, SHARD_MANIFEST)):
+            # Pasta original convertida em cache/shards/ (ver ShardedDataset.cache_dir), independente do input size
+            keys.add(('streaming', dataset, job.get('split', 0.3), job.get('seed', SPLIT_SEED)))
+        if job.get('mode') == 'features':
+            keys.add(('features', input_size, job.get('precision', 'float32')))
+        return keys
+
+    def next_job(self, pending, running):
+        # Primeiro job pendente cujos caches em disco não estão sendo gravados por um job em execução
+        busy = set().union(*(ParallelScheduler.disk_cache_keys(job) for job, *_ in running.values()))
+        for job in pending:
+            if not ParallelScheduler.disk_cache_keys(job) & busy:
+                pending.remove(job)
+                return job
+        return None
+
+    def slot_cores(self, slot):
+        # Núcleos reservados para cada posição de execução (slot), para que os workers não disputem os núcleos
+        return set(range(slot * self.threads, (slot + 1) * self.threads))
+
+    def launch(self, job, slot):
+        # Cada worker recebe sua configuração em um arquivo temporário, com a quantidade de threads do seu slot.
+        # verbose=0 desativa a barra de progresso do Keras, o andamento é acompanhado pelas mensagens do Trainer.
+        # inter_op_threads=2 permite sobrepor o pipeline de dados e o passo de treinamento sem excesso de threads
+        config = dict(job, intra_op_threads=self.threads, inter_op_threads=2, verbose=0)
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+        json.dump(config, config_file)
+        config_file.close()
+
+        # OMP_NUM_THREADS limita as threads do oneDNN, utilizado pelo TensorFlow nas operações de CPU.
+        # O diretório deste módulo é incluído no PYTHONPATH para que o worker encontre o HeadlessTrainer mesmo
+        # quando o diretório de trabalho (caminhos relativos dos datasets e de logs/fit/) for outro
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        python_path = os.pathsep.join(filter(None, [module_dir, os.environ.get("PYTHONPATH")]))
+        env = dict(os.environ, PYTHONUNBUFFERED="1", OMP_NUM_THREADS=str(self.threads), PYTHONPATH=python_path)
+        cores = self.slot_cores(slot)
+        preexec_fn = None
+        if hasattr(os, "sched_setaffinity") and max(cores) < (os.cpu_count() or 1):
+            preexec_fn = lambda: os.sched_setaffinity(0, cores)
+
+        process = subprocess.Popen(
+            [sys.executable, "-m", "HeadlessTrainer", "--config", config_file.name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=env,
+            preexec_fn=preexec_fn
+        )
+
+        reader = threading.Thread(target=self.forward_output, args=(job['log_name'], process), daemon=True)
+        reader.start()
+        self.emit(f"Worker iniciado: {job['log_name']} ({self.threads} threads, PID {process.pid})")
+        return process, reader, config_file.name
+
+    def forward_output(self, name, process):
+        # Repassa cada linha do worker, identificada pelo nome da execução
+        for line in process.stdout:
+            line = line.rstrip()
+            if line:
+                self.emit(f"[{name}] {line}")
+
+    def emit(self, message):
+        with self.log_lock:
+            self.log(message)
+
+    def run(self):
+        pending = list(self.jobs)
+        running = {}  # slot → (job, processo, thread de leitura, arquivo de configuração, início)
+        start = time.perf_counter()
+
+        self.emit(f"Treinamento paralelo: {len(self.jobs)} jobs, {self.workers} workers, "
+                  f"{self.threads} threads por worker")
+
+        while pending or running:
+            for slot in range(self.workers):
+                if slot not in running and pending:
+                    job = self.next_job(pending, running)
+                    if job is None:
+                        break
+                    running[slot] = (job, *self.launch(job, slot), time.perf_counter())
+
+            for slot, (job, process, reader, config_path, job_start) in list(running.items()):
+                if process.poll() is None:
+                    continue
+
+                reader.join()
+                os.remove(config_path)
+                duration = time.perf_counter() - job_start
+                self.results.append((job['log_name'], process.returncode, duration))
+                self.emit(f"Worker finalizado: {job['log_name']} "
+                          f"({'sucesso' if process.returncode == 0 else 'falhou'}, {duration / 60:.1f} min)")
+                del running[slot]
+
+            time.sleep(0.5)
+
+        elapsed = time.perf_counter() - start
+        workers_time = sum(duration for _, _, duration in self.results)
+        self.emit(f"Tempo total: {elapsed / 60:.1f} min (soma das durações dos workers: {workers_time / 60:.1f} min)")
+
+        return all(code == 0 for _, code, _ in self.results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa vários treinamentos em paralelo, um processo por job")
+    parser.add_argument('jobs', help="Arquivo YAML ou JSON com os experimentos")
+    parser.add_argument('--workers', type=int, help="Quantidade de processos simultâneos")
+    args = parser.parse_args(argv)
+
+    try:
+        scheduler = ParallelScheduler.from_file(args.jobs, args.workers)
+    except Exception as e:
+        print(f"Erro ao ler os jobs: {str(e)}", file=sys.stderr)
+        return 1
+
+    return 0 if scheduler.run() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from InferenceEngine import InferenceEngine
+from Model import Model
+
+'''
+Servidor local de inferência: o modelo é carregado uma única vez e as requisições concorrentes de uma imagem são
+agrupadas em micro-lotes (até max_batch_size imagens ou max_wait_ms de espera), aproveitando a vazão da
+inferência em lote sem aumentar muito a latência de cada requisição.
+
+Pré-processamento idêntico ao do treinamento (Model.decode_image_bytes + Model.rescale): redimensionamento
+'nearest' e normalização 1/255, de modo que as predições online e offline (InferenceEngine) coincidem.
+
+Rotas:
+    POST /predict  - corpo: bytes da imagem (PNG, JPEG ou BMP) → classe prevista e probabilidades
+    GET  /metrics  - requisições, tamanho médio dos lotes, latências (p50/p95/p99) e profundidade da fila
+    GET  /health   - verificação de disponibilidade
+
+Exemplos:
+    python -m PredictionServer ears_weights.h5 --port 8500
+    python -m PredictionServer ears_weights.h5 --socket /tmp/resnet.sock
+    curl --data-binary @imagem.png http://localhost:8500/predict
+'''
+
+
+class PendingRequest:
+
+    def __init__(self, image):
+        self.image = image
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.probabilities = None
+        self.error = None
+
+
+class MicroBatcher:
+
+    def __init__(self, engine, max_batch_size=32, max_wait_ms=5.0, metrics_window=10000):
+        """
+        parametro engine: InferenceEngine com o modelo já carregado
+        parametro max_batch_size: Máximo de imagens por lote
+        parametro max_wait_ms: Tempo máximo que a primeira requisição de um lote espera pelas demais
+        parametro metrics_window: Quantidade de latências recentes utilizadas nos percentis
+        """
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+
+        self.metrics_lock = threading.Lock()
+        self.latencies = deque(maxlen=metrics_window)
+        self.total_requests = 0
+        self.total_batches = 0
+        self.max_queue_depth = 0
+
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def predict(self, image, timeout=30.0):
+        # Chamado pelas threads do servidor; bloqueia até o lote que contém a imagem ser processado
+        request = PendingRequest(image)
+        self.requests.put(request)
+        with self.metrics_lock:
+            self.max_queue_depth = max(self.max_queue_depth, self.requests.qsize())
+
+        if not request.done.wait(timeout):
+            raise TimeoutError("Tempo limite excedido na fila de inferência")
+        if request.error is not None:
+            raise request.error
+        return request.probabilities
+
+    def collect(self):
+        # Aguarda a primeira requisição e agrupa as que chegarem até o limite de tamanho ou de espera
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            try:
+                images, _ = Model.rescale(np.stack([request.image for request in batch]), None)
+                probabilities = self.engine.model.predict_on_batch(images)
+                for request, row in zip(batch, np.asarray(probabilities)):
+                    request.probabilities = row
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            finished = time.perf_counter()
+            with self.metrics_lock:
+                self.total_requests += len(batch)
+                self.total_batches += 1
+                self.latencies.extend(1000 * (finished - request.enqueued) for request in batch)
+            for request in batch:
+                request.done.set()
+
+    def metrics(self):
+        with self.metrics_lock:
+            latencies = np.asarray(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                'requests': self.total_requests,
+                'batches': self.total_batches,
+                'mean_batch_size': self.total_requests / self.total_batches if self.total_batches else 0.0,
+                'latency_p50_ms': float(np.percentile(latencies, 50)),
+                'latency_p95_ms': float(np.percentile(latencies, 95)),
+                'latency_p99_ms': float(np.percentile(latencies, 99)),
+                'queue_depth': self.requests.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+            }
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+
+    # Definidos pelo PredictionServer.create_server
+    engine = None
+    batcher = None
+
+    def send_json(self, status, content):
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self.send_json(200, self.batcher.metrics())
+        elif self.path == "/health":
+            self.send_json(200, {'status': 'ok', 'input_size': list(self.engine.img_size)})
+        else:
+            self.send_json(404, {'error': "Rota não encontrada"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self.send_json(404, {'error': "Rota não encontrada"})
+            return
+
+        start = time.perf_counter()
+        try:
+            contents = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            # A decodificação acontece na thread da requisição, em paralelo às demais e ao lote em execução
+            image = Model.decode_image_bytes(contents, self.engine.img_size).numpy()
+        except Exception as e:
+            self.send_json(400, {'error': f"Imagem inválida: {str(e)}"})
+            return
+
+        try:
+            probabilities = self.batcher.predict(image)
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+
+        self.send_json(200, {
+            'class': self.engine.class_names[int(np.argmax(probabilities))],
+            'probabilities': {name: float(p) for name, p in zip(self.engine.class_names, probabilities)},
+            'latency_ms': 1000 * (time.perf_counter() - start),
+        })
+
+    def address_string(self):
+        # Conexões por Unix socket não possuem endereço IP
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        # O log por requisição é desativado; o acompanhamento é feito pela rota /metrics
+        pass
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class PredictionServer:
+
+    def __init__(self, weights_path, max_batch_size=32, max_wait_ms=5.0, log=print):
+        self.engine = InferenceEngine(weights_path, max_batch_size)
+        self.log = log
+
+        # Aquecimento: o primeiro lote inclui a construção do grafo de inferência
+        self.engine.model.predict_on_batch(np.zeros((1, *self.engine.img_size, 3), dtype=np.float32))
+        self.batcher = MicroBatcher(self.engine, max_batch_size, max_wait_ms)
+
+    def create_server(self, host="127.0.0.1", port=8500, socket_path=None):
+        handler = type("Handler", (PredictionHandler,), {'engine': self.engine, 'batcher': self.batcher})
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            return ThreadingUnixHTTPServer(socket_path, handler)
+        return ThreadingHTTPServer((host, port), handler)
+
+    def serve(self, host="127.0.0.1", port=8500, socket_path=None):
+        server = self.create_server(host, port, socket_path)
+        self.log(f"Servidor de inferência em {socket_path or f'http://{host}:{port}'} "
+                 f"(entrada {self.engine.img_size}, lotes de até {self.batcher.max_batch_size} imagens, "
+                 f"espera máxima de {1000 * self.batcher.max_wait:.1f} ms)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local de inferência com micro-lotes")
+    parser.add_argument('weights', help="Modelo exportado (ex: {nome}_weights.h5)")
+    parser.add_argument('--host', default="127.0.0.1", help="Endereço do servidor HTTP")
+    parser.add_argument('--port', type=int, default=8500, help="Porta do servidor HTTP")
+    parser.add_argument('--socket', help="Caminho de um Unix socket (substitui o servidor TCP)")
+    parser.add_argument('--max-batch-size', type=int, default=32, help="Máximo de imagens por lote")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="Espera máxima para completar um lote")
+    args = parser.parse_args(argv)
+
+    server = PredictionServer(args.weights, args.max_batch_size, args.max_wait_ms)
+    server.serve(args.host, args.port, args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
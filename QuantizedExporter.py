@@ -0,0 +1,200 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from Model import Model, SPLIT_SEED
+from ModelExporter import ModelExporter
+
+'''
+Exportação para TFLite, com quantização e poda (pruning) opcional da cabeça, para inferência rápida em CPU.
+O relatório compara tamanho, latência e acurácia do modelo quantizado com o modelo float32 original, sobre o
+conjunto de validação (a mesma divisão do Model.list_dataset utilizada no treinamento).
+
+Quantizações:
+    * dynamic - pesos em int8, ativações em float (não precisa de dados de calibração)
+    * int8    - pesos e ativações em int8 (entrada uint8), calibrada com imagens do conjunto de treinamento
+    * float16 - pesos em float16 (metade do tamanho, mesma acurácia)
+
+Exemplo:
+    python -m QuantizedExporter ears_weights.h5 --dataset dados/ears --split 0.3 --quantization int8 --prune 0.5
+'''
+
+QUANTIZATIONS = ('dynamic', 'int8', 'float16')
+
+
+class QuantizedExporter:
+
+    def __init__(self, model, dataset_path, val_split=0.3, seed=SPLIT_SEED, calibration_samples=100, log=print):
+        """
+        parametro model: Modelo do Keras treinado (ou o caminho de um modelo exportado pelo ModelExporter)
+        parametro dataset_path / val_split / seed: Dataset e divisão utilizados no treinamento
+        parametro calibration_samples: Imagens de treinamento utilizadas na calibração da quantização int8
+        """
+        if isinstance(model, str):
+            model = ModelExporter.load(model)
+        self.model = getattr(model, 'inner_model', model)
+        self.img_size = tuple(self.model.input_shape[1:3])
+        self.log = log
+
+        (train_files, _), (val_files, val_labels), self.class_indices = (
+            Model.list_dataset(dataset_path, val_split, seed))
+        step = max(len(train_files) // max(calibration_samples, 1), 1)
+        self.calibration_files = train_files[::step][:calibration_samples]
+        self.val_images = self.decode(val_files)  # uint8, normalizadas apenas no momento do uso
+        self.val_labels = np.asarray(val_labels, dtype=np.int64)
+
+    def decode(self, files):
+        dataset = tf.data.Dataset.from_tensor_slices(files)
+        dataset = dataset.map(lambda path: Model.decode_image(path, self.img_size),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        images = [batch.numpy() for batch in dataset.batch(64)]
+        return np.concatenate(images) if images else np.empty((0, *self.img_size, 3), dtype=np.uint8)
+
+    @staticmethod
+    def prune_dense(model, fraction):
+        """
+        Poda por magnitude das camadas Dense (a cabeça da rede; a ResNet50 sem o topo não possui camadas Dense):
+        a fração fraction dos pesos de menor valor absoluto de cada camada é zerada. Retorna uma cópia do modelo
+        e a esparsidade obtida. Os zeros não reduzem o arquivo .tflite em si, mas sim o arquivo comprimido.
+        """
+        pruned = tf.keras.models.clone_model(model)
+        pruned.set_weights(model.get_weights())
+
+        def dense_layers(layer):
+            if isinstance(layer, tf.keras.layers.Dense):
+                return [layer]
+            return [dense for inner in getattr(layer, 'layers', []) for dense in dense_layers(inner)]
+
+        zeros, total = 0, 0
+        for layer in dense_layers(pruned):
+            kernel, *others = layer.get_weights()
+            threshold = np.quantile(np.abs(kernel), fraction)
+            kernel = np.where(np.abs(kernel) < threshold, 0.0, kernel).astype(kernel.dtype)
+            layer.set_weights([kernel, *others])
+            zeros += int(np.sum(kernel == 0))
+            total += kernel.size
+
+        return pruned, zeros / max(total, 1)
+
+    def representative_dataset(self):
+        # Imagens de calibração com a mesma normalização do treinamento (1/255)
+        for image in self.decode(self.calibration_files):
+            yield [image[np.newaxis].astype(np.float32) / 255.0]
+
+    def convert(self, model, quantization):
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if quantization == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+        elif quantization == 'int8':
+            converter.representative_dataset = self.representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.uint8
+            converter.inference_output_type = tf.uint8
+
+        return converter.convert()
+
+    def evaluate_tflite(self, content):
+        # Acurácia sobre a validação e latência mediana (ms) por imagem, com todos os núcleos
+        interpreter = tf.lite.Interpreter(model_content=content, num_threads=os.cpu_count())
+        interpreter.allocate_tensors()
+        input_details = interpreter.get_input_details()[0]
+        output_index = interpreter.get_output_details()[0]['index']
+
+        scale, zero_point = input_details['quantization']
+        correct, latencies = 0, []
+        for image, label in zip(self.val_images, self.val_labels):
+            image = image[np.newaxis].astype(np.float32) / 255.0
+            if input_details['dtype'] != np.float32:
+                # Entrada quantizada: valor_q = valor / escala + ponto_zero
+                image = np.clip(np.round(image / scale + zero_point), 0, 255).astype(input_details['dtype'])
+
+            start = time.perf_counter()
+            interpreter.set_tensor(input_details['index'], image)
+            interpreter.invoke()
+            latencies.append(1000 * (time.perf_counter() - start))
+
+            # A saída quantizada é uma transformação afim crescente das probabilidades: o argmax é o mesmo
+            correct += int(np.argmax(interpreter.get_tensor(output_index)) == label)
+
+        return correct / max(len(self.val_labels), 1), float(np.median(latencies)) if latencies else 0.0
+
+    def evaluate_keras(self, model, repeat=20):
+        probabilities = model.predict(self.val_images.astype(np.float32) / 255.0, batch_size=32, verbose=0)
+        accuracy = float(np.mean(np.argmax(probabilities, axis=1) == self.val_labels)) if len(probabilities) else 0.0
+
+        single = self.val_images[:1].astype(np.float32) / 255.0
+        model.predict_on_batch(single)
+        latencies = []
+        for _ in range(repeat if len(single) else 0):
+            start = time.perf_counter()
+            model.predict_on_batch(single)
+            latencies.append(1000 * (time.perf_counter() - start))
+
+        return accuracy, float(np.median(latencies)) if latencies else 0.0
+
+    def export(self, name, quantization='dynamic', prune=0.0):
+        """
+        Gera {name}_{quantization}[_pruned].tflite e o relatório {name}_{...}_report.json.
+        Retorna o relatório (lista de variantes com tamanho, latência e acurácia).
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Quantização inválida: {quantization}. Opções: {', '.join(QUANTIZATIONS)}")
+
+        self.log(f"Avaliando o modelo float32 em {len(self.val_labels)} imagens de validação...")
+        accuracy, latency = self.evaluate_keras(self.model)
+        report = [{'variant': 'keras float32', 'size_mb': self.model.count_params() * 4 / 2 ** 20,
+                   'compressed_mb': None, 'latency_ms': latency, 'accuracy': accuracy}]
+
+        model, suffix = self.model, quantization
+        if prune > 0:
+            model, sparsity = QuantizedExporter.prune_dense(self.model, prune)
+            suffix += "_pruned"
+            self.log(f"Poda da cabeça: {100 * sparsity:.1f}% dos pesos das camadas Dense zerados")
+
+        self.log(f"Convertendo para TFLite (quantização {quantization})...")
+        content = self.convert(model, quantization)
+        path = f"{name}_{suffix}.tflite"
+        with open(path, "wb") as f:
+            f.write(content)
+        Model.save_class_indices(path, self.class_indices)
+
+        accuracy, latency = self.evaluate_tflite(content)
+        report.append({'variant': f"tflite {suffix}", 'size_mb': len(content) / 2 ** 20,
+                       'compressed_mb': len(gzip.compress(content)) / 2 ** 20, 'latency_ms': latency,
+                       'accuracy': accuracy, 'path': path})
+
+        with open(f"{name}_{suffix}_report.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        for row in report:
+            compressed = f" ({row['compressed_mb']:.1f} MB comprimido)" if row['compressed_mb'] is not None else ""
+            self.log(f"{row['variant']}: {row['size_mb']:.1f} MB{compressed} - latência {row['latency_ms']:.1f} ms "
+                     f"- acurácia {100 * row['accuracy']:.2f}%")
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta um modelo treinado para TFLite quantizado")
+    parser.add_argument('weights', help="Modelo exportado (ex: {nome}_weights.h5)")
+    parser.add_argument('--dataset', required=True, help="Dataset utilizado no treinamento")
+    parser.add_argument('--split', type=float, default=0.3, help="Fração de validação utilizada no treinamento")
+    parser.add_argument('--seed', type=int, default=SPLIT_SEED, help="Semente da divisão treino/validação")
+    parser.add_argument('--quantization', choices=QUANTIZATIONS, default='dynamic', help="Tipo de quantização")
+    parser.add_argument('--prune', type=float, default=0.0, help="Fração dos pesos da cabeça zerados (ex: 0.5)")
+    parser.add_argument('--name', help="Prefixo dos arquivos gerados (padrão: nome do modelo)")
+    args = parser.parse_args(argv)
+
+    exporter = QuantizedExporter(args.weights, args.dataset, args.split, args.seed)
+    name = args.name or os.path.splitext(args.weights)[0].replace("_weights", "")
+    exporter.export(name, args.quantization, args.prune)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
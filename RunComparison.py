@@ -0,0 +1,182 @@
+import os
+import time
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QTableWidget, QTableWidgetItem,
+    QAbstractItemView, QHeaderView, QWidget, QMessageBox
+)
+from RunRegistry import RunRegistry
+
+# Métricas disponíveis para as curvas (registradas pelo RegistryCallback a cada época)
+CURVE_METRICS = ('val_accuracy', 'accuracy', 'val_loss', 'loss', 'epoch_seconds')
+
+# Cores das curvas, na ordem das execuções selecionadas
+CURVE_COLORS = ('#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b', '#e377c2', '#17becf')
+
+
+class CurveWidget(QWidget):
+
+    def __init__(self, parent=None):
+        # Gráfico simples das curvas por época, desenhado com o QPainter (sem dependências adicionais)
+        super().__init__(parent)
+        self.series = []  # (nome, [(época, valor)])
+        self.metric = ''
+        self.setMinimumHeight(260)
+
+    def set_series(self, metric, series):
+        self.metric = metric
+        self.series = [(name, points) for name, points in series if points]
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), Qt.white)
+
+        left, top, right, bottom = 60, 20, self.width() - 20, self.height() - 40
+        painter.setPen(QPen(Qt.black))
+        painter.drawLine(left, bottom, right, bottom)
+        painter.drawLine(left, top, left, bottom)
+
+        if not self.series:
+            painter.drawText(self.rect(), Qt.AlignCenter, "Selecione execuções na tabela")
+            return
+
+        epochs = [epoch for _, points in self.series for epoch, _ in points]
+        values = [value for _, points in self.series for _, value in points]
+        min_epoch, max_epoch = min(epochs), max(max(epochs), min(epochs) + 1)
+        min_value, max_value = min(values), max(values)
+        if max_value == min_value:
+            max_value = min_value + 1e-6
+
+        def position(epoch, value):
+            x = left + (epoch - min_epoch) / (max_epoch - min_epoch) * (right - left)
+            y = bottom - (value - min_value) / (max_value - min_value) * (bottom - top)
+            return QPointF(x, y)
+
+        painter.drawText(5, top + 10, f"{max_value:.3f}")
+        painter.drawText(5, bottom, f"{min_value:.3f}")
+        painter.drawText(left, bottom + 15, str(min_epoch))
+        painter.drawText(right - 30, bottom + 15, str(max_epoch))
+        painter.drawText((left + right) // 2 - 40, bottom + 30, f"época - {self.metric}")
+
+        for index, (name, points) in enumerate(self.series):
+            color = QColor(CURVE_COLORS[index % len(CURVE_COLORS)])
+            painter.setPen(QPen(color, 2))
+            painter.drawPolyline(QPolygonF([position(epoch, value) for epoch, value in points]))
+            painter.drawText(left + 10, top + 15 * (index + 1), name)
+
+
+class RunComparison(QDialog):
+
+    def __init__(self, open_tensorboard=None, parent=None):
+        """
+        Tabela de comparação e curvas das execuções registradas em logs/runs.sqlite (ver RunRegistry).
+        parametro open_tensorboard: Função chamada com a lista de diretórios selecionados, quando o usuário
+                                    precisa dos detalhes do TensorBoard (histogramas, grafo, profiler)
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Comparação de Execuções")
+        self.resize(1000, 650)
+
+        self.registry = RunRegistry()
+        self.open_tensorboard = open_tensorboard
+        self.runs = []
+
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(10)
+        self.table.setHorizontalHeaderLabels(["Execução", "Situação", "Épocas", "Melhor val_acc (época)",
+                                              "val_loss final", "Tempo por época (s)", "Cabeça", "Precisão",
+                                              "Input", "Batch"])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.itemSelectionChanged.connect(self.update_curves)
+        layout.addWidget(self.table, stretch=1)
+
+        h_layout = QHBoxLayout()
+        h_layout.addWidget(QLabel("Métrica:"))
+        self.metric_combo = QComboBox()
+        self.metric_combo.addItems(CURVE_METRICS)
+        self.metric_combo.currentTextChanged.connect(self.update_curves)
+        h_layout.addWidget(self.metric_combo)
+        h_layout.addStretch()
+        self.status_label = QLabel()
+        h_layout.addWidget(self.status_label)
+        layout.addLayout(h_layout)
+
+        self.curves = CurveWidget()
+        layout.addWidget(self.curves, stretch=1)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("Atualizar")
+        import_button = QPushButton("Importar execuções antigas")
+        tensorboard_button = QPushButton("Abrir seleção no TensorBoard")
+        close_button = QPushButton("Fechar")
+        for button in (refresh_button, import_button, tensorboard_button, close_button):
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+        refresh_button.clicked.connect(self.load_runs)
+        import_button.clicked.connect(self.import_runs)
+        tensorboard_button.clicked.connect(self.tensorboard_selected)
+        close_button.clicked.connect(self.accept)
+
+        self.load_runs()
+
+    def load_runs(self):
+        start = time.perf_counter()
+        self.runs = self.registry.list_runs()
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(self.runs))
+        for row, run in enumerate(self.runs):
+            config, best, last = run['config'], run['best'], run['last']
+            best_text = (f"{best['val_accuracy']:.4f} ({run['best_epoch']})" if 'val_accuracy' in best else "-")
+            values = [
+                os.path.basename(run['run_dir']), run['status'], str(run['epochs']), best_text,
+                f"{last['val_loss']:.4f}" if 'val_loss' in last else "-",
+                f"{last['epoch_seconds']:.1f}" if 'epoch_seconds' in last else "-",
+                str(config.get('head', '-')), str(config.get('precision', '-')),
+                str(config.get('input_size', '-')), str(config.get('batch_size', '-')),
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.UserRole, row)  # posição em self.runs, preservada na ordenação da tabela
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+
+        self.status_label.setText(f"{len(self.runs)} execuções carregadas em "
+                                  f"{1000 * (time.perf_counter() - start):.0f} ms")
+
+    def import_runs(self):
+        imported = self.registry.import_runs()
+        QMessageBox.information(self, "Importação", f"{imported} execuções importadas de logs/fit/")
+        self.load_runs()
+
+    def selected_runs(self):
+        rows = sorted({item.data(Qt.UserRole) for item in self.table.selectedItems()})
+        return [self.runs[row] for row in rows]
+
+    def update_curves(self):
+        metric = self.metric_combo.currentText()
+        series = []
+        for run in self.selected_runs():
+            points = [(epoch, metrics[metric]) for epoch, metrics in self.registry.history(run['run_dir'])
+                      if metric in metrics]
+            series.append((os.path.basename(run['run_dir']), points))
+        self.curves.set_series(metric, series)
+
+    def tensorboard_selected(self):
+        runs = self.selected_runs()
+        if not runs:
+            QMessageBox.warning(self, "Erro", "Selecione ao menos uma execução")
+            return
+        if self.open_tensorboard is not None:
+            self.open_tensorboard([run['run_dir'] for run in runs])
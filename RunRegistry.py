@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+'''
+Índice das execuções de treinamento (logs/runs.sqlite): configuração, situação e métricas de cada época,
+gravados durante o treinamento (ver RegistryCallback). A comparação entre execuções na interface é lida daqui
+em milissegundos, sem reprocessar os arquivos de eventos do TensorBoard em logs/fit/.
+
+Não importa o TensorFlow, podendo ser utilizado pela interface antes do carregamento do backend (exceto
+import_runs, que lê os arquivos de eventos das execuções antigas).
+'''
+
+REGISTRY_PATH = "logs/runs.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_dir TEXT PRIMARY KEY,
+    log_name TEXT,
+    status TEXT,
+    started REAL,
+    finished REAL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS epochs (
+    run_dir TEXT,
+    epoch INTEGER,
+    metrics TEXT,
+    PRIMARY KEY (run_dir, epoch)
+);
+"""
+
+
+class RunRegistry:
+
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        # Uma conexão por operação: o registro é escrito pela thread de treinamento e lido pela interface, e
+        # execuções paralelas (ParallelScheduler) escrevem no mesmo arquivo; o WAL permite leituras simultâneas
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:  # commit ao final (ou rollback em caso de erro)
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def key(run_dir):
+        return os.path.normpath(run_dir)
+
+    def start_run(self, run_dir, log_name, config):
+        # Execuções retomadas mantêm o início e as épocas já registradas
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT INTO runs (run_dir, log_name, status, started, config) VALUES (?, ?, 'running', ?, ?) "
+                "ON CONFLICT(run_dir) DO UPDATE SET status = 'running', finished = NULL, config = excluded.config",
+                (self.key(run_dir), log_name, time.time(), json.dumps(config, ensure_ascii=False, default=str)))
+
+    def log_epoch(self, run_dir, epoch, metrics):
+        with self.connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO epochs (run_dir, epoch, metrics) VALUES (?, ?, ?)",
+                               (self.key(run_dir), epoch, json.dumps(metrics)))
+
+    def finish_run(self, run_dir, status, config=None):
+        with self.connect() as connection:
+            if config is None:
+                connection.execute("UPDATE runs SET status = ?, finished = ? WHERE run_dir = ?",
+                                   (status, time.time(), self.key(run_dir)))
+            else:
+                connection.execute("UPDATE runs SET status = ?, finished = ?, config = ? WHERE run_dir = ?",
+                                   (status, time.time(), json.dumps(config, ensure_ascii=False, default=str),
+                                    self.key(run_dir)))
+
+    def list_runs(self):
+        """
+        Retorna uma lista de dicionários (uma execução por item, da mais recente para a mais antiga) com a
+        configuração, a quantidade de épocas registradas e as métricas da melhor época (val_accuracy).
+        """
+        with self.connect() as connection:
+            runs = connection.execute(
+                "SELECT run_dir, log_name, status, started, finished, config FROM runs ORDER BY started DESC"
+            ).fetchall()
+            epochs = connection.execute("SELECT run_dir, epoch, metrics FROM epochs ORDER BY epoch").fetchall()
+
+        history = {}
+        for run_dir, epoch, metrics in epochs:
+            history.setdefault(run_dir, []).append((epoch, json.loads(metrics)))
+
+        results = []
+        for run_dir, log_name, status, started, finished, config in runs:
+            run_history = history.get(run_dir, [])
+            best = max(run_history, key=lambda entry: entry[1].get('val_accuracy', 0), default=(None, {}))
+            results.append({
+                'run_dir': run_dir, 'log_name': log_name, 'status': status,
+                'started': started, 'finished': finished, 'config': json.loads(config or "{}"),
+                'epochs': len(run_history), 'best_epoch': best[0], 'best': best[1],
+                'last': run_history[-1][1] if run_history else {},
+            })
+        return results
+
+    def history(self, run_dir):
+        # Lista de (época, métricas) de uma execução
+        with self.connect() as connection:
+            rows = connection.execute("SELECT epoch, metrics FROM epochs WHERE run_dir = ? ORDER BY epoch",
+                                      (self.key(run_dir),)).fetchall()
+        return [(epoch, json.loads(metrics)) for epoch, metrics in rows]
+
+    @staticmethod
+    def read_event_metrics(run_dir):
+        """
+        Métricas por época gravadas pelo TensorBoard do Keras (escalares epoch_* em train/ e validation/), no
+        formato do RegistryCallback: {época (a partir de 1): {'loss': ..., 'val_accuracy': ...}}.
+        O TensorFlow é importado apenas aqui, quando há execuções antigas a importar.
+        """
+        import tensorflow as tf
+
+        metrics = {}
+        for subdir, prefix in (('train', ''), ('validation', 'val_')):
+            directory = os.path.join(run_dir, subdir)
+            if not os.path.isdir(directory):
+                continue
+
+            for name in sorted(os.listdir(directory)):
+                if not name.startswith("events.out.tfevents"):
+                    continue
+                try:
+                    for event in tf.compat.v1.train.summary_iterator(os.path.join(directory, name)):
+                        for value in event.summary.value:
+                            if not value.tag.startswith("epoch_"):
+                                continue
+                            # Summaries do TF2 guardam o escalar como tensor; as do TF1, em simple_value
+                            if value.HasField('simple_value'):
+                                scalar = value.simple_value
+                            else:
+                                scalar = tf.make_ndarray(value.tensor)
+                                if scalar.ndim != 0 or scalar.dtype.kind not in 'fiu':
+                                    continue
+                            metrics.setdefault(event.step + 1, {})[prefix + value.tag[len("epoch_"):]] = float(scalar)
+                except Exception:
+                    # Arquivo de eventos truncado (ex: execução interrompida): as épocas já lidas são mantidas
+                    continue
+
+        return metrics
+
+    def import_runs(self, log_dir="logs/fit/"):
+        """
+        Registra no índice as execuções anteriores a ele (diretórios de logs/fit/ ainda não registrados), com as
+        métricas por época lidas dos arquivos do TensorBoard. Execuções sem run_config.json (anteriores ao
+        registro da configuração) são registradas com o nome do diretório e o seu mtime como início.
+        Um run_config.json ilegível é ignorado, a execução é importada como se não o tivesse.
+        Retorna a quantidade de execuções importadas.
+        """
+        if not os.path.isdir(log_dir):
+            return 0
+
+        with self.connect() as connection:
+            known = {row[0] for row in connection.execute("SELECT run_dir FROM runs")}
+
+        imported = 0
+        for name in sorted(os.listdir(log_dir)):
+            run_dir = self.key(os.path.join(log_dir, name))
+            if run_dir in known or not os.path.isdir(run_dir):
+                continue
+
+            config, started = {}, os.path.getmtime(run_dir)
+            config_path = os.path.join(run_dir, "run_config.json")
+            if os.path.exists(config_path):
+                try:
+                    with open(config_path, "r", encoding="utf-8") as f:
+                        config = json.load(f)
+                    started = os.path.getmtime(config_path)
+                except (OSError, ValueError):
+                    config = {}
+
+            metrics = RunRegistry.read_event_metrics(run_dir)
+            if not config and not metrics:
+                continue  # não é o diretório de uma execução
+
+            with self.connect() as connection:
+                connection.execute(
+                    "INSERT INTO runs (run_dir, log_name, status, started, config) VALUES (?, ?, ?, ?, ?)",
+                    (run_dir, config.get('log_name', name), config.get('status', 'finished'), started,
+                     json.dumps(config, ensure_ascii=False)))
+                connection.executemany("INSERT OR REPLACE INTO epochs (run_dir, epoch, metrics) VALUES (?, ?, ?)",
+                                       [(run_dir, epoch, json.dumps(values))
+                                        for epoch, values in sorted(metrics.items())])
+            imported += 1
+        return imported
@@ -0,0 +1,51 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from Model import Model
+from ModelExporter import ModelExporter
+
+class SaveThread(QThread):
+
+    log_signal = pyqtSignal(str)  # sinal para enviar mensagens de log ao PyQt
+    progress_signal = pyqtSignal(int)  # porcentagem da exportação
+    save_finished = pyqtSignal(bool)
+
+    def __init__(self, neural_network, name, save_format, class_indices=None, tflite_options=None):
+        """
+        Exportação do modelo fora da thread da interface, que deixa de congelar durante o salvamento.
+        parametro name: Nome da execução (prefixo dos arquivos)
+        parametro save_format: Formato de exportação (ver ModelExporter.EXPORT_FORMATS)
+        parametro class_indices: Mapeamento das classes, salvo ao lado do modelo exportado
+        parametro tflite_options: Exportação TFLite opcional após o salvamento, dicionário com quantization, prune,
+                                  dataset_path, val_split e seed (ver QuantizedExporter)
+        """
+        super().__init__()
+        self.neural_network = neural_network
+        self.name = name
+        self.save_format = save_format
+        self.class_indices = class_indices
+        self.tflite_options = tflite_options
+        self.path = None
+
+    def report(self, percent, message):
+        self.progress_signal.emit(percent)
+        self.log_signal.emit(message)
+
+    def run(self):
+
+        try:
+            self.path = ModelExporter.export(self.neural_network, self.name, self.save_format, self.report)
+            if self.class_indices is not None:
+                Model.save_class_indices(self.path, self.class_indices)
+
+            if self.tflite_options:
+                from QuantizedExporter import QuantizedExporter
+
+                options = self.tflite_options
+                exporter = QuantizedExporter(self.neural_network, options['dataset_path'], options['val_split'],
+                                             options['seed'], log=self.log_signal.emit)
+                exporter.export(self.name, options['quantization'], options['prune'])
+
+            self.save_finished.emit(True)
+
+        except Exception as e:
+            self.log_signal.emit(f"Erro ao salvar o modelo: {str(e)}")
+            self.save_finished.emit(False)
@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from Model import Model, CACHE_DIR, SHARD_MANIFEST, SHUFFLE_BUFFER, SPLIT_SEED
+
+'''
+Dataset em shards TFRecord, lido em streaming: a memória utilizada não depende do tamanho do dataset.
+
+Cada shard guarda os bytes originais das imagens (PNG, JPEG ou BMP, sem decodificar) e o índice da classe, de modo
+que os shards ocupam o mesmo espaço das imagens originais. O manifest (shards.json) guarda o mapeamento das
+classes, a divisão treino/validação utilizada na conversão e a quantidade de imagens de cada shard.
+
+Pipeline de leitura (ShardedDataset.build_dataset):
+    * shuffle() da lista de shards → a ordem de leitura dos shards muda a cada época
+    * interleave() → CYCLE_LENGTH shards lidos em paralelo, alternando as imagens entre eles
+    * shuffle(SHUFFLE_BUFFER) → embaralhamento em um buffer limitado, ainda com as imagens codificadas
+    * map(num_parallel_calls=AUTOTUNE) → decodificação e redimensionamento em paralelo (Model.decode_image_bytes)
+    * batch() + rescale + aumento de dados opcional + prefetch(), como nos demais pipelines
+
+Exemplos:
+    python -m ShardedDataset convert dados/ears shards/ears --split 0.3
+    python -m ShardedDataset report shards/ears --input-size 224
+    python -m HeadlessTrainer --dataset shards/ears --pipeline streaming ...
+'''
+
+
+class ShardedDataset:
+
+    # Quantidade de imagens gravadas em cada shard
+    SHARD_SIZE = 1024
+
+    # Quantidade de shards lidos em paralelo pelo interleave
+    CYCLE_LENGTH = 8
+
+    SUBSETS = ('training', 'validation')
+
+    FEATURES = {
+        'image': tf.io.FixedLenFeature([], tf.string),
+        'label': tf.io.FixedLenFeature([], tf.int64),
+    }
+
+    def __init__(self, shard_dir):
+        """
+        parametro shard_dir: Pasta com os shards e o manifest gerados pelo ShardedDataset.convert
+        """
+        self.shard_dir = shard_dir
+        manifest_path = os.path.join(shard_dir, SHARD_MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"Nenhum dataset em shards encontrado em {shard_dir} (arquivo {SHARD_MANIFEST} ausente)")
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.class_indices = self.manifest['class_indices']
+
+    @staticmethod
+    def convert(dataset_path, shard_dir, val_split=0.3, seed=SPLIT_SEED, shard_size=SHARD_SIZE, log=print):
+        """
+        Converte um dataset no formato de subpastas por classe em shards TFRecord, com a mesma divisão
+        treino/validação do Model.list_dataset. As imagens são embaralhadas (seed) antes da gravação, para que cada
+        shard contenha todas as classes e o buffer de embaralhamento limitado seja suficiente na leitura.
+        Apenas uma imagem é mantida em memória por vez. Retorna o ShardedDataset convertido.
+        """
+        (train_files, train_labels), (val_files, val_labels), class_indices = (
+            Model.list_dataset(dataset_path, val_split, seed))
+        os.makedirs(shard_dir, exist_ok=True)
+
+        shards = {}
+        for subset, files, labels in (('training', train_files, train_labels),
+                                      ('validation', val_files, val_labels)):
+            samples = list(zip(files, labels))
+            random.Random(f"{seed}:{subset}").shuffle(samples)
+
+            shards[subset] = []
+            for number, start in enumerate(range(0, len(samples), shard_size)):
+                name = f"{subset}-{number:05d}.tfrecord"
+                chunk = samples[start:start + shard_size]
+
+                begin = time.perf_counter()
+                with tf.io.TFRecordWriter(os.path.join(shard_dir, name)) as writer:
+                    for path, label in chunk:
+                        with open(path, "rb") as f:
+                            contents = f.read()
+                        example = tf.train.Example(features=tf.train.Features(feature={
+                            'image': tf.train.Feature(bytes_list=tf.train.BytesList(value=[contents])),
+                            'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[label])),
+                        }))
+                        writer.write(example.SerializeToString())
+                seconds = time.perf_counter() - begin
+
+                size = os.path.getsize(os.path.join(shard_dir, name))
+                shards[subset].append({'name': name, 'records': len(chunk), 'bytes': size})
+                log(f"Shard {name}: {len(chunk)} imagens, {size / 2 ** 20:.1f} MB "
+                    f"({len(chunk) / max(seconds, 1e-9):.0f} imagens/s)")
+
+        # A divisão salva pelo list_dataset guarda o mtime das pastas, utilizado para detectar conversões antigas
+        index = Model.read_split_index(Model.split_index_path(dataset_path, val_split, seed)) or {}
+        manifest = {'dataset_path': os.path.abspath(dataset_path), 'val_split': val_split, 'seed': seed,
+                    'class_indices': class_indices, 'directories': index.get('directories', {}), 'shards': shards}
+
+        # O manifest é gravado por último: uma conversão interrompida não é confundida com uma conversão completa
+        Model.write_json(os.path.join(shard_dir, SHARD_MANIFEST), manifest, indent=2)
+
+        return ShardedDataset(shard_dir)
+
+    @staticmethod
+    def cache_dir(dataset_path, val_split, seed):
+        # Conversão automática de um dataset em subpastas (pipeline 'streaming' apontado para a pasta original)
+        key = f"{os.path.abspath(dataset_path)}|{val_split}|{seed}"
+        return os.path.join(CACHE_DIR, "shards", hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def is_current(self):
+        # False caso alguma pasta do dataset original tenha sido modificada depois da conversão
+        for directory, mtime in self.manifest.get('directories', {}).items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def records(self, subset):
+        return sum(shard['records'] for shard in self.manifest['shards'][subset])
+
+    def shard_paths(self, subset):
+        return [os.path.join(self.shard_dir, shard['name']) for shard in self.manifest['shards'][subset]]
+
+    def parse(self, record, img_size):
+        example = tf.io.parse_single_example(record, self.FEATURES)
+        return Model.decode_image_bytes(example['image'], img_size), example['label']
+
+    def build_dataset(self, subset, img_size, batch_size, shuffle, augmentation=None, shard=None):
+        """
+        Monta o pipeline tf.data em streaming sobre os shards do subconjunto ('training' ou 'validation').
+        A memória utilizada é limitada pelo buffer de embaralhamento (imagens ainda codificadas), pelos
+        CYCLE_LENGTH shards abertos e pelos lotes em prefetch, independentemente da quantidade de shards.
+        parametro augmentation: Aumento de dados opcional (Augmentation), aplicado por lote após a normalização
+        parametro shard: (quantidade de partes, índice) - apenas uma parte do subconjunto é lida (treinamento
+                         distribuído). A divisão é feita por arquivo quando há shards suficientes para todas as
+                         partes, e por imagem caso contrário
+        """
+        paths = self.shard_paths(subset)
+        records = [shard['records'] for shard in self.manifest['shards'][subset]]
+        num_classes = len(self.class_indices)
+
+        by_file = shard is not None and len(paths) >= shard[0]
+        if by_file:
+            count, index = shard
+            paths, records = paths[index::count], records[index::count]
+        total = sum(records)
+        if shard is not None and not by_file:
+            count, index = shard
+            total = (total - index + count - 1) // count
+
+        dataset = tf.data.Dataset.from_tensor_slices(paths)
+        if shuffle:
+            dataset = dataset.shuffle(len(paths), reshuffle_each_iteration=True)
+
+        # Sem embaralhamento (validação) a ordem é mantida determinística
+        dataset = dataset.interleave(tf.data.TFRecordDataset, cycle_length=min(self.CYCLE_LENGTH, len(paths) or 1),
+                                     num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+        if shard is not None and not by_file:
+            dataset = dataset.shard(*shard)
+        if shuffle:
+            dataset = dataset.shuffle(SHUFFLE_BUFFER, reshuffle_each_iteration=True)
+
+        dataset = dataset.map(lambda record: self.parse(record, img_size), num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.map(lambda image, label: (image, tf.one_hot(label, num_classes)),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        # A quantidade de imagens vem do manifest: o Keras passa a conhecer o número de passos por época
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(total))
+
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.map(Model.rescale, num_parallel_calls=tf.data.AUTOTUNE)
+        if augmentation is not None:
+            dataset = augmentation.apply(dataset)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def throughput_report(self, img_size=(128, 128), batch_size=256, log=print):
+        """
+        Mede, shard a shard, a vazão de leitura + decodificação (imagens/s e MB/s). Shards com menos da metade
+        da vazão mediana são apontados como lentos (ex: disco de rede, imagens muito grandes).
+        O relatório é salvo em {shard_dir}/throughput_report.json e retornado como lista de dicionários.
+        """
+        report = []
+        for subset in self.SUBSETS:
+            for shard, path in zip(self.manifest['shards'][subset], self.shard_paths(subset)):
+                dataset = tf.data.TFRecordDataset(path)
+                dataset = dataset.map(lambda record: self.parse(record, img_size),
+                                      num_parallel_calls=tf.data.AUTOTUNE).batch(batch_size)
+
+                images = 0
+                start = time.perf_counter()
+                for batch, _ in dataset:
+                    images += len(batch)
+                seconds = max(time.perf_counter() - start, 1e-9)
+
+                report.append({'shard': shard['name'], 'subset': subset, 'records': images,
+                               'size_mb': shard['bytes'] / 2 ** 20, 'seconds': seconds,
+                               'images_per_second': images / seconds,
+                               'mb_per_second': shard['bytes'] / 2 ** 20 / seconds})
+
+        median = float(np.median([row['images_per_second'] for row in report])) if report else 0.0
+        for row in report:
+            row['slow'] = row['images_per_second'] < 0.5 * median
+            log(f"{row['shard']}: {row['records']} imagens em {row['seconds']:.2f} s - "
+                f"{row['images_per_second']:.0f} imagens/s, {row['mb_per_second']:.1f} MB/s"
+                + (" (lento)" if row['slow'] else ""))
+        log(f"Vazão mediana: {median:.0f} imagens/s por shard")
+
+        with open(os.path.join(self.shard_dir, "throughput_report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conversão e leitura de datasets em shards TFRecord")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert = subparsers.add_parser('convert', help="Converte um dataset com uma subpasta por classe")
+    convert.add_argument('dataset', help="Pasta do dataset, com uma subpasta por classe")
+    convert.add_argument('output', help="Pasta onde os shards serão gravados")
+    convert.add_argument('--split', type=float, default=0.3, help="Fração das imagens destinada à validação")
+    convert.add_argument('--seed', type=int, default=SPLIT_SEED, help="Semente da divisão treino/validação")
+    convert.add_argument('--shard-size', type=int, default=ShardedDataset.SHARD_SIZE, help="Imagens por shard")
+
+    report = subparsers.add_parser('report', help="Vazão de leitura e decodificação de cada shard")
+    report.add_argument('shards', help="Pasta com os shards convertidos")
+    report.add_argument('--input-size', type=int, default=128, help="Tamanho das imagens decodificadas")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        ShardedDataset.convert(args.dataset, args.output, args.split, args.seed, args.shard_size)
+    else:
+        ShardedDataset(args.shards).throughput_report((args.input_size, args.input_size))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import argparse
+import subprocess
+import sys
+
+'''
+Verificação do tempo de abertura da interface, para detectar regressões (ex: uma nova importação do
+TensorFlow no nível de módulo). Importa o módulo Interface em um processo novo, mede o tempo e confere se o
+TensorFlow ainda não foi carregado.
+
+Exemplo:
+    python -m StartupTime --max-seconds 2
+'''
+
+# Código executado no processo filho; imprime "<segundos> <tensorflow carregado>"
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import Interface\n"
+    "print(time.perf_counter() - start, 'tensorflow' in sys.modules)\n"
+)
+
+
+def measure(repeat=3):
+    # Retorna o menor tempo de importação entre as repetições e se o TensorFlow foi importado
+    times, tensorflow_loaded = [], False
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+        elapsed, loaded = output.stdout.split()[-2:]
+        times.append(float(elapsed))
+        tensorflow_loaded = tensorflow_loaded or loaded == 'True'
+    return min(times), tensorflow_loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação da interface")
+    parser.add_argument('--max-seconds', type=float, default=2.0, help="Tempo máximo aceitável")
+    parser.add_argument('--repeat', type=int, default=3, help="Quantidade de medições")
+    args = parser.parse_args(argv)
+
+    elapsed, tensorflow_loaded = measure(args.repeat)
+    print(f"Importação da interface: {elapsed:.3f} s (TensorFlow carregado: {tensorflow_loaded})")
+
+    if tensorflow_loaded:
+        print("Falha: o TensorFlow não deve ser importado antes da janela ser exibida", file=sys.stderr)
+        return 1
+    if elapsed > args.max_seconds:
+        print(f"Falha: tempo acima do limite de {args.max_seconds:.2f} s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
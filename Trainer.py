@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+from Evaluator import Evaluator
+from Model import Model
+from RunRegistry import RunRegistry
+from TrainingCallbacks import (
+    StepTimeCallback, TimedTensorBoard, ProfilingCallback, CheckpointCallback, BestWeightsCallback, RegistryCallback,
+    ResumableEarlyStopping
+)
+
+# Parâmetros padrão do TensorBoard. O registro de histogramas (histogram_freq) calcula e grava a distribuição
+# dos pesos de todas as camadas da ResNet50, sendo a parte mais cara do logging; profile_batch=0 desativa o profiler
+DEFAULT_TENSORBOARD_OPTIONS = {
+    'histogram_freq': 1,
+    'update_freq': 'epoch',
+    'profile_batch': 0,
+    'write_graph': True,
+    'write_images': False,
+}
+
+# Erros de falta de memória no treinamento, tratados com uma mensagem específica (ver MEMORY_ERROR_MESSAGE)
+MEMORY_ERRORS = (MemoryError, tf.errors.ResourceExhaustedError)
+MEMORY_ERROR_MESSAGE = ("Memória insuficiente para o batch size / input size escolhidos. Reduza o batch size, "
+                        "utilize a acumulação de gradientes ou a verificação automática do batch size")
+
+
+class Trainer:
+
+    def __init__(self, neural_network, train_data, val_data, epochs, logName,
+                 feature_extractor=None, fine_tune_blocks=0, fine_tune_epochs=0, log=print, run_config=None,
+                 tensorboard_options=None, verbose=1, checkpoint_freq=1, early_stopping_patience=0,
+                 restore_best=True, resume_from=None, evaluate=True, tta=(), steps_per_epoch=None,
+                 validation_steps=None, chief=True):
+        """
+        Laço de treinamento independente de interface gráfica, utilizado tanto pelo TrainerThread (PyQt)
+        quanto pela linha de comando (HeadlessTrainer).
+        parametro log: Função chamada com cada mensagem de log (ex: print ou log_signal.emit)
+        parametro run_config: Parâmetros da execução (dataset, precisão, XLA...), salvos em run_config.json
+                              no diretório de logs junto com o tempo medido por passo
+        parametro tensorboard_options: Parâmetros do TensorBoard, ver DEFAULT_TENSORBOARD_OPTIONS
+        parametro verbose: Saída do próprio Keras no terminal (0 desativa a barra de progresso)
+        parametro checkpoint_freq: Intervalo, em épocas, entre os checkpoints (0 desativa)
+        parametro early_stopping_patience: Épocas sem melhora de val_accuracy antes de interromper (0 desativa)
+        parametro restore_best: Restaura, ao final, os pesos da época com a melhor val_accuracy
+        parametro resume_from: Diretório de logs de uma execução anterior, retomada a partir do último checkpoint
+        parametro evaluate: Avalia o modelo final sobre a validação (matriz de confusão, métricas por classe e
+                            calibração), com o relatório salvo no diretório de logs (ver Evaluator)
+        parametro tta: Variações da test-time augmentation utilizadas na avaliação (ver TTA_VIEWS)
+        parametro steps_per_epoch / validation_steps: Passos por época, obrigatórios quando os dados não têm
+                                                      tamanho definido (ex: treinamento distribuído)
+        parametro chief: No treinamento distribuído, apenas o worker principal (chief) grava os logs em logs/fit/
+                         e no índice de execuções; os demais utilizam um diretório temporário, removido ao final
+        """
+        self.neural_network = neural_network
+        self.train_data = train_data
+        self.val_data = val_data
+        self.epochs = epochs
+        self.logName = logName
+        self.history = None
+        self.log = log
+        self.run_config = dict(run_config or {})
+        self.verbose = verbose
+        self.tensorboard_options = dict(DEFAULT_TENSORBOARD_OPTIONS, **(tensorboard_options or {}))
+        self.checkpoint_freq = checkpoint_freq
+        self.early_stopping_patience = early_stopping_patience
+        self.restore_best = restore_best
+        self.resume_from = resume_from
+        self.evaluate = evaluate
+        self.tta = tuple(tta or ())
+        self.steps_per_epoch = steps_per_epoch
+        self.validation_steps = validation_steps
+        self.chief = chief
+
+        # Modo de extração de características: neural_network é apenas a cabeça da rede
+        self.feature_extractor = feature_extractor
+        self.fine_tune_blocks = fine_tune_blocks
+        self.fine_tune_epochs = fine_tune_epochs
+
+    def train(self):
+
+        if self.resume_from is not None and self.feature_extractor is not None:
+            raise ValueError("A retomada de treinamento não é suportada no modo de extração de características")
+        if self.resume_from is not None and self.checkpoint_freq <= 0:
+            raise ValueError("A retomada de treinamento requer checkpoints (checkpoint_freq maior que 0)")
+
+        model = Model()
+        if not self.chief:
+            log_path = tempfile.mkdtemp(prefix=f"{self.logName}_worker_")
+        else:
+            log_path = self.resume_from or model.log_directory_manager(self.logName)
+
+        self.log("Retomando treinamento..." if self.resume_from else "Iniciando treinamento...")
+        self.log(f"Logs armazenados em: {log_path}")
+        self.log(f"Precisão: {self.run_config.get('precision', 'float32')} - "
+                 f"XLA: {'ativado' if self.run_config.get('jit_compile') else 'desativado'}")
+
+        # callback customizado
+        outer = self
+
+        class LogCallback(Callback):
+            def on_epoch_end(self, epoch, logs=None):
+                logs = logs or {}
+                msg = (
+                    f"Época {epoch + 1}/{self.params['epochs']} - "
+                    f"loss: {logs.get('loss', 0):.4f} - "
+                    f"acc: {logs.get('accuracy', 0):.4f} - "
+                    f"val_loss: {logs.get('val_loss', 0):.4f} - "
+                    f"val_acc: {logs.get('val_accuracy', 0):.4f}"
+                )
+                outer.log(msg)
+
+        tensorboard_callback = TimedTensorBoard(self.log, log_dir=log_path, **self.tensorboard_options)
+        log_callback = LogCallback()
+        step_time_callback = StepTimeCallback(self.log)
+        profiling_callback = ProfilingCallback(log_path, self.run_config.get('batch_size'), self.log)
+
+        # Índice das execuções (logs/runs.sqlite), utilizado pela comparação de execuções da interface
+        callbacks = [tensorboard_callback, log_callback, step_time_callback, profiling_callback]
+        registry = RunRegistry() if self.chief else None
+        if registry is not None:
+            callbacks.append(RegistryCallback(registry, log_path, self.log))
+
+        # Interrompe o treinamento quando a val_accuracy deixa de melhorar
+        states = {}
+        if self.early_stopping_patience > 0:
+            states['early_stopping'] = ResumableEarlyStopping(monitor='val_accuracy', mode='max', verbose=1,
+                                                              patience=self.early_stopping_patience)
+
+        # Os melhores pesos só são aplicados ao modelo no on_train_end, os demais callbacks veem a última época
+        if self.restore_best:
+            states['best_weights'] = BestWeightsCallback('val_accuracy', self.log)
+        callbacks += list(states.values())
+
+        # Checkpoints periódicos (pesos + otimizador + época + estado dos callbacks acima), utilizados para retomar
+        # a execução. É o último callback, para salvar o estado já atualizado ao final de cada época
+        initial_epoch = 0
+        if self.checkpoint_freq > 0:
+            checkpoint_callback = CheckpointCallback(log_path, self.checkpoint_freq, self.log, states=states)
+            if self.resume_from:
+                initial_epoch = checkpoint_callback.restore(self.neural_network)
+            callbacks.append(checkpoint_callback)
+
+        run_config = self.save_run_config(log_path, status='running')
+        if registry is not None:
+            registry.start_run(log_path, self.logName, run_config)
+
+        try:
+            if self.feature_extractor is None:
+                # Os dados de treinamento recebem a marcação de tempo da espera por dados (ProfilingCallback)
+                self.history = self.neural_network.fit(
+                    profiling_callback.instrument(self.train_data),
+                    epochs=self.epochs,
+                    initial_epoch=initial_epoch,
+                    steps_per_epoch=self.steps_per_epoch,
+                    validation_data=self.val_data,
+                    validation_steps=self.validation_steps,
+                    callbacks=callbacks,
+                    verbose=self.verbose
+                )
+            else:
+                self.history = self.train_feature_extraction(callbacks, profiling_callback)
+        except BaseException:
+            # Interrupções (ex: Ctrl+C) também são registradas, a execução pode ser retomada do último checkpoint
+            self.save_run_config(log_path, status='failed')
+            if registry is not None:
+                registry.finish_run(log_path, 'failed')
+            raise
+
+        if self.evaluate:
+            self.evaluate_model(log_path)
+
+        run_config = self.save_run_config(log_path, step_time_callback.summary(), tensorboard_callback.summary(),
+                                          'finished')
+        if registry is not None:
+            registry.finish_run(log_path, 'finished', run_config)
+        else:
+            shutil.rmtree(log_path, ignore_errors=True)
+
+        self.log("Treinamento finalizado com sucesso!")
+        return self.history
+
+    def save_run_config(self, log_path, step_time_ms=None, logging_percent=None, status='running'):
+        """
+        Registro da configuração da execução, permitindo comparar os modos (ex: float32 vs bfloat16, XLA).
+        É gravado no início (status 'running', utilizado para retomar a execução) e atualizado ao final.
+        Retorna o dicionário gravado, também registrado no índice de execuções (RunRegistry).
+        """
+        os.makedirs(log_path, exist_ok=True)
+        run_config = dict(self.run_config, epochs=self.epochs, log_name=self.logName, step_time_ms=step_time_ms,
+                          tensorboard=self.tensorboard_options, logging_percent=logging_percent,
+                          checkpoint_freq=self.checkpoint_freq, early_stopping_patience=self.early_stopping_patience,
+                          restore_best=self.restore_best, evaluate=self.evaluate, tta=list(self.tta),
+                          status=status)
+        # Escrita atômica: a retomada depende deste arquivo, justamente quando o treinamento é interrompido
+        Model.write_json(os.path.join(log_path, "run_config.json"), run_config, indent=2)
+        return run_config
+
+    def evaluate_model(self, log_path):
+        """
+        Avaliação do modelo final sobre a validação, salva em {log_path}/evaluation.json. O resumo (acurácia,
+        F1 macro e ECE) é incluído no run_config.json e no índice de execuções.
+        Uma falha na avaliação é apenas registrada no log, sem invalidar o treinamento.
+        """
+        try:
+            dataset = self.run_config.get('dataset')
+            class_indices = Model.class_indices(dataset) if dataset and os.path.isdir(dataset) else None
+            class_names = sorted(class_indices, key=class_indices.get) if class_indices else None
+
+            evaluator = Evaluator(self.neural_network, class_names, self.tta, log=self.log)
+            report = evaluator.evaluate(self.val_data, log_path)
+            self.run_config['evaluation'] = {key: report[key] for key in ('accuracy', 'macro_f1', 'ece', 'tta')}
+        except Exception as e:
+            self.log(f"Erro na avaliação do modelo: {str(e)}")
+
+    def train_feature_extraction(self, callbacks, profiling_callback):
+        """
+        Treinamento em duas etapas:
+            * A cabeça da rede é treinada sobre os embeddings da ResNet50 congelada (calculados uma única vez)
+            * Opcionalmente, os últimos blocos da ResNet50 são descongelados e o modelo completo é ajustado
+              sobre as imagens (fine-tuning), continuando a contagem de épocas da etapa anterior
+        Ao final, self.neural_network passa a ser o modelo completo (imagem → classe), pronto para ser salvo.
+        """
+        train_features, val_features = self.feature_extractor.build_datasets(self.log)
+
+        self.log("Treinando a cabeça da rede sobre as características extraídas...")
+        history = self.neural_network.fit(
+            profiling_callback.instrument(train_features),
+            epochs=self.epochs,
+            validation_data=val_features,
+            callbacks=callbacks,
+            verbose=self.verbose
+        )
+
+        self.neural_network = self.feature_extractor.build_full_model(self.neural_network)
+
+        if self.fine_tune_blocks > 0 and self.fine_tune_epochs > 0:
+            blocks = self.feature_extractor.unfreeze(self.neural_network, self.fine_tune_blocks)
+            self.log(f"Fine-tuning dos blocos: {', '.join(blocks)}")
+            history = self.neural_network.fit(
+                profiling_callback.instrument(self.train_data),
+                epochs=self.epochs + self.fine_tune_epochs,
+                initial_epoch=self.epochs,
+                validation_data=self.val_data,
+                callbacks=callbacks,
+                verbose=self.verbose
+            )
+
+        return history
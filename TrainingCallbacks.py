@@ -0,0 +1,476 @@
+import os
+import sys
+import time
+from collections import deque
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback, EarlyStopping, TensorBoard
+
+
+def process_memory_mb():
+    """
+    Memória residente (RSS) do processo, em MB. Utiliza o psutil quando disponível; caso contrário lê
+    /proc/self/statm (Linux) ou, como último recurso, o pico de memória informado pelo módulo resource.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes no macOS, KB no Linux
+    except ImportError:
+        return None
+
+
+class StepTimeCallback(Callback):
+
+    def __init__(self, log=print):
+        """
+        Mede o tempo de cada passo (lote) de treinamento e informa, ao final de cada época, a média e a mediana.
+        A mediana é menos afetada pelo primeiro passo, que inclui a construção do grafo (e a compilação XLA).
+        parametro log: Função chamada com a mensagem de cada época
+        """
+        super().__init__()
+        self.log = log
+        self.batch_start = None
+        self.epoch_times = []
+        self.history = []  # (média, mediana) em segundos, por época
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_times = []
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.batch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.epoch_times.append(time.perf_counter() - self.batch_start)
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self.epoch_times:
+            return
+        mean, median = float(np.mean(self.epoch_times)), float(np.median(self.epoch_times))
+        self.history.append((mean, median))
+        self.log(f"Tempo por passo: média {mean * 1000:.1f} ms - mediana {median * 1000:.1f} ms")
+
+    def summary(self):
+        # Mediana dos tempos medianos de todas as épocas, em milissegundos
+        if not self.history:
+            return None
+        return float(np.median([median for _, median in self.history])) * 1000
+
+
+class TimedTensorBoard(TensorBoard):
+
+    def __init__(self, log=print, **kwargs):
+        """
+        TensorBoard que mede o tempo gasto com o próprio registro (escalares, histogramas, imagens, profiling)
+        e informa, ao final de cada época, quanto do tempo total da época foi gasto com logging.
+        parametro log: Função chamada com o relatório de cada época
+        parametro kwargs: Parâmetros do TensorBoard (histogram_freq, update_freq, profile_batch...)
+        """
+        super().__init__(**kwargs)
+        self.log = log
+        self.epoch_start = None
+        self.logging_time = 0.0
+        self.history = []  # (tempo total da época, tempo de logging) em segundos
+
+    def timed(self, method, *args):
+        start = time.perf_counter()
+        method(*args)
+        self.logging_time += time.perf_counter() - start
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+        self.logging_time = 0.0
+        self.timed(super().on_epoch_begin, epoch, logs)
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.timed(super().on_train_batch_begin, batch, logs)
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.timed(super().on_train_batch_end, batch, logs)
+
+    def on_test_begin(self, logs=None):
+        self.timed(super().on_test_begin, logs)
+
+    def on_test_end(self, logs=None):
+        self.timed(super().on_test_end, logs)
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.timed(super().on_epoch_end, epoch, logs)
+
+        total = time.perf_counter() - self.epoch_start
+        self.history.append((total, self.logging_time))
+        self.log(f"Tempo da época: {total:.1f} s - treinamento {total - self.logging_time:.1f} s - "
+                 f"logging (TensorBoard) {self.logging_time:.2f} s ({100 * self.logging_time / total:.1f}%)")
+
+    def summary(self):
+        # Fração média do tempo das épocas gasta com logging, em porcentagem
+        if not self.history:
+            return None
+        return 100 * sum(logging for _, logging in self.history) / sum(total for total, _ in self.history)
+
+
+class TimedSequence(tf.keras.utils.Sequence):
+
+    def __init__(self, sequence, ready):
+        """
+        Envoltório de uma Sequence do Keras (ex: iteradores do ImageDataGenerator) que registra em ready o instante
+        em que cada lote fica pronto (ver ProfilingCallback.instrument).
+        """
+        self.sequence = sequence
+        self.ready = ready
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def __getitem__(self, index):
+        batch = self.sequence[index]
+        self.ready.append(time.perf_counter())
+        return batch
+
+    def on_epoch_end(self):
+        self.sequence.on_epoch_end()
+
+
+class ProfilingCallback(Callback):
+
+    def __init__(self, log_dir, batch_size=None, log=print, interval=2.0):
+        """
+        Instrumentação por passo do treinamento:
+            * espera por dados → parte de cada passo em que a rede aguarda o lote de entrada. O Keras busca o lote
+              dentro do próprio passo (train_function), por isso a espera é medida nos dados (ver instrument): o
+              instante em que o lote fica disponível é comparado com o início do passo. Uma espera alta indica
+              um treinamento limitado pelo pipeline de dados; próxima de zero, limitado pela computação
+            * computação → restante do tempo de cada passo
+            * imagens/s, ETA da época e do treinamento, e memória residente (RSS) do processo
+        As mensagens são enviadas no máximo a cada interval segundos, para não sobrecarregar a interface, e os
+        mesmos valores são gravados como escalares do TensorBoard em log_dir/profiling.
+        parametro batch_size: Quantidade de imagens por lote (None informa apenas passos/s)
+        """
+        super().__init__()
+        self.log_dir = os.path.join(log_dir, "profiling")
+        self.batch_size = batch_size
+        self.log = log
+        self.interval = interval
+
+        self.writer = None
+        self.global_step = 0
+        self.epoch_durations = []
+
+        # Instantes (perf_counter) em que os lotes de treinamento ficaram disponíveis, na ordem de consumo
+        self.ready = deque(maxlen=1024)
+        self.instrumented = False
+
+    def instrument(self, data):
+        """
+        Retorna os dados de treinamento instrumentados para a medição da espera por dados:
+            * tf.data → um map ao final do pipeline registra o instante em que cada lote sai do prefetch, já
+              dentro do passo; a espera é a diferença entre esse instante e o início do passo
+            * Sequence do Keras (ImageDataGenerator) → o instante em que cada lote é montado; a espera é o quanto
+              esse instante passa do início do passo (zero quando o lote já estava pronto)
+        Outros formatos (ex: DatasetCreator do treinamento distribuído) são retornados sem alteração e a espera
+        não é informada.
+        """
+        def stamp():
+            self.ready.append(time.perf_counter())
+            return 0
+
+        if isinstance(data, tf.data.Dataset):
+            self.instrumented = True
+
+            def timed(*element):
+                with tf.control_dependencies([tf.py_function(stamp, [], tf.int32)]):
+                    return tf.nest.map_structure(tf.identity, element)
+
+            return data.map(timed)
+
+        if isinstance(data, tf.keras.utils.Sequence):
+            self.instrumented = True
+            return TimedSequence(data, self.ready)
+
+        return data
+
+    def on_train_begin(self, logs=None):
+        self.writer = tf.summary.create_file_writer(self.log_dir)
+        self.global_step = 0
+        self.epoch_durations = []
+        # Descarta os lotes lidos pelo Keras antes do treinamento (ex: inspeção do formato de uma Sequence)
+        self.ready.clear()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch
+        self.epoch_start = time.perf_counter()
+        self.last_batch_end = self.epoch_start
+        self.last_report = self.epoch_start
+        self.wait_time = 0.0
+        self.compute_time = 0.0
+        self.steps = 0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self.batch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.last_batch_end = time.perf_counter()
+        step = self.last_batch_end - self.batch_start
+
+        # Cada passo consome um lote: os instantes registrados pelo instrument são pareados em ordem
+        wait = 0.0
+        if self.ready:
+            wait = min(max(self.ready.popleft() - self.batch_start, 0.0), step)
+        self.wait_time += wait
+        self.compute_time += step - wait
+        self.steps += 1
+        self.global_step += 1
+
+        if self.last_batch_end - self.last_report >= self.interval:
+            self.last_report = self.last_batch_end
+            self.report()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_durations.append(time.perf_counter() - self.epoch_start)
+        self.report(epoch_end=True)
+
+    def on_train_end(self, logs=None):
+        if self.writer is not None:
+            self.writer.close()
+
+    def report(self, epoch_end=False):
+        if self.steps == 0:
+            return
+
+        busy = self.wait_time + self.compute_time
+        wait_percent = 100 * self.wait_time / busy if busy > 0 else 0.0
+        step_time = busy / self.steps
+        steps_per_second = 1 / step_time if step_time > 0 else 0.0
+        memory = process_memory_mb()
+
+        total_steps = self.params.get('steps') or self.steps
+        total_epochs = self.params.get('epochs', self.epoch + 1)
+        epoch_eta = max(total_steps - self.steps, 0) * step_time
+        epoch_time = (sum(self.epoch_durations) / len(self.epoch_durations)) if self.epoch_durations \
+            else total_steps * step_time
+        total_eta = epoch_eta + (total_epochs - self.epoch - 1) * epoch_time
+
+        if self.batch_size:
+            throughput = f"{steps_per_second * self.batch_size:.1f} imagens/s"
+        else:
+            throughput = f"{steps_per_second:.2f} passos/s"
+
+        wait = f"espera por dados {wait_percent:.1f}%" if self.instrumented else "espera por dados n/d"
+        self.log(f"{'Fim da época' if epoch_end else 'Lote'} {self.steps}/{total_steps} - "
+                 f"{wait} - {throughput} - "
+                 f"ETA época {epoch_eta:.0f} s - ETA total {total_eta / 60:.1f} min"
+                 + (f" - memória {memory:.0f} MB" if memory is not None else ""))
+
+        with self.writer.as_default():
+            if self.instrumented:
+                tf.summary.scalar("perfil/espera_por_dados_percent", wait_percent, step=self.global_step)
+            tf.summary.scalar("perfil/tempo_por_passo_ms", step_time * 1000, step=self.global_step)
+            tf.summary.scalar("perfil/passos_por_segundo", steps_per_second, step=self.global_step)
+            if self.batch_size:
+                tf.summary.scalar("perfil/imagens_por_segundo", steps_per_second * self.batch_size,
+                                  step=self.global_step)
+            if memory is not None:
+                tf.summary.scalar("perfil/memoria_rss_mb", memory, step=self.global_step)
+
+
+class CheckpointCallback(Callback):
+
+    def __init__(self, log_dir, period=1, log=print, max_to_keep=2, states=None):
+        """
+        Checkpoints periódicos do treinamento (pesos, estado do otimizador e época) em log_dir/checkpoints,
+        permitindo retomar uma execução interrompida a partir do último checkpoint (ver restore).
+        Quando suportado pela versão do TensorFlow, a gravação é assíncrona e não bloqueia o treinamento.
+        parametro period: Intervalo, em épocas, entre os checkpoints
+        parametro max_to_keep: Quantidade de checkpoints mantidos em disco (os mais antigos são removidos)
+        parametro states: Dicionário nome → callback com checkpoint_state(model), cujo estado também é salvo e
+                          restaurado (ex: BestWeightsCallback, ResumableEarlyStopping). Deve ser o último
+                          callback da lista, para gravar o estado já atualizado pelos demais ao final da época
+        """
+        super().__init__()
+        self.directory = os.path.join(log_dir, "checkpoints")
+        self.period = period
+        self.log = log
+        self.max_to_keep = max_to_keep
+        self.states = dict(states or {})
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.checkpoint = None
+        self.manager = None
+
+        try:
+            self.options = tf.train.CheckpointOptions(experimental_enable_async_checkpoint=True)
+        except TypeError:
+            self.options = None
+
+    def bind(self, model):
+        # O checkpoint é associado ao modelo (e ao seu otimizador) antes do início do fit
+        states = {name: callback.checkpoint_state(model) for name, callback in self.states.items()}
+        self.checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=self.epoch, **states)
+        self.manager = tf.train.CheckpointManager(self.checkpoint, self.directory, max_to_keep=self.max_to_keep)
+
+    def restore(self, model):
+        """
+        Restaura o último checkpoint disponível e retorna a época a partir da qual o treinamento continua
+        (0 se não houver checkpoint). O estado do otimizador é restaurado quando suas variáveis são criadas.
+        """
+        self.bind(model)
+        if self.manager.latest_checkpoint is None:
+            return 0
+
+        self.checkpoint.restore(self.manager.latest_checkpoint)
+        self.log(f"Checkpoint restaurado: {self.manager.latest_checkpoint} (época {int(self.epoch.numpy())})")
+        for callback in self.states.values():
+            callback.resume(self.log)
+        return int(self.epoch.numpy())
+
+    def on_train_begin(self, logs=None):
+        if self.checkpoint is None or self.checkpoint.model is not self.model:
+            self.bind(self.model)
+
+    def on_epoch_end(self, epoch, logs=None):
+        if (epoch + 1) % self.period != 0:
+            return
+
+        self.epoch.assign(epoch + 1)
+        self.manager.save(checkpoint_number=epoch + 1, options=self.options)
+
+    def on_train_end(self, logs=None):
+        # Aguarda a conclusão de uma gravação assíncrona ainda em andamento
+        sync = getattr(self.checkpoint, "sync", None)
+        if sync is not None:
+            sync()
+
+
+class BestWeightsCallback(Callback):
+
+    def __init__(self, monitor='val_accuracy', log=print):
+        """
+        Mantém uma cópia dos pesos da época com o melhor valor de monitor e os restaura ao final do treinamento,
+        de modo que o modelo salvo seja o melhor e não o da última época. A cópia, o melhor valor e a sua época
+        são salvos nos checkpoints (ver checkpoint_state): uma execução retomada continua comparando com o
+        melhor valor anterior e restaura os melhores pesos mesmo que sejam de antes da interrupção.
+        obs: O EarlyStopping do Keras só restaura os melhores pesos quando interrompe o treinamento
+        """
+        super().__init__()
+        self.monitor = monitor
+        self.log = log
+        self.best = tf.Variable(-np.inf, dtype=tf.float64, trainable=False)
+        self.best_epoch = tf.Variable(-1, dtype=tf.int64, trainable=False)
+        self.best_weights = None
+        self.state = None
+        self.state_model = None
+        self.resumed = False
+
+    def checkpoint_state(self, model):
+        # Variáveis com a cópia dos melhores pesos, criadas uma vez por modelo (a extração de características
+        # treina primeiro a cabeça e depois o modelo completo)
+        if self.state_model is not model:
+            self.best_weights = [tf.Variable(weights, trainable=False) for weights in model.get_weights()]
+            self.state = tf.train.Checkpoint(best=self.best, epoch=self.best_epoch, weights=self.best_weights)
+            self.state_model = model
+        return self.state
+
+    def resume(self, log=print):
+        # Chamado pelo CheckpointCallback.restore: o estado restaurado é mantido no on_train_begin
+        self.resumed = True
+        if self.best_epoch.numpy() >= 0:
+            log(f"Melhor {self.monitor} anterior: {self.best.numpy():.4f} (época {self.best_epoch.numpy() + 1})")
+
+    def on_train_begin(self, logs=None):
+        self.checkpoint_state(self.model)
+        if not self.resumed:
+            self.best.assign(-np.inf)
+            self.best_epoch.assign(-1)
+        self.resumed = False
+
+    def on_epoch_end(self, epoch, logs=None):
+        value = (logs or {}).get(self.monitor)
+        if value is not None and value > self.best.numpy():
+            self.best.assign(value)
+            self.best_epoch.assign(epoch)
+            for variable, weights in zip(self.best_weights, self.model.get_weights()):
+                variable.assign(weights)
+
+    def on_train_end(self, logs=None):
+        if self.best_epoch.numpy() < 0:
+            return
+        self.model.set_weights([variable.numpy() for variable in self.best_weights])
+        self.log(f"Pesos restaurados da época {self.best_epoch.numpy() + 1} "
+                 f"({self.monitor}: {self.best.numpy():.4f})")
+
+
+class ResumableEarlyStopping(EarlyStopping):
+
+    def __init__(self, **kwargs):
+        """
+        EarlyStopping do Keras cujo estado (melhor valor, sua época e épocas sem melhora) é salvo nos checkpoints
+        (ver CheckpointCallback): em uma execução retomada, a paciência continua de onde parou em vez de
+        recomeçar do zero. Recebe os mesmos parâmetros do EarlyStopping.
+        """
+        super().__init__(**kwargs)
+        self.saved_best = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+        self.saved_best_epoch = tf.Variable(-1, dtype=tf.int64, trainable=False)
+        self.saved_wait = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.state = tf.train.Checkpoint(best=self.saved_best, best_epoch=self.saved_best_epoch,
+                                         wait=self.saved_wait)
+        self.resumed = False
+
+    def checkpoint_state(self, model):
+        return self.state
+
+    def resume(self, log=print):
+        self.resumed = True
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        if self.resumed and self.saved_best_epoch.numpy() >= 0:
+            self.best = float(self.saved_best.numpy())
+            self.best_epoch = int(self.saved_best_epoch.numpy())
+            self.wait = int(self.saved_wait.numpy())
+        self.resumed = False
+
+    def on_epoch_end(self, epoch, logs=None):
+        super().on_epoch_end(epoch, logs)
+        if np.isfinite(self.best):
+            self.saved_best.assign(self.best)
+            self.saved_best_epoch.assign(getattr(self, 'best_epoch', epoch))
+            self.saved_wait.assign(self.wait)
+
+
+class RegistryCallback(Callback):
+
+    def __init__(self, registry, run_dir, log=print):
+        """
+        Grava as métricas de cada época no índice de execuções (RunRegistry), lido pela comparação de execuções
+        da interface sem reprocessar os arquivos do TensorBoard.
+        """
+        super().__init__()
+        self.registry = registry
+        self.run_dir = run_dir
+        self.log = log
+        self.epoch_start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        metrics = {key: float(value) for key, value in (logs or {}).items() if np.isscalar(value)}
+        if self.epoch_start is not None:
+            metrics['epoch_seconds'] = time.perf_counter() - self.epoch_start
+
+        try:
+            self.registry.log_epoch(self.run_dir, epoch + 1, metrics)
+        except Exception as e:
+            # Uma falha no índice não interrompe o treinamento, os logs do TensorBoard continuam completos
+            self.log(f"Não foi possível registrar a época no índice de execuções: {str(e)}")